@@ -0,0 +1,54 @@
+"""Autocomplete latency of the prefix index at growing numbers of names.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_autocomplete [--sizes 10000 100000 1000000]
+
+Names are the synthetic "First Last" pairs of bench_fuzzy, each added once per movie it appears in. Queries are the
+first one to six characters of a random name or of its last word, i.e. what a user types keystroke by keystroke.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_fuzzy import synthetic_names
+from movie_web_app.adapters.fuzzy_index import ACTOR
+from movie_web_app.adapters.prefix_index import PrefixIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(235)
+    print('{:>9} {:>9} {:>10} {:>10}'.format('names', 'build s', 'mean us', 'p99 us'))
+    for size in args.sizes:
+        names = synthetic_names(size, rng)
+        index = PrefixIndex()
+        start = time.perf_counter()
+        for name in names:
+            for _ in range(rng.randint(1, 3)):
+                index.add_name(name, ACTOR)
+        index.complete('a')
+        build = time.perf_counter() - start
+
+        queries = []
+        for _ in range(args.queries):
+            words = rng.choice(names).split()
+            queries.append(rng.choice([words[0], words[-1]])[:rng.randint(1, 6)])
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.complete(query, 10)
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        print('{:>9} {:>9.1f} {:>10.1f} {:>10.1f}'.format(
+            size, build, sum(timings) / len(timings) * 1e6, timings[int(len(timings) * 0.99)] * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Memory and set algebra of the genre, year, director and actor indexes: lists of ranks against compressed bitmaps.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bitmaps [--movies 1000000] [--repeat 5]
+
+List sizes count the lists only, not the rank ints they point to, which the movies own anyway.
+"""
+import argparse
+import heapq
+import random
+import sys
+import time
+
+from pyroaring import BitMap
+
+from movie_web_app.adapters.movie_indexes import intersect
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy',
+          'History', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War',
+          'Western']
+
+
+def synthetic_indexes(n, seed=235):
+    # As in the sample data: 1-3 genres, 4 actors and a director with about 50 movies per movie, years 2006-2016.
+    rng = random.Random(seed)
+    indexes = {'genre': dict(), 'year': dict(), 'director': dict(), 'actor': dict()}
+    for rank in range(1, n + 1):
+        terms = [('year', rng.randint(2006, 2016)), ('director', rng.randrange(max(n // 50, 1)))]
+        terms += [('genre', genre) for genre in rng.sample(GENRES, rng.randint(1, 3))]
+        terms += [('actor', actor) for actor in rng.sample(range(max(n // 5, 4)), 4)]
+        for facet, value in terms:
+            indexes[facet].setdefault(value, list()).append(rank)
+    return indexes
+
+
+def union(postings):
+    ranks = list()
+    for rank in heapq.merge(*postings):
+        if not ranks or ranks[-1] != rank:
+            ranks.append(rank)
+    return ranks
+
+
+def difference(ranks, excluded):
+    excluded = set(excluded)
+    return [rank for rank in ranks if rank not in excluded]
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lists = synthetic_indexes(args.movies)
+    bitmaps = {facet: {value: BitMap(ranks) for value, ranks in postings.items()} for facet, postings in lists.items()}
+
+    print('{} movies'.format(args.movies))
+    print('{:>9}  {:>8}  {:>12}  {:>12}'.format('index', 'keys', 'lists (MB)', 'bitmaps (MB)'))
+    for facet in lists:
+        list_size = sum(sys.getsizeof(ranks) for ranks in lists[facet].values())
+        bitmap_size = sum(sys.getsizeof(ranks) for ranks in bitmaps[facet].values())
+        print('{:>9}  {:>8}  {:>12.1f}  {:>12.1f}'.format(facet, len(lists[facet]), list_size / 1e6, bitmap_size / 1e6))
+
+    genre, year, director = lists['genre'], lists['year'], lists['director']
+    genre_bitmap, year_bitmap, director_bitmap = bitmaps['genre'], bitmaps['year'], bitmaps['director']
+    queries = [
+        ('Drama AND Comedy AND 2012',
+         lambda: intersect([genre['Drama'], genre['Comedy'], year[2012]]),
+         lambda: genre_bitmap['Drama'] & genre_bitmap['Comedy'] & year_bitmap[2012]),
+        ('director 0 AND Drama',
+         lambda: intersect([director[0], genre['Drama']]),
+         lambda: director_bitmap[0] & genre_bitmap['Drama']),
+        ('Drama OR Comedy OR Action',
+         lambda: union([genre['Drama'], genre['Comedy'], genre['Action']]),
+         lambda: BitMap.union(genre_bitmap['Drama'], genre_bitmap['Comedy'], genre_bitmap['Action'])),
+        ('Drama ANDNOT Comedy',
+         lambda: difference(genre['Drama'], genre['Comedy']),
+         lambda: genre_bitmap['Drama'] - genre_bitmap['Comedy']),
+    ]
+    print()
+    print('{:>26}  {:>9}  {:>12}  {:>12}  {:>8}'.format('query', 'matches', 'lists (ms)', 'bitmaps (ms)', 'speedup'))
+    for name, list_query, bitmap_query in queries:
+        list_time, list_result = best_time(list_query, args.repeat)
+        bitmap_time, bitmap_result = best_time(bitmap_query, args.repeat)
+        assert list_result == list(bitmap_result)
+        print('{:>26}  {:>9}  {:>12.3f}  {:>12.3f}  {:>7.0f}x'.format(name, len(list_result), list_time * 1e3,
+                                                                     bitmap_time * 1e3, list_time / bitmap_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Faceted browsing as the catalog grows: intersecting posting lists against scanning every movie.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_browse [--sizes 1000 100000 1000000] [--repeat 5]
+
+Each query is what /movies/browse answers: the first page of matches, their total and facet counts. A selective
+query (a director and a genre) should take about the same time at every size, since the work follows the shortest
+posting list; a broad one (a genre and a year range) follows the number of matches.
+"""
+import argparse
+import random
+import time
+
+from movie_web_app.adapters.movie_columns import MovieColumns
+from movie_web_app.adapters.movie_indexes import intersect
+from movie_web_app.domain.model import Genre, Movie
+from movie_web_app.domain.registry import EntityRegistry
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy',
+          'History', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War',
+          'Western']
+
+
+def synthetic_catalog(n, seed=235):
+    # About 50 movies per director, however large the catalog, as in the sample data.
+    rng = random.Random(seed)
+    movies = list()
+    columns = MovieColumns()
+    genres = {genre: list() for genre in GENRES}
+    directors = dict()
+    registry = EntityRegistry()
+    for rank in range(1, n + 1):
+        movie = Movie('Movie {}'.format(rank), rng.randint(2006, 2016))
+        movie.rank = rank
+        movie.runtime_minutes = rng.randint(66, 191)
+        movie.rating = round(rng.uniform(1.9, 9.0), 1)
+        director = 'Director {}'.format(rng.randrange(max(n // 50, 1)))
+        movie.director = registry.director(director)
+        for genre in rng.sample(GENRES, rng.randint(1, 3)):
+            movie.add_genre(registry.genre(genre))
+            genres[genre].append(rank)
+        directors.setdefault(director, list()).append(rank)
+        columns.add_movie(movie)
+        movies.append(movie)
+    return movies, columns, genres, directors
+
+
+def indexed_query(columns, postings, ranges):
+    ranks = columns.restrict(intersect(postings) if postings else None, ranges)
+    return ranks[:2].tolist(), len(ranks), columns.facet_counts(ranks)
+
+
+def scan_query(movies, genre, low_year, high_year):
+    genre = Genre(genre)
+    matches = [movie for movie in movies if genre in movie.genres and low_year <= movie.release_year <= high_year]
+    return [movie.rank for movie in matches[:2]], len(matches)
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>9}  {:>16}  {:>16}  {:>16}'.format('movies', 'selective (ms)', 'broad (ms)', 'broad scan (ms)'))
+    for n in args.sizes:
+        movies, columns, genres, directors = synthetic_catalog(n)
+        selective_time, _ = best_time(
+            lambda: indexed_query(columns, [genres['Drama'], directors['Director 0']], None), args.repeat)
+        broad_time, (ranks, total, _) = best_time(
+            lambda: indexed_query(columns, [genres['Drama']], {'release_year': (2010, 2012)}), args.repeat)
+
+        scan_time, (scan_ranks, scan_total) = best_time(
+            lambda: scan_query(movies, 'Drama', 2010, 2012), args.repeat)
+        assert (ranks, total) == (scan_ranks, scan_total)
+
+        print('{:>9}  {:>16.3f}  {:>16.2f}  {:>16.2f}'.format(n, selective_time * 1e3, broad_time * 1e3,
+                                                            scan_time * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Filter, sort and aggregate over the catalog: the columnar NumPy store against loops over Movie objects.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_columns [--sizes 1000 100000 1000000] [--repeat 5]
+
+The query is the kind /api/movies answers: movies from 2010 to 2012 rated 8 or more, the 10 with the most votes,
+and the mean revenue of the matches.
+"""
+import argparse
+import random
+import time
+
+from movie_web_app.adapters.movie_columns import MovieColumns
+from movie_web_app.domain.model import Movie
+
+RANGES = {'release_year': (2010, 2012), 'rating': (8.0, None)}
+
+
+def synthetic_movies(n, seed=235):
+    rng = random.Random(seed)
+    movies = list()
+    for rank in range(1, n + 1):
+        movie = Movie('Movie {}'.format(rank), rng.randint(2006, 2016))
+        movie.rank = rank
+        movie.runtime_minutes = rng.randint(66, 191)
+        movie.rating = round(rng.uniform(1.9, 9.0), 1)
+        movie.votes = rng.randint(61, 1791916)
+        movie.revenue = round(rng.uniform(0, 936.63), 2) if rng.random() < 0.87 else None
+        movie.metascores = rng.randint(11, 100) if rng.random() < 0.94 else None
+        movies.append(movie)
+    return movies
+
+
+def loop_query(movies):
+    matches = [movie for movie in movies if 2010 <= movie.release_year <= 2012 and movie.rating >= 8.0]
+    top = sorted(matches, key=lambda movie: (-movie.votes, movie.rank))[:10]
+    revenues = [movie.revenue for movie in matches if movie.revenue is not None]
+    return [movie.rank for movie in top], sum(revenues) / len(revenues)
+
+
+def columnar_query(columns):
+    ranks, _ = columns.ranks(RANGES, order_by='votes', descending=True, limit=10)
+    return ranks, columns.aggregate('revenue', RANGES)['mean']
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>9}  {:>12}  {:>12}  {:>8}'.format('movies', 'loop (ms)', 'numpy (ms)', 'speedup'))
+    for n in args.sizes:
+        movies = synthetic_movies(n)
+        columns = MovieColumns()
+        for movie in movies:
+            columns.add_movie(movie)
+
+        loop_time, (loop_ranks, loop_mean) = best_time(lambda: loop_query(movies), args.repeat)
+        numpy_time, (numpy_ranks, numpy_mean) = best_time(lambda: columnar_query(columns), args.repeat)
+        assert loop_ranks == numpy_ranks and abs(loop_mean - numpy_mean) < 1e-6
+        print('{:>9}  {:>12.2f}  {:>12.2f}  {:>7.0f}x'.format(n, loop_time * 1e3, numpy_time * 1e3,
+                                                            loop_time / numpy_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Typo-tolerant name lookups on the segment index at growing numbers of names.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fuzzy [--sizes 10000 100000 1000000] [--max-distance 2]
+
+Names are synthetic "First Last" pairs built from random syllables; each query is an indexed name with one or two
+random typos.
+"""
+import argparse
+import random
+import string
+import time
+
+from movie_web_app.adapters.fuzzy_index import FuzzyIndex, ACTOR
+
+CONSONANTS = 'bcdfghjklmnprstvwyz'
+VOWELS = 'aeiou'
+
+
+def synthetic_word(rng, length):
+    # Alternates consonants and vowels, with the occasional double consonant, for name-like trigrams.
+    characters = []
+    vowel = rng.random() < 0.3
+    while len(characters) < length:
+        characters.append(rng.choice(VOWELS if vowel else CONSONANTS))
+        if vowel or rng.random() > 0.2:
+            vowel = not vowel
+    return ''.join(characters).capitalize()
+
+
+def synthetic_names(count, rng):
+    # Like real credits, first names repeat far more often than surnames and follow a Zipf distribution.
+    first_names = [synthetic_word(rng, rng.randint(3, 8)) for _ in range(max(100, count // 200))]
+    weights = [1.0 / (i + 1) for i in range(len(first_names))]
+    names = set()
+    while len(names) < count:
+        for first_name in rng.choices(first_names, weights, k=count - len(names)):
+            names.add(first_name + ' ' + synthetic_word(rng, rng.randint(4, 10)))
+    return list(names)
+
+
+def with_typos(name, typos, rng):
+    characters = list(name)
+    for _ in range(typos):
+        position = rng.randrange(len(characters))
+        edit = rng.choice(['replace', 'delete', 'insert'])
+        if edit == 'replace':
+            characters[position] = rng.choice(string.ascii_lowercase)
+        elif edit == 'delete' and len(characters) > 1:
+            del characters[position]
+        else:
+            characters.insert(position, rng.choice(string.ascii_lowercase))
+    return ''.join(characters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--max-distance', type=int, default=2)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(235)
+    print('{:>9} {:>9} {:>10} {:>10} {:>10}'.format('names', 'build s', 'mean us', 'p99 us', 'found'))
+    for size in args.sizes:
+        names = synthetic_names(size, rng)
+        index = FuzzyIndex(args.max_distance)
+        start = time.perf_counter()
+        for name in names:
+            index.add_name(name, ACTOR)
+        build = time.perf_counter() - start
+
+        timings = []
+        found = 0
+        for _ in range(args.queries):
+            name = rng.choice(names)
+            query = with_typos(name, rng.randint(1, args.max_distance), rng)
+            start = time.perf_counter()
+            matches = index.lookup(query, args.max_distance)
+            timings.append(time.perf_counter() - start)
+            found += any(match[0] == name for match in matches)
+
+        timings.sort()
+        print('{:>9} {:>9.1f} {:>10.0f} {:>10.0f} {:>9.0%}'.format(
+            size, build, sum(timings) / len(timings) * 1e6, timings[int(len(timings) * 0.99)] * 1e6,
+            found / args.queries))
+
+
+if __name__ == '__main__':
+    main()
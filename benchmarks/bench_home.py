@@ -0,0 +1,56 @@
+"""Home page rendering time with and without the memoized navigation data and the fragment cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_home [--requests 500]
+
+"Rebuilt" clears both caches before every request, which is what every page used to do: 1000 url_for calls for the
+rank links plus the year, genre and selected movie lists, and rendering the partials showing them. "Memoized" reuses
+the navigation data built for the current catalog version but renders the partials; "fragments" also reuses the
+rendered navigation, sidebar and top bar.
+"""
+import argparse
+import os
+import time
+
+from movie_web_app import create_app
+
+
+def time_requests(client, requests, before_request=lambda: None):
+    start = time.perf_counter()
+    for _ in range(requests):
+        before_request()
+        response = client.get('/')
+        assert response.status_code == 200
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': os.path.join('movie_web_app', 'adapters'),
+        'POSTER_CACHE_PATH': None,
+        'JOURNAL_PATH': None,
+    })
+    client = app.test_client()
+    client.get('/')
+
+    def clear_all():
+        app.extensions['navigation'].clear()
+        app.jinja_env.fragment_cache.clear()
+
+    rebuilt = time_requests(client, args.requests, clear_all)
+    memoized = time_requests(client, args.requests, app.jinja_env.fragment_cache.clear)
+    fragments = time_requests(client, args.requests)
+    print('{:>10} {:>10} {:>10}'.format('', 'us/page', 'speed-up'))
+    print('{:>10} {:>10.0f} {:>10}'.format('rebuilt', rebuilt * 1e6, ''))
+    print('{:>10} {:>10.0f} {:>9.1f}x'.format('memoized', memoized * 1e6, rebuilt / memoized))
+    print('{:>10} {:>10.0f} {:>9.1f}x'.format('fragments', fragments * 1e6, rebuilt / fragments))
+
+
+if __name__ == '__main__':
+    main()
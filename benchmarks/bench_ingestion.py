@@ -0,0 +1,58 @@
+"""Movie CSV ingestion throughput, in rows per second, by number of parsing processes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingestion [--movies 100000] [--workers 1 2 4] [--repeat 3]
+
+Each run is timed twice: parsing alone, with the Movies and facet indexes of every chunk built and dropped, and the
+whole of load_movies, which also adds every movie to the search indexes of a MemoryRepository.
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import synthetic_catalog
+from movie_web_app.adapters.ingestion import CHUNK_BYTES, MovieIngestion
+from movie_web_app.adapters.memory_repository import MemoryRepository, load_movies
+from movie_web_app.domain.registry import EntityRegistry
+
+
+def parse_throughput(path, workers, chunk_bytes, repeat):
+    best = 0.0
+    for _ in range(repeat):
+        ingestion = MovieIngestion(path, EntityRegistry(), workers, chunk_bytes)
+        for _ in ingestion:
+            pass
+        best = max(best, ingestion.rows_per_second)
+    return best
+
+
+def load_throughput(data_path, workers, repeat):
+    best = 0.0
+    for _ in range(repeat):
+        ingestion = load_movies(data_path, MemoryRepository(), workers)
+        best = max(best, ingestion.rows_per_second)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-bytes', type=int, default=CHUNK_BYTES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-load', action='store_true', help='Time parsing only.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = synthetic_catalog.generate(directory, args.movies, users=10, reviews=0)[0]
+        print('{} movies, {:.1f} MB, {} CPUs'.format(args.movies, os.path.getsize(path) / 1e6, os.cpu_count()))
+        print('{:>8} {:>14} {:>14}'.format('workers', 'parse rows/s', 'load rows/s'))
+        for workers in args.workers:
+            parsed = parse_throughput(path, workers, args.chunk_bytes, args.repeat)
+            loaded = '-' if args.skip_load else '{:.0f}'.format(load_throughput(directory, workers, args.repeat))
+            print('{:>8} {:>14.0f} {:>14}'.format(workers, parsed, loaded))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Memory held by a catalog whose actors, directors and genres are interned, against one copy of every name per movie.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_interning [--copies 100]
+
+The sample data is read --copies times over, as a catalog of that many times 1000 movies, and built into Movies
+twice: with a string per name and movie, as the catalog was loaded before, and with the shared Actor, Director and
+Genre objects of an EntityRegistry. The memory counted is what the Movies keep once loading is done.
+"""
+import argparse
+import gc
+import os
+import tracemalloc
+
+from movie_web_app.adapters.memory_repository import movie_from_row, read_csv_file
+from movie_web_app.domain.model import Movie
+from movie_web_app.domain.movie_file_csv_reader import optional_number
+from movie_web_app.domain.registry import EntityRegistry
+
+DATA_PATH = os.path.join('movie_web_app', 'adapters', 'Data1000Movies.csv')
+
+
+def movie_with_strings(row):
+    # How movies were built before: the names as read, including the space after each comma.
+    movie = Movie(row[1], int(row[6]))
+    movie.rank = int(row[0])
+    movie.description = row[3]
+    movie.runtime_minutes = int(row[7])
+    for actor in row[5].split(','):
+        movie.add_actor(actor)
+    movie.director = row[4]
+    for genre in row[2].split(','):
+        movie.add_genre(genre)
+    movie.rating = optional_number(row[8], float)
+    movie.votes = optional_number(row[9], int)
+    movie.revenue = optional_number(row[10], float)
+    movie.metascores = optional_number(row[11], int)
+    return movie
+
+
+def retained_memory(build, copies):
+    gc.collect()
+    tracemalloc.start()
+    movies = [build(row) for _ in range(copies) for row in read_csv_file(DATA_PATH)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained, movies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--copies', type=int, default=100)
+    args = parser.parse_args()
+
+    strings, movies = retained_memory(movie_with_strings, args.copies)
+    names = sum(len(movie.actors) + len(movie.genres) + 1 for movie in movies)
+    del movies
+
+    registry = EntityRegistry()
+    interned, movies = retained_memory(lambda row: movie_from_row(row, registry), args.copies)
+
+    print('{} movies, {} actor, director and genre references'.format(len(movies), names))
+    print('strings per movie:  {:8.1f} MB'.format(strings / 1e6))
+    print('interned entities:  {:8.1f} MB ({} entities)'.format(interned / 1e6, registry.size))
+    print('saved:              {:8.1f} MB ({:.0f}%)'.format((strings - interned) / 1e6, 100 * (1 - interned / strings)))
+
+
+if __name__ == '__main__':
+    main()
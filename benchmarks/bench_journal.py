@@ -0,0 +1,94 @@
+"""Journal commit throughput with concurrent writers, and replay time for a journal of many reviews.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_journal [--reviews 1000000] [--writers 8] [--commits 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from movie_web_app.adapters.journal import Journal
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.domain.model import User
+
+DATA_PATH = os.path.join('movie_web_app', 'adapters')
+
+
+def time_commits(path, writers, commits):
+    # Every writer journals a review and waits for it to be on disk, as a request adding a review does.
+    journal = Journal(path)
+    start = time.perf_counter()
+
+    def write(writer):
+        for number in range(commits):
+            record = ('review', 'writer{}'.format(writer), 1, 'Text', 8, datetime.now().isoformat())
+            journal.sync(journal.append(record))
+
+    threads = [threading.Thread(target=write, args=(writer,)) for writer in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return elapsed
+
+
+def write_reviews(path, reviews):
+    rng = random.Random(235)
+    repo = MemoryRepository()
+    populate(DATA_PATH, repo, journal=Journal(path, sync=False))
+    users = [User('reviewer{}'.format(number), 'password') for number in range(1000)]
+    for user in users:
+        repo.add_user(user)
+    journal = repo.journal
+    timestamp = datetime(2020, 9, 13, 12, 26, 40)
+    for number in range(reviews):
+        # Journaled the way add_review does, without keeping a million reviews in this process.
+        journal.append(('review', rng.choice(users).user_name, rng.randint(1, 1000), 'A review', rng.randint(1, 10),
+                        (timestamp + timedelta(seconds=number)).isoformat()))
+        if number % 10000 == 0:
+            journal.sync_all()
+    journal.close()
+    return os.path.getsize(path)
+
+
+def time_replay(path):
+    repo = MemoryRepository()
+    populate(DATA_PATH, repo)
+    start = time.perf_counter()
+    journal = Journal(path)
+    records = journal.records()
+    read = time.perf_counter() - start
+    repo.replay_journal(records)
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return read, elapsed, len(repo.get_review())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--commits', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir='.') as directory:
+        single = time_commits(os.path.join(directory, 'single.journal'), 1, args.commits)
+        grouped = time_commits(os.path.join(directory, 'grouped.journal'), args.writers, args.commits)
+        print('commits, 1 writer:   {:8.0f}/s'.format(args.commits / single))
+        print('commits, {} writers:  {:8.0f}/s (group commit)'.format(args.writers, args.writers * args.commits / grouped))
+
+        path = os.path.join(directory, 'reviews.journal')
+        size = write_reviews(path, args.reviews)
+        read, elapsed, reviews = time_replay(path)
+        print('replay of {} reviews ({:.1f} MB): {:.2f}s ({:.2f}s reading)'.format(reviews, size / 1e6, elapsed, read))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Time per page with the request metrics on and off, to check that they are cheap enough to leave on.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics [--requests 300] [--rounds 5]
+
+One app serves every page four times in a row, twice with the request timed and twice with the timing switched off,
+in random order, for --rounds rounds of --requests pages; the fastest round of each is reported, which keeps other load on the machine out
+of the comparison. The timing is
+switched off by not starting a timer for the request, so what is left, a check per timed call, is counted as free.
+Two separate apps are not compared because the time per page differs between identical apps by more than the
+overhead being measured. Posters come from a local OMDb stand-in and are cached before the first round.
+"""
+import argparse
+import os
+import random
+import time
+
+from movie_web_app import create_app
+from movie_web_app.adapters.omdb_stub import OMDbStubServer
+from movie_web_app.metrics import metrics
+
+DATA_PATH = os.path.join('movie_web_app', 'adapters')
+
+PAGES = ['/', '/movies_by_rank?rank=3', '/movies_by_genre?genre=Comedy', '/movies_by_year?release_year=2014',
+         '/movies/browse?genre=Action&min_rating=7', '/movies_by_search?q=batman', '/authentication/login']
+
+
+def time_pages(client, requests, start_request):
+    # Every page is requested timed and untimed one after the other, so drift in the speed of the machine affects
+    # both the same, in random order, since the first request of a page is slower; returns the time per page of each.
+    rng = random.Random(235)
+    totals = {False: 0.0, True: 0.0}
+    for number in range(requests * 2):
+        for timed in rng.sample((False, True), 2):
+            metrics.start_request = start_request if timed else lambda endpoint: None
+            start = time.perf_counter()
+            response = client.get(PAGES[number // 2 % len(PAGES)])
+            totals[timed] += time.perf_counter() - start
+            assert response.status_code == 200
+    metrics.start_request = start_request
+    return {timed: total / (requests * 2) for timed, total in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    server = OMDbStubServer(DATA_PATH).start()
+    client = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': DATA_PATH,
+        'OMDB_URL': server.url,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': None,
+        'JOURNAL_PATH': None,
+        'METRICS': True,
+    }).test_client()
+    for page in PAGES:
+        client.get(page)
+
+    best = {False: float('inf'), True: float('inf')}
+    for _ in range(args.rounds):
+        for timed, seconds in time_pages(client, args.requests, metrics.start_request).items():
+            best[timed] = min(best[timed], seconds)
+    server.stop()
+
+    print('{:>12} {:>10}'.format('', 'us/page'))
+    print('{:>12} {:>10.0f}'.format('timing off', best[False] * 1e6))
+    print('{:>12} {:>10.0f}'.format('timing on', best[True] * 1e6))
+    print('overhead: {:.0f} us/page ({:.1f}%)'.format((best[True] - best[False]) * 1e6,
+                                                      100 * (best[True] / best[False] - 1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Memory per movie and per review of the domain model, with a catalog of synthetic movies and reviews.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_model_memory [--movies 1000000] [--reviews 10000000] [--revision REV]
+
+--revision measures movie_web_app/domain/model.py as it was at a git revision instead of as it is, for comparing
+layouts. Memory is the growth of the process's resident size while each kind of object is made, so it includes
+everything they hold: lists of actors, genres and reviews, and a datetime per review. Actors, directors and genres
+are shared between movies, as the repositories share them.
+"""
+import argparse
+import random
+import resource
+import subprocess
+import sys
+import types
+
+import movie_web_app.domain.model
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy',
+          'History', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War',
+          'Western']
+
+
+def model_at(revision):
+    source = subprocess.run(['git', 'show', '{}:movie_web_app/domain/model.py'.format(revision)],
+                            check=True, stdout=subprocess.PIPE).stdout
+    model = types.ModuleType('model_at_{}'.format(revision))
+    exec(compile(source, model.__name__, 'exec'), model.__dict__)
+    return model
+
+
+def resident_bytes():
+    # The peak resident size, which is the current one here since nothing is freed; macOS reports bytes, Linux KiB.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=1000000)
+    parser.add_argument('--reviews', type=int, default=10000000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--revision')
+    args = parser.parse_args()
+
+    model = model_at(args.revision) if args.revision else movie_web_app.domain.model
+    rng = random.Random(235)
+    people = ['Person {}'.format(number) for number in range(max(args.movies // 5, 10))]
+    actors = [model.Actor(name) for name in people]
+    directors = [model.Director(name) for name in people[:max(args.movies // 50, 1)]]
+    genres = [model.Genre(name) for name in GENRES]
+
+    start = resident_bytes()
+    movies = list()
+    for rank in range(1, args.movies + 1):
+        movie = model.Movie('Movie {}'.format(rank), rng.randint(2006, 2016))
+        movie.rank = rank
+        movie.description = 'A movie.'
+        movie.runtime_minutes = rng.randint(66, 191)
+        movie.director = rng.choice(directors)
+        for actor in rng.sample(actors, 4):
+            movie.add_actor(actor)
+        for genre in rng.sample(genres, rng.randint(1, 3)):
+            movie.add_genre(genre)
+        movie.rating = rng.randint(19, 90) / 10
+        movie.votes = rng.randint(61, 1791916)
+        movies.append(movie)
+    after_movies = resident_bytes()
+
+    users = [model.User('user{}'.format(number), 'password') for number in range(args.users)]
+    after_users = resident_bytes()
+
+    for number in range(args.reviews):
+        model.make_review('A review.', users[number % args.users], movies[rng.randrange(args.movies)],
+                          rng.randint(1, 10))
+    after_reviews = resident_bytes()
+
+    print('model: {}'.format(args.revision or 'working tree'))
+    print('{:>8}  {:>10}  {:>10}  {:>14}'.format('entity', 'count', 'total (MB)', 'bytes/entity'))
+    for name, count, grown in (('movie', args.movies, after_movies - start),
+                               ('user', args.users, after_users - after_movies),
+                               ('review', args.reviews, after_reviews - after_users)):
+        print('{:>8}  {:>10}  {:>10.1f}  {:>14.1f}'.format(name, count, grown / 1e6, grown / max(count, 1)))
+
+
+if __name__ == '__main__':
+    main()
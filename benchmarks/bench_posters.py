@@ -0,0 +1,76 @@
+"""Page latency vs. page size for poster lookups against a slow local OMDb stand-in.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_posters [--latency 0.1] [--workers 8]
+
+Each page size is measured with a cold cache, once with the old one-after-another lookups and once through the
+PosterResolver that the listing pages use.
+"""
+import argparse
+import os
+import time
+
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.omdb import OMDbClient
+from movie_web_app.adapters.omdb_stub import OMDbStubServer
+from movie_web_app.adapters.poster_cache import PosterCache
+from movie_web_app.adapters.poster_resolver import PosterResolver
+from movie_web_app.posters import services as poster_services
+
+DATA_PATH = os.path.join('movie_web_app', 'adapters')
+PAGE_SIZES = [1, 2, 5, 10, 20, 50]
+
+
+def page_of_movies(repo, page_size, offset):
+    movies = repo.get_movies_by_rank(range(offset + 1, offset + page_size + 1))
+    return [{'title': movie.title, 'release_year': movie.release_year} for movie in movies]
+
+
+def time_sequential(server, movies):
+    cache = PosterCache(OMDbClient(server.url, 'bench'))
+    start = time.perf_counter()
+    for movie in movies:
+        cache.get_poster(movie['title'], movie['release_year'])
+    return time.perf_counter() - start
+
+
+def time_parallel(server, movies, workers, deadline):
+    resolver = PosterResolver(PosterCache(OMDbClient(server.url, 'bench')), max_workers=workers, deadline=deadline)
+    start = time.perf_counter()
+    posters = poster_services.get_posters(movies, resolver)
+    elapsed = time.perf_counter() - start
+    resolver.shutdown()
+    placeholders = sum(1 for poster in posters.values() if poster is None)
+    return elapsed, placeholders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds the OMDb stub waits per request')
+    parser.add_argument('--workers', type=int, default=8, help='size of the poster thread pool')
+    parser.add_argument('--deadline', type=float, default=2.0, help='per-request poster deadline in seconds')
+    args = parser.parse_args()
+
+    repo = MemoryRepository()
+    populate(DATA_PATH, repo)
+    server = OMDbStubServer(DATA_PATH, latency=args.latency).start()
+
+    print('OMDb latency {:.0f} ms, {} workers, deadline {:.1f} s'.format(args.latency * 1000, args.workers,
+                                                                       args.deadline))
+    print('{:>9} {:>15} {:>15} {:>13}'.format('page size', 'sequential ms', 'parallel ms', 'placeholders'))
+    offset = 0
+    for page_size in PAGE_SIZES:
+        # A fresh slice of the catalog for each run, so neither variant sees a warm cache.
+        sequential = time_sequential(server, page_of_movies(repo, page_size, offset))
+        offset += page_size
+        parallel, placeholders = time_parallel(server, page_of_movies(repo, page_size, offset), args.workers,
+                                               args.deadline)
+        offset += page_size
+        print('{:>9} {:>15.1f} {:>15.1f} {:>13}'.format(page_size, sequential * 1000, parallel * 1000, placeholders))
+
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
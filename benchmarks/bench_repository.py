@@ -0,0 +1,183 @@
+"""Repository benchmark suite: populate, get_movie, facet lookups, search and add_review on synthetic catalogs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_repository [--sizes 1000 100000 1000000] [--backends memory sqlite] [--calls 1000]
+                                          [--output benchmark_results.json] [--compare EARLIER.json]
+
+Each catalog is written by benchmarks.synthetic_catalog into a temporary directory, or into --data-dir to keep it
+for later runs. Every operation but populate is called --calls times with random arguments after one untimed call,
+which builds whatever the repository builds lazily.
+
+The results are written to --output as JSON: the settings and environment of the run, and for every backend, size
+and operation the number of calls and their mean, median and 95th percentile times. --compare prints the medians
+next to those of an earlier results file.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import synthetic_catalog
+from movie_web_app.adapters import memory_repository, sqlite_repository
+from movie_web_app.adapters.memory_repository import MemoryRepository, read_csv_file
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
+from movie_web_app.domain.model import make_review
+
+
+def load(backend, data_path, work_path):
+    if backend == 'memory':
+        repo = MemoryRepository()
+        memory_repository.populate(data_path, repo)
+    else:
+        repo = SqliteRepository(os.path.join(work_path, 'movies.sqlite3'))
+        sqlite_repository.populate(data_path, repo)
+    return repo
+
+
+def operations(repo, data_path, movies, calls, rng):
+    """ Returns (name, function) for every operation timed; each call of function makes one call of the operation. """
+    # Names to look up, taken from random movies so that they exist and common ones come up more often.
+    sample = repo.get_movies_by_rank(rng.sample(range(1, movies + 1), min(movies, 200)))
+    directors = [movie.director.director_full_name for movie in sample]
+    actors = [actor.actor_full_name for movie in sample for actor in movie.actors]
+    words = [word for movie in sample for word in movie.title.split()]
+    genres = repo.get_genre_list()
+    years = repo.get_year_list()
+    reviews = iter([row for _, row in zip(range(calls + 1), read_csv_file(os.path.join(data_path, 'reviews.csv')))])
+
+    def add_review():
+        _, user_name, rank, rating, review_text = next(reviews)
+        repo.add_review(make_review(review_text, repo.get_user(user_name), repo.get_movie(int(rank)), int(rating)))
+
+    return [
+        ('get_movie', lambda: repo.get_movie(rng.randint(1, movies))),
+        ('get_movie_with_given_genre', lambda: repo.get_movie_with_given_genre(rng.choice(genres))),
+        ('get_movie_with_given_year', lambda: repo.get_movie_with_given_year(rng.choice(years))),
+        ('get_movie_with_given_director', lambda: repo.get_movie_with_given_director(rng.choice(directors))),
+        ('get_movie_with_given_actor', lambda: repo.get_movie_with_given_actor(rng.choice(actors))),
+        ('browse_movies', lambda: repo.browse_movies(genres=rng.sample(genres[:8], 2),
+                                                     ranges={'rating': (7.0, None)}, limit=10)),
+        ('select_movies', lambda: repo.select_movies(all_of=[('genre', rng.choice(genres))],
+                                                     any_of=[('year', year) for year in rng.sample(years, 3)],
+                                                     none_of=[('genre', rng.choice(genres))])),
+        ('search_movies', lambda: repo.search_movies(rng.choice(words + actors), limit=10)),
+        ('add_review', add_review),
+    ]
+
+
+def time_calls(function, calls):
+    timings = list()
+    for _ in range(calls):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def result(backend, movies, operation, timings):
+    timings = sorted(timings)
+    return {
+        'backend': backend,
+        'movies': movies,
+        'operation': operation,
+        'calls': len(timings),
+        'mean_us': statistics.mean(timings) * 1e6,
+        'median_us': statistics.median(timings) * 1e6,
+        'p95_us': timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1e6,
+    }
+
+
+def run(backend, movies, data_path, calls, seed):
+    results = list()
+    with tempfile.TemporaryDirectory() as work_path:
+        gc.collect()
+        start = time.perf_counter()
+        repo = load(backend, data_path, work_path)
+        results.append(result(backend, movies, 'populate', [time.perf_counter() - start]))
+        print_result(results[-1])
+
+        rng = random.Random(seed)
+        for operation, function in operations(repo, data_path, movies, calls, rng):
+            function()
+            results.append(result(backend, movies, operation, time_calls(function, calls)))
+            print_result(results[-1])
+        if backend == 'sqlite':
+            repo.close()
+    return results
+
+
+def print_result(entry):
+    print('{backend:>7} {movies:>9} {operation:>30} {calls:>6} {mean_us:>12.1f} {median_us:>12.1f} {p95_us:>12.1f}'
+          .format(**entry), flush=True)
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, earlier_path):
+    with open(earlier_path) as earlier_file:
+        earlier = {(entry['backend'], entry['movies'], entry['operation']): entry['median_us']
+                   for entry in json.load(earlier_file)['results']}
+    print()
+    print('{:>7} {:>9} {:>30} {:>14} {:>14} {:>8}'.format('backend', 'movies', 'operation', 'before (us)', 'after (us)',
+                                                        'ratio'))
+    for entry in results:
+        before = earlier.get((entry['backend'], entry['movies'], entry['operation']))
+        if before is not None:
+            print('{:>7} {:>9} {:>30} {:>14.1f} {:>14.1f} {:>7.2f}x'.format(
+                entry['backend'], entry['movies'], entry['operation'], before, entry['median_us'],
+                entry['median_us'] / before))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--backends', nargs='+', choices=['memory', 'sqlite'], default=['memory', 'sqlite'])
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=235)
+    parser.add_argument('--data-dir', help='where to keep the generated catalogs, so later runs reuse them')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='an earlier results file to compare with')
+    args = parser.parse_args()
+
+    report = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'revision': revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'arguments': vars(args),
+        'results': list(),
+    }
+    print('{:>7} {:>9} {:>30} {:>6} {:>12} {:>12} {:>12}'.format('backend', 'movies', 'operation', 'calls',
+                                                                 'mean (us)', 'median (us)', 'p95 (us)'))
+    with tempfile.TemporaryDirectory() as temporary_path:
+        for movies in args.sizes:
+            data_path = os.path.join(args.data_dir or temporary_path, 'catalog-{}'.format(movies))
+            if not os.path.exists(os.path.join(data_path, synthetic_catalog.REVIEWS_FILE)):
+                synthetic_catalog.generate(data_path, movies, reviews=args.calls + 1, seed=args.seed)
+            for backend in args.backends:
+                report['results'].extend(run(backend, movies, data_path, args.calls, args.seed))
+
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print('Results written to {}'.format(args.output))
+    if args.compare:
+        compare(report['results'], args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Search latency of the BM25-ranked inverted index against the old full catalog scan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search [--sizes 1000 100000 1000000] [--scan-limit 100000]
+
+Synthetic movies are generated with Zipf-distributed words, actors, directors and genres. The old scan, which turned
+every movie into a dict and compared the query against its values, is only timed up to --scan-limit movies, since it
+has to keep the whole catalog in memory.
+"""
+import argparse
+import random
+import time
+
+from movie_web_app.adapters.search_index import SearchIndex
+from movie_web_app.domain.model import Movie
+from movie_web_app.domain.registry import EntityRegistry
+from movie_web_app.movies.services import movies_to_dict
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy',
+          'History', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War',
+          'Western']
+
+
+def zipf_weights(n):
+    # Cumulative weights for random.choices, giving the i-th item a probability proportional to 1 / (i + 1).
+    cumulative, running = [], 0.0
+    for i in range(n):
+        running += 1.0 / (i + 1)
+        cumulative.append(running)
+    return cumulative
+
+
+def synthetic_movies(count, seed=235):
+    rng = random.Random(seed)
+    words = ['word{}'.format(i) for i in range(20000)]
+    word_weights = zipf_weights(len(words))
+    people = ['Person{} Surname{}'.format(i, i % 977) for i in range(max(1000, count // 2))]
+    people_weights = zipf_weights(len(people))
+    genre_weights = zipf_weights(len(GENRES))
+    registry = EntityRegistry()
+
+    for rank in range(1, count + 1):
+        movie = Movie(' '.join(rng.choices(words, cum_weights=word_weights, k=rng.randint(1, 4))),
+                      rng.randint(1950, 2020))
+        movie.rank = rank
+        movie.description = ' '.join(rng.choices(words, cum_weights=word_weights, k=20))
+        movie.director = registry.director(rng.choices(people, cum_weights=people_weights)[0])
+        for actor in rng.choices(people, cum_weights=people_weights, k=4):
+            movie.add_actor(registry.actor(actor))
+        for genre in set(rng.choices(GENRES, cum_weights=genre_weights, k=rng.randint(1, 3))):
+            movie.add_genre(registry.genre(genre))
+        yield movie
+
+
+def old_scan(movie_dicts, q):
+    movie_ranks = []
+    for movie in movie_dicts:
+        if q in movie.values() or q in movie['actors'] or q in movie['genres']:
+            if movie['rank'] not in movie_ranks:
+                movie_ranks.append(movie['rank'])
+    return movie_ranks
+
+
+def time_queries(search, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            search(query)
+    return (time.perf_counter() - start) / (repeat * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--scan-limit', type=int, default=100000)
+    args = parser.parse_args()
+
+    queries = ['word0', 'word1 word2', 'word19999', 'Person1 Surname1', 'Drama', '2010', 'Comedy Romance']
+    print('{:>9} {:>10} {:>14} {:>14} {:>10}'.format('movies', 'build s', 'index us/q', 'old scan us/q',
+                                                   'speed-up'))
+    for size in args.sizes:
+        index = SearchIndex()
+        keep = size <= args.scan_limit
+        movies = []
+        start = time.perf_counter()
+        for movie in synthetic_movies(size):
+            index.add_movie(movie)
+            if keep:
+                movies.append(movie)
+        build = time.perf_counter() - start
+
+        # Ten results is the deepest page a search usually asks for: cursor + movies per page.
+        index_time = time_queries(lambda q: index.search(q, limit=10), queries, repeat=max(1, 20000 // size))
+        if keep:
+            movie_dicts = movies_to_dict(movies)
+            scan_time = time_queries(lambda q: old_scan(movie_dicts, q), queries, repeat=1)
+            print('{:>9} {:>10.2f} {:>14.1f} {:>14.1f} {:>9.0f}x'.format(size, build, index_time * 1e6,
+                                                                        scan_time * 1e6, scan_time / index_time))
+        else:
+            print('{:>9} {:>10.2f} {:>14.1f} {:>14} {:>10}'.format(size, build, index_time * 1e6, '-', '-'))
+
+
+if __name__ == '__main__':
+    main()
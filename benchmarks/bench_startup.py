@@ -0,0 +1,48 @@
+"""Repository startup time: parsing the CSV files against restoring a binary snapshot.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--data-path movie_web_app/adapters] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.snapshot import write_snapshot
+
+
+def time_populate(data_path, snapshot_path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        populate(data_path, MemoryRepository(), snapshot_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-path', default=os.path.join('movie_web_app', 'adapters'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, 'repository.snapshot')
+        repo = MemoryRepository()
+        populate(args.data_path, repo)
+        size = write_snapshot(repo, snapshot_path, args.data_path)
+
+        csv_time = time_populate(args.data_path, None, args.repeat)
+        snapshot_time = time_populate(args.data_path, snapshot_path, args.repeat)
+
+    print('{:>10} {:>10}'.format('', 'ms'))
+    print('{:>10} {:>10.0f}'.format('csv', csv_time * 1e3))
+    print('{:>10} {:>10.0f}   ({:.1f} MB, {:.1f}x faster)'.format('snapshot', snapshot_time * 1e3, size / 1e6,
+                                                                   csv_time / snapshot_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Startup cost of loading users: hashing every password at boot against loading pre-hashed or lazily hashed ones.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_users [--sizes 10000 100000] [--sample 20]
+
+Hashing every row at boot, as load_users used to, is timed on --sample passwords and extrapolated. The one-time
+migration (flask hash-passwords) is timed the same way on a process pool with one worker per CPU.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from werkzeug.security import generate_password_hash
+
+from movie_web_app.adapters.memory_repository import MemoryRepository, load_users
+from movie_web_app.adapters.passwords import hash_passwords
+
+
+def write_users(directory, count, password):
+    with open(os.path.join(directory, 'user.csv'), 'w') as user_file:
+        user_file.write('id,username,password\n')
+        for i in range(count):
+            user_file.write('{},user{},{}\n'.format(i, i, password(i)))
+
+
+def time_load(directory):
+    start = time.perf_counter()
+    load_users(directory, MemoryRepository())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--sample', type=int, default=20)
+    args = parser.parse_args()
+
+    sample = ['password{}'.format(i) for i in range(args.sample)]
+    start = time.perf_counter()
+    for password in sample:
+        generate_password_hash(password)
+    hash_cost = (time.perf_counter() - start) / len(sample)
+
+    workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    hash_passwords(sample * workers, workers)
+    migration_cost = (time.perf_counter() - start) / (len(sample) * workers)
+
+    # Every pre-hashed row reuses one real hash: loading does not look inside it.
+    password_hash = generate_password_hash('secret')
+
+    print('{:>8} {:>16} {:>14} {:>14} {:>16}'.format('users', 'hash at boot s', 'plaintext s', 'pre-hashed s',
+                                                     'migration s'))
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_users(directory, size, lambda i: 'password{}'.format(i))
+            plaintext = time_load(directory)
+            write_users(directory, size, lambda i: password_hash)
+            pre_hashed = time_load(directory)
+        print('{:>8} {:>15.0f}* {:>14.3f} {:>14.3f} {:>15.0f}*'.format(size, size * hash_cost, plaintext, pre_hashed,
+                                                                      size * migration_cost))
+    print('* extrapolated from {} hashes ({:.1f} ms each, {} migration workers)'.format(
+        args.sample, hash_cost * 1e3, workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""HTTP load test: replays a mix of page views, logins and review posts against the app and reports latency per route.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test [--duration 30] [--concurrency 8] [--mix home=15,movies_by_rank=30,...]
+                                   [--movies 100000 | --data-dir DIR] [--repository memory] [--omdb-latency 0.05]
+                                   [--url http://host:port] [--output load_results.json] [--compare EARLIER.json]
+
+Unless --url points at a running server, the app is started in a separate process on a local threaded WSGI server,
+serving the sample data, the catalog in --data-dir, or a synthetic catalog of --movies movies, with posters from a
+local OMDb stand-in answering after --omdb-latency seconds. --concurrency clients then send requests back to back for
+--duration seconds, after --warmup seconds that are not counted. Each client picks every request from the mix by its
+weights:
+
+    home            GET /
+    movies_by_rank  GET /movies_by_rank?rank=<random rank>
+    year            GET /movies_by_year?release_year=<random year>
+    genre           GET /movies_by_genre?genre=<random genre>
+    search          GET /movies_by_search?q=<random title word>
+    login           POST /authentication/login
+    review          POST /review on a random movie
+
+Every client registers its own user first, and logs in before posting reviews. The forms are sent with their CSRF
+token, fetched with a GET of the login page after each login; these setup requests are not counted. A request counts
+as an error if it fails or answers with another status than the route's: 200 for pages, 302 for the posts.
+
+The report gives the throughput, and per route the number of requests, errors, requests per second and the p50, p95
+and p99 latency. --output writes it as JSON, and --compare prints it next to an earlier one, so capacity can be
+checked before a release.
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks import synthetic_catalog
+from benchmarks.bench_repository import revision
+from movie_web_app.adapters.memory_repository import read_csv_file
+from movie_web_app.adapters.omdb_stub import OMDbStubServer
+
+SAMPLE_DATA_PATH = os.path.join('movie_web_app', 'adapters')
+
+ROUTES = ('home', 'movies_by_rank', 'year', 'genre', 'search', 'login', 'review')
+DEFAULT_MIX = 'home=15,movies_by_rank=30,year=10,genre=10,search=20,login=5,review=10'
+
+REVIEW_WORDS = ['great', 'acting', 'plot', 'slow', 'funny', 'score', 'ending', 'cast', 'loved', 'boring', 'visuals',
+                'twist', 'dialogue', 'pacing', 'memorable']
+
+CSRF_TOKEN = re.compile(rb'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def parse_mix(text):
+    mix = dict()
+    for part in text.split(','):
+        route, _, weight = part.partition('=')
+        if route.strip() not in ROUTES:
+            raise argparse.ArgumentTypeError('unknown route {!r}; routes are {}'.format(route, ', '.join(ROUTES)))
+        mix[route.strip()] = float(weight)
+    return mix
+
+
+class Catalog:
+    """ What the clients pick request parameters from: the ranks, years, genres and title words of the catalog. """
+
+    def __init__(self, data_path):
+        years, genres, words = set(), set(), set()
+        self.movies = 0
+        for row in read_csv_file(os.path.join(data_path, synthetic_catalog.MOVIES_FILE)):
+            self.movies += 1
+            years.add(int(row[6]))
+            genres.update(genre.strip() for genre in row[2].split(','))
+            words.update(word for word in row[1].split() if len(word) > 3 and word.isalpha())
+        self.years, self.genres, self.words = sorted(years), sorted(genres), sorted(words)
+
+
+class Client:
+    """ An HTTP client keeping the session cookie the app sets, with one connection per request. """
+
+    def __init__(self, url):
+        parts = urllib.parse.urlsplit(url)
+        self.__host, self.__port = parts.hostname, parts.port
+        self.__cookies = dict()
+        self.csrf_token = None
+
+    def request(self, method, path, form=None):
+        """ Returns the status and body of the response. """
+        headers = {'Cookie': '; '.join('{}={}'.format(name, value) for name, value in self.__cookies.items())}
+        body = None
+        if form is not None:
+            if self.csrf_token is not None:
+                form = dict(form, csrf_token=self.csrf_token)
+            body = urllib.parse.urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        connection = http.client.HTTPConnection(self.__host, self.__port, timeout=60)
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            content = response.read()
+            for header in response.headers.get_all('Set-Cookie') or ():
+                name, _, value = header.split(';', 1)[0].partition('=')
+                self.__cookies[name.strip()] = value
+            return response.status, content
+        finally:
+            connection.close()
+
+    def fetch_csrf_token(self, path='/authentication/login'):
+        status, content = self.request('GET', path)
+        match = CSRF_TOKEN.search(content)
+        # Without a token in the form, CSRF protection is off and none is needed.
+        self.csrf_token = match.group(1).decode() if match else None
+
+
+def run_client(url, catalog, mix, until, warmup_until, seed, results):
+    """ Sends requests picked from mix until the time until, adding (route, seconds, ok) to results for every request
+    after warmup_until.
+    """
+    rng = random.Random(seed)
+    client = Client(url)
+    user_name = 'load{}x{}'.format(seed, rng.randrange(10 ** 9))
+    password = 'Load{}Test'.format(rng.randrange(10 ** 9))
+
+    client.fetch_csrf_token('/authentication/register')
+    client.request('POST', '/authentication/register', {'username': user_name, 'password': password})
+    client.fetch_csrf_token()
+    client.request('POST', '/authentication/login', {'username': user_name, 'password': password})
+    client.fetch_csrf_token()
+
+    routes, weights = zip(*mix.items())
+    while time.perf_counter() < until:
+        route = rng.choices(routes, weights)[0]
+        if route == 'login':
+            # The token for the login form is fetched first and not counted, as is the one for later posts.
+            client.fetch_csrf_token()
+            method, path, form, expected = 'POST', '/authentication/login', {'username': user_name,
+                                                                             'password': password}, 302
+        elif route == 'review':
+            text = ' '.join(rng.choice(REVIEW_WORDS) for _ in range(rng.randint(3, 12))).capitalize()
+            method, path, form, expected = 'POST', '/review', {'movie_rank': rng.randint(1, catalog.movies),
+                                                               'rating': rng.randint(1, 10), 'review': text}, 302
+        else:
+            method, form, expected = 'GET', None, 200
+            path = {
+                'home': lambda: '/',
+                'movies_by_rank': lambda: '/movies_by_rank?rank={}'.format(rng.randint(1, catalog.movies)),
+                'year': lambda: '/movies_by_year?release_year={}'.format(rng.choice(catalog.years)),
+                'genre': lambda: '/movies_by_genre?' + urllib.parse.urlencode({'genre': rng.choice(catalog.genres)}),
+                'search': lambda: '/movies_by_search?' + urllib.parse.urlencode({'q': rng.choice(catalog.words)}),
+            }[route]()
+
+        start = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, form)
+            ok = status == expected
+        except (OSError, http.client.HTTPException):
+            ok = False
+        finished = time.perf_counter()
+        if start >= warmup_until:
+            results.append((route, finished - start, ok))
+        if route == 'login':
+            client.fetch_csrf_token()
+
+
+def serve(config, port_queue):
+    # Runs in its own process, so the server and the clients do not share a GIL.
+    from werkzeug.serving import make_server
+    from movie_web_app import create_app
+
+    # Without a line logged per request.
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, create_app(config), threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def start_server(data_path, repository, omdb_url, work_path):
+    config = {
+        'TEST_DATA_PATH': data_path,
+        'REPOSITORY': repository,
+        'SQLITE_DATABASE_PATH': os.path.join(work_path, 'movies.sqlite3'),
+        'OMDB_URL': omdb_url,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': None,
+        'JOURNAL_PATH': None,
+        'PROFILE_DIR': os.path.join(work_path, 'profiles'),
+    }
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(config, port_queue), daemon=True)
+    process.start()
+    return process, 'http://127.0.0.1:{}'.format(port_queue.get(timeout=600))
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize(results, duration):
+    by_route = defaultdict(list)
+    for route, seconds, ok in results:
+        by_route[route].append((seconds, ok))
+
+    routes = dict()
+    for route in ROUTES:
+        if route in by_route:
+            latencies = sorted(seconds for seconds, _ in by_route[route])
+            routes[route] = {
+                'requests': len(latencies),
+                'errors': sum(1 for _, ok in by_route[route] if not ok),
+                'requests_per_second': len(latencies) / duration,
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+            }
+    return {
+        'requests': len(results),
+        'errors': sum(route['errors'] for route in routes.values()),
+        'requests_per_second': len(results) / duration,
+        'routes': routes,
+    }
+
+
+def run_load(url, catalog, mix, concurrency, duration, warmup, seed=235):
+    """ Runs concurrency clients against url for warmup plus duration seconds, and returns the summary of the
+    requests sent after warmup.
+    """
+    results = list()
+    start = time.perf_counter()
+    warmup_until = start + warmup
+    until = warmup_until + duration
+    clients = [threading.Thread(target=run_client, args=(url, catalog, mix, until, warmup_until, seed + number,
+                                                         results))
+               for number in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return summarize(results, duration)
+
+
+def print_summary(summary):
+    print('{:>15} {:>9} {:>7} {:>9} {:>9} {:>9} {:>9}'.format('route', 'requests', 'errors', 'req/s', 'p50 (ms)',
+                                                               'p95 (ms)', 'p99 (ms)'))
+    for route, entry in summary['routes'].items():
+        print('{:>15} {requests:>9} {errors:>7} {requests_per_second:>9.1f} {p50_ms:>9.1f} {p95_ms:>9.1f} '
+              '{p99_ms:>9.1f}'.format(route, **entry))
+    print('{:>15} {requests:>9} {errors:>7} {requests_per_second:>9.1f}'.format('total', **summary))
+
+
+def compare(summary, earlier_path):
+    with open(earlier_path) as earlier_file:
+        earlier = json.load(earlier_file)['summary']
+    print()
+    print('{:>15} {:>12} {:>12} {:>8} {:>14} {:>14} {:>8}'.format('route', 'req/s before', 'req/s after', 'ratio',
+                                                                   'p95 before', 'p95 after', 'ratio'))
+    for route, entry in summary['routes'].items():
+        before = earlier['routes'].get(route)
+        if before is not None:
+            print('{:>15} {:>12.1f} {:>12.1f} {:>7.2f}x {:>14.1f} {:>14.1f} {:>7.2f}x'.format(
+                route, before['requests_per_second'], entry['requests_per_second'],
+                entry['requests_per_second'] / before['requests_per_second'], before['p95_ms'], entry['p95_ms'],
+                entry['p95_ms'] / before['p95_ms']))
+    print('{:>15} {:>12.1f} {:>12.1f} {:>7.2f}x'.format(
+        'total', earlier['requests_per_second'], summary['requests_per_second'],
+        summary['requests_per_second'] / earlier['requests_per_second']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='a running server to test, instead of starting one')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument('--data-dir', help='the catalog to serve, by default the sample data')
+    parser.add_argument('--movies', type=int, help='serve a synthetic catalog of this many movies')
+    parser.add_argument('--repository', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--omdb-latency', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=235)
+    parser.add_argument('--output', default='load_results.json')
+    parser.add_argument('--compare', help='an earlier results file to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_path:
+        data_path = args.data_dir or SAMPLE_DATA_PATH
+        if args.movies is not None and args.data_dir is None:
+            data_path = os.path.join(work_path, 'catalog')
+            synthetic_catalog.generate(data_path, args.movies, reviews=0, seed=args.seed)
+        catalog = Catalog(data_path)
+
+        omdb_server = server_process = None
+        url = args.url
+        if url is None:
+            omdb_server = OMDbStubServer(data_path, latency=args.omdb_latency).start()
+            server_process, url = start_server(data_path, args.repository, omdb_server.url, work_path)
+        print('Testing {} with {} clients for {} seconds'.format(url, args.concurrency, args.duration), flush=True)
+
+        try:
+            summary = run_load(url, catalog, args.mix, args.concurrency, args.duration, args.warmup, args.seed)
+        finally:
+            if server_process is not None:
+                server_process.terminate()
+                omdb_server.stop()
+
+    print_summary(summary)
+    report = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'revision': revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'arguments': dict(vars(args), mix=args.mix),
+        'summary': summary,
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print('Results written to {}'.format(args.output))
+    if args.compare:
+        compare(summary, args.compare)
+
+
+if __name__ == '__main__':
+    main()
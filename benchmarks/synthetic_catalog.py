@@ -0,0 +1,166 @@
+"""Writes a synthetic catalog in the schema of the sample data, at any scale, for benchmarks and load tests.
+
+Run from the repository root:
+
+    python -m benchmarks.synthetic_catalog DIRECTORY [--movies 100000] [--users N] [--reviews N] [--seed 235]
+
+DIRECTORY gets Data1000Movies.csv and user.csv, which populate() loads as it loads the sample data, and reviews.csv
+(id, username, movie_rank, rating, review_text) for benchmarks that add reviews. By default there is a user for every
+10 movies and 10 reviews per movie.
+
+Words, actors, directors and genres are drawn from Zipf distributions, so a few are very common and most are rare,
+as in real catalogs; reviews favour popular movies and active users the same way. Years, runtimes, ratings, votes,
+revenues and metascores follow the ranges of the sample data, with revenues and metascores sometimes N/A.
+"""
+import argparse
+import csv
+import os
+import random
+from bisect import bisect
+
+MOVIES_FILE = 'Data1000Movies.csv'
+USERS_FILE = 'user.csv'
+REVIEWS_FILE = 'reviews.csv'
+
+MOVIE_HEADER = ['Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)', 'Rating',
+                'Votes', 'Revenue (Millions)', 'Metascore']
+
+GENRES = ['Drama', 'Action', 'Comedy', 'Adventure', 'Thriller', 'Crime', 'Romance', 'Sci-Fi', 'Horror', 'Mystery',
+          'Fantasy', 'Biography', 'Family', 'Animation', 'History', 'Sport', 'Music', 'War', 'Western', 'Musical']
+
+SYLLABLES = ['ka', 'ri', 'mo', 'ta', 'len', 'vor', 'sa', 'ni', 'dru', 'bel', 'an', 'to', 'mir', 'ge', 'los', 'fa',
+             'quin', 'ra', 'el', 'dor', 'ju', 'pe', 'sto', 'va', 'lin', 'ce', 'ha', 'zu', 'ber', 'o']
+
+
+def zipf_weights(n, exponent=1.0):
+    # Cumulative weights for random.choices, giving the i-th item a probability proportional to 1 / (i + 1).
+    cumulative, running = [], 0.0
+    for i in range(n):
+        running += 1.0 / (i + 1) ** exponent
+        cumulative.append(running)
+    return cumulative
+
+
+class ZipfChooser:
+    """ Draws items with Zipf-distributed probabilities, the first item being the most likely. """
+
+    def __init__(self, items, rng, exponent=1.0):
+        self.__items = items
+        self.__rng = rng
+        self.__cumulative = zipf_weights(len(items), exponent)
+
+    def choice(self):
+        return self.__items[bisect(self.__cumulative, self.__rng.random() * self.__cumulative[-1])]
+
+    def sample(self, k):
+        # k distinct items, or as many as there are.
+        k = min(k, len(self.__items))
+        chosen = list()
+        while len(chosen) < k:
+            item = self.choice()
+            if item not in chosen:
+                chosen.append(item)
+        return chosen
+
+
+def made_up_words(count, rng, syllables=(2, 3)):
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(*syllables))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def optional(value, rng, probability):
+    return value if rng.random() < probability else 'N/A'
+
+
+def write_movies(path, movies, rng):
+    words = ZipfChooser(made_up_words(20000, rng), rng)
+    surnames = made_up_words(max(2000, movies // 20), rng)
+    given_names = made_up_words(500, rng, syllables=(2, 2))
+    people = ['{} {}'.format(given_names[i % len(given_names)].capitalize(), surname.capitalize())
+              for i, surname in enumerate(surnames)]
+    actors = ZipfChooser(people, rng, exponent=0.8)
+    directors = ZipfChooser(people[::-1], rng)
+    genres = ZipfChooser(GENRES, rng, exponent=0.7)
+
+    with open(path, 'w', newline='') as movie_file:
+        writer = csv.writer(movie_file, lineterminator='\n')
+        writer.writerow(MOVIE_HEADER)
+        for rank in range(1, movies + 1):
+            title = ' '.join(words.choice().capitalize() for _ in range(rng.randint(1, 4)))
+            description = ' '.join(words.choice() for _ in range(rng.randint(12, 30))).capitalize() + '.'
+            writer.writerow([
+                rank,
+                title,
+                ','.join(genres.sample(rng.randint(1, 3))),
+                description,
+                directors.choice(),
+                ', '.join(actors.sample(4)),
+                rng.randint(2006, 2016),
+                rng.randint(66, 191),
+                round(min(max(rng.gauss(6.7, 0.95), 1.9), 9.0), 1),
+                int(min(rng.lognormvariate(11, 1.3), 1791916)) + 61,
+                optional(round(min(rng.lognormvariate(3.2, 1.6), 936.63), 2), rng, 0.87),
+                optional(min(max(int(rng.gauss(59, 17)), 11), 100), rng, 0.94),
+            ])
+
+
+def write_users(path, users):
+    with open(path, 'w', newline='') as user_file:
+        writer = csv.writer(user_file, lineterminator='\n')
+        writer.writerow(['id', 'username', 'password'])
+        for number in range(1, users + 1):
+            # Plaintext, like the sample data: passwords are hashed when the user first logs in.
+            writer.writerow([number, 'user{}'.format(number), 'Password{}'.format(number)])
+
+
+def write_reviews(path, reviews, movies, users, rng):
+    # Popular movies and active users get most of the reviews; ranks and user numbers are shuffled so that
+    # popularity is not tied to rank.
+    ranked_movies = list(range(1, movies + 1))
+    rng.shuffle(ranked_movies)
+    movie_chooser = ZipfChooser(ranked_movies, rng, exponent=0.9)
+    user_chooser = ZipfChooser(['user{}'.format(number) for number in range(1, users + 1)], rng, exponent=0.9)
+    words = ZipfChooser(made_up_words(2000, rng), rng)
+
+    with open(path, 'w', newline='') as review_file:
+        writer = csv.writer(review_file, lineterminator='\n')
+        writer.writerow(['id', 'username', 'movie_rank', 'rating', 'review_text'])
+        for number in range(1, reviews + 1):
+            text = ' '.join(words.choice() for _ in range(rng.randint(3, 25))).capitalize() + '.'
+            writer.writerow([number, user_chooser.choice(), movie_chooser.choice(), rng.randint(1, 10), text])
+
+
+def generate(directory: str, movies: int, users: int = None, reviews: int = None, seed: int = 235):
+    """ Writes a catalog of the given size to directory, and returns the paths of its movie, user and review files.
+    The same arguments always give the same files.
+    """
+    users = max(movies // 10, 1) if users is None else users
+    reviews = movies * 10 if reviews is None else reviews
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = [os.path.join(directory, name) for name in (MOVIES_FILE, USERS_FILE, REVIEWS_FILE)]
+    write_movies(paths[0], movies, rng)
+    write_users(paths[1], users)
+    write_reviews(paths[2], reviews, movies, users, rng)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--movies', type=int, default=100000)
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--reviews', type=int)
+    parser.add_argument('--seed', type=int, default=235)
+    args = parser.parse_args()
+
+    for path in generate(args.directory, args.movies, args.users, args.reviews, args.seed):
+        print('{} ({:.1f} MB)'.format(path, os.path.getsize(path) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -15,4 +15,70 @@ class Config:
 
     SECRET_KEY = environ.get('SECRET_KEY')
 
+    # Searches without results fall back to the closest title, actor or director within this many typos. The typo
+    # index is built for this distance, so raising it makes lookups slower and the index larger.
+    SEARCH_MAX_EDIT_DISTANCE = int(environ.get('SEARCH_MAX_EDIT_DISTANCE', 2))
+    SEARCH_SUGGESTIONS = int(environ.get('SEARCH_SUGGESTIONS', 3))
+    # Completions returned by /api/autocomplete, unless the request asks for fewer.
+    AUTOCOMPLETE_LIMIT = int(environ.get('AUTOCOMPLETE_LIMIT', 10))
+
+    # Repository implementation: 'memory' loads the CSV files into memory at startup, 'sqlite' keeps the data in the
+    # SQLite database at SQLITE_DATABASE_PATH, loading the CSV files into it when it is empty.
+    REPOSITORY = environ.get('REPOSITORY', 'memory')
+    SQLITE_DATABASE_PATH = environ.get('SQLITE_DATABASE_PATH', 'movies.sqlite3')
+
+    # Binary snapshot of the populated repository, written by `flask write-snapshot` and loaded at startup while the
+    # CSV files are unchanged. Set to an empty string to always load from CSV.
+    SNAPSHOT_PATH = environ.get('SNAPSHOT_PATH', 'repository.snapshot') or None
+
+    # Processes parsing the movie CSV file in chunks when it is loaded; 0 starts one per CPU. Files of a single chunk
+    # are parsed in the app's own process.
+    INGEST_WORKERS = int(environ.get('INGEST_WORKERS', 0))
+
+    # Journal of the changes to users, reviews and watch lists made since the repository was loaded, replayed at
+    # startup so a restart loses nothing. Off unless set: the journal requires a single worker process, as each keeps
+    # its own copy of the data and the first to open the journal locks the others out. Every
+    # JOURNAL_COMPACT_INTERVAL seconds, a journal larger than JOURNAL_COMPACT_SIZE bytes is folded into the snapshot
+    # at SNAPSHOT_PATH. JOURNAL_SYNC=0 skips the fsync of each commit, trading durability for speed.
+    JOURNAL_PATH = environ.get('JOURNAL_PATH') or None
+    JOURNAL_SYNC = environ.get('JOURNAL_SYNC', '1') != '0'
+    JOURNAL_COMPACT_INTERVAL = float(environ.get('JOURNAL_COMPACT_INTERVAL', 300))
+    JOURNAL_COMPACT_SIZE = int(environ.get('JOURNAL_COMPACT_SIZE', 16 * 1024 * 1024))
+
+    # Rendered template fragments kept by the {% cache %} tag.
+    FRAGMENT_CACHE_SIZE = int(environ.get('FRAGMENT_CACHE_SIZE', 256))
+
+    # Request latency histograms per endpoint and phase, served in the Prometheus text format at /metrics. Set to 0 to
+    # turn the timing off.
+    METRICS = environ.get('METRICS', '1') != '0'
+
+    # Requests sent with a token from `flask profile-token` in the X-Profile header, and a PROFILE_SAMPLE_RATE share of
+    # all requests, are profiled into PROFILE_DIR, as cProfile stats ('pstats') or collapsed stacks for flame graphs
+    # ('collapsed'). Tokens expire after PROFILE_TOKEN_MAX_AGE seconds, and the newest PROFILE_KEEP profiles are kept.
+    PROFILE_DIR = environ.get('PROFILE_DIR', 'profiles')
+    PROFILE_SAMPLE_RATE = float(environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_FORMAT = environ.get('PROFILE_FORMAT', 'pstats')
+    PROFILE_TOKEN_MAX_AGE = int(environ.get('PROFILE_TOKEN_MAX_AGE', 3600))
+    PROFILE_KEEP = int(environ.get('PROFILE_KEEP', 200))
+
+    # OMDb poster lookups
+    OMDB_URL = environ.get('OMDB_URL', 'http://www.omdbapi.com')
+    OMDB_API_KEY = environ.get('OMDB_API_KEY', '4421208f')
+    OMDB_TIMEOUT = float(environ.get('OMDB_TIMEOUT', 5))
+
+    # Poster cache; POSTER_CACHE_PATH is the on-disk store, leave it empty to keep the cache in memory only.
+    POSTER_CACHE_PATH = environ.get('POSTER_CACHE_PATH') or None
+    POSTER_CACHE_TTL = float(environ.get('POSTER_CACHE_TTL', 7 * 24 * 3600))
+    POSTER_CACHE_NEGATIVE_TTL = float(environ.get('POSTER_CACHE_NEGATIVE_TTL', 24 * 3600))
+    POSTER_CACHE_SIZE = int(environ.get('POSTER_CACHE_SIZE', 2048))
+    POSTER_CACHE_DISK_SIZE = int(environ.get('POSTER_CACHE_DISK_SIZE', 100000))
+
+    # Posters of a page are fetched in parallel; any poster still missing after POSTER_DEADLINE seconds is replaced
+    # by a placeholder.
+    POSTER_FETCH_WORKERS = int(environ.get('POSTER_FETCH_WORKERS', 8))
+    POSTER_DEADLINE = float(environ.get('POSTER_DEADLINE', 2.0))
+
+    # Progress file of `flask warm-posters`, so an interrupted run can resume.
+    POSTER_WARM_CHECKPOINT = environ.get('POSTER_WARM_CHECKPOINT', 'warm_posters.checkpoint')
+
 
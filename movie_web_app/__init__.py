@@ -3,7 +3,27 @@ import os
 from flask import Flask
 
 import movie_web_app.adapters.repository as repo
-from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters import memory_repository, sqlite_repository
+from movie_web_app.adapters.journal import Journal, JournalCompactor
+import movie_web_app.adapters.poster_cache as poster_cache
+import movie_web_app.adapters.poster_resolver as poster_resolver
+from movie_web_app.adapters.omdb import OMDbClient
+from movie_web_app.utilities.fragment_cache import FragmentCache, FragmentCacheExtension
+from movie_web_app.utilities.metrics import RequestMetrics, TimedTemplate, instrument
+from movie_web_app.utilities.profiler import ProfilingMiddleware
+
+def start_journal(app, repository, snapshot_header, data_path):
+    """ Replays the journal at JOURNAL_PATH on top of the memory repository, which then records its changes there. """
+    journal = Journal(app.config['JOURNAL_PATH'], sync=app.config['JOURNAL_SYNC'])
+    memory_repository.follow_journal(repository, journal, snapshot_header)
+
+    # Fold the journal into the snapshot from time to time, so it stays quick to replay.
+    if app.config['SNAPSHOT_PATH'] is not None and app.config['JOURNAL_COMPACT_INTERVAL'] > 0:
+        app.extensions['journal_compactor'] = JournalCompactor(
+            repository, app.config['SNAPSHOT_PATH'], data_path,
+            interval=app.config['JOURNAL_COMPACT_INTERVAL'], min_size=app.config['JOURNAL_COMPACT_SIZE'])
+        app.extensions['journal_compactor'].start()
+
 
 def create_app(test_config = None):
     """Construct the core application."""
@@ -20,9 +40,54 @@ def create_app(test_config = None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    if app.config['REPOSITORY'] == 'sqlite':
+        # Create the SqliteRepository implementation for a database-backed repository, loading the CSV files into
+        # the database the first time.
+        repo.repo_instance = sqlite_repository.SqliteRepository(app.config['SQLITE_DATABASE_PATH'],
+                                                                app.config['SEARCH_MAX_EDIT_DISTANCE'],
+                                                                app.config['AUTOCOMPLETE_LIMIT'])
+        sqlite_repository.populate(data_path, repo.repo_instance, app.config['INGEST_WORKERS'])
+    else:
+        # Create the MemoryRepository implementation for a memory-based repository.
+        repo.repo_instance = memory_repository.MemoryRepository(app.config['SEARCH_MAX_EDIT_DISTANCE'],
+                                                                app.config['AUTOCOMPLETE_LIMIT'])
+        header = memory_repository.populate(data_path, repo.repo_instance, app.config['SNAPSHOT_PATH'],
+                                            workers=app.config['INGEST_WORKERS'])
+        if app.config['JOURNAL_PATH'] is not None:
+            # The journal is locked by the app that has it open, so it is opened by the first request rather than
+            # here: `flask` commands, which create an app of their own, then run alongside the app serving requests.
+            repository = repo.repo_instance
+            app.before_first_request(lambda: start_journal(app, repository, header, data_path))
+    # Where `flask write-snapshot` rebuilds the repository from.
+    app.config['DATA_PATH'] = data_path
+
+    # Create the PosterCache that sits in front of the OMDb poster lookups.
+    poster_cache.poster_cache_instance = poster_cache.PosterCache(
+        OMDbClient(app.config['OMDB_URL'], app.config['OMDB_API_KEY'], app.config['OMDB_TIMEOUT']),
+        path=app.config['POSTER_CACHE_PATH'],
+        ttl=app.config['POSTER_CACHE_TTL'],
+        negative_ttl=app.config['POSTER_CACHE_NEGATIVE_TTL'],
+        max_entries=app.config['POSTER_CACHE_SIZE'],
+        max_disk_entries=app.config['POSTER_CACHE_DISK_SIZE'],
+    )
+    poster_resolver.poster_resolver_instance = poster_resolver.PosterResolver(
+        poster_cache.poster_cache_instance,
+        max_workers=app.config['POSTER_FETCH_WORKERS'],
+        deadline=app.config['POSTER_DEADLINE'],
+    )
+
+    # Cache rendered partials marked with {% cache %} in the templates.
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
+
+    if app.config['METRICS']:
+        # Time every request, split into time spent in the repository, converting to dicts, waiting for posters,
+        # rendering templates and the rest, for /metrics. The template class is set before any template is loaded.
+        app.extensions['metrics'] = RequestMetrics()
+        app.jinja_env.template_class = TimedTemplate
+        repo.repo_instance = instrument(repo.repo_instance, 'repo', sorted(repo.AbstractRepository.__abstractmethods__))
+        poster_resolver.poster_resolver_instance = instrument(poster_resolver.poster_resolver_instance, 'upstream',
+                                                              ['resolve'])
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -38,5 +103,31 @@ def create_app(test_config = None):
 
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
+        app.jinja_env.fragment_cache_key = utilities.fragment_cache_key
+
+        from .posters import posters
+        app.register_blueprint(posters.posters_blueprint)
+
+        from .api import api
+        app.register_blueprint(api.api_blueprint)
+
+        if app.config['METRICS']:
+            from .metrics import metrics
+            app.register_blueprint(metrics.metrics_blueprint)
+
+        from .profiles import profiles
+        app.register_blueprint(profiles.profiles_blueprint)
+
+    # Profile the requests asked for with a token from `flask profile-token`, and a sample of the others if
+    # PROFILE_SAMPLE_RATE is set.
+    app.wsgi_app = ProfilingMiddleware(
+        app.wsgi_app,
+        app.config['PROFILE_DIR'],
+        app.config['SECRET_KEY'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        profile_format=app.config['PROFILE_FORMAT'],
+        token_max_age=app.config['PROFILE_TOKEN_MAX_AGE'],
+        keep=app.config['PROFILE_KEEP'],
+    )
 
     return app
@@ -0,0 +1,217 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List
+
+from movie_web_app.adapters.search_index import normalize
+
+# Kinds of names, as bit flags: a name used both as a title and as an actor's name has kind TITLE | ACTOR.
+TITLE, ACTOR, DIRECTOR, GENRE = 1, 2, 4, 8
+KIND_NAMES = {TITLE: 'title', ACTOR: 'actor', DIRECTOR: 'director', GENRE: 'genre'}
+
+
+def kind_names(kinds: int) -> List[str]:
+    return [name for kind, name in KIND_NAMES.items() if kinds & kind]
+
+
+def segments(length: int, count: int):
+    # Splits a string of the given length into `count` near-equal segments; returns their (start, length) pairs.
+    short_length, longer = divmod(length, count)
+    boundaries = list()
+    start = 0
+    for i in range(count):
+        segment_length = short_length + (1 if i >= count - longer else 0)
+        boundaries.append((start, segment_length))
+        start += segment_length
+    return boundaries
+
+
+def signature(key: str) -> int:
+    # The set of characters in key, folded into 32 bits. One edit changes at most two bits, so two strings within
+    # d edits of each other have signatures differing in at most 2d bits.
+    bits = 0
+    for character in key:
+        bits |= 1 << (ord(character) & 31)
+    return bits
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int):
+    """ Returns the edit distance between a and b, or None if it is larger than max_distance.
+
+    A common prefix and suffix, such as a shared first name, are stripped first. Only the band of the dynamic
+    programming table within max_distance of the diagonal is computed, and the computation stops as soon as every
+    cell of a row exceeds max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+
+    prefix = 0
+    while prefix < len(a) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < len(a) - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+    if not a:
+        return len(b)
+
+    too_far = max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        lo = max(1, i - max_distance)
+        hi = min(len(b), i + max_distance)
+        character = a[i - 1]
+        row_minimum = current[lo - 1]
+        for j in range(lo, hi + 1):
+            distance = previous[j - 1] if character == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < distance:
+                distance = previous[j] + 1
+            if current[j - 1] + 1 < distance:
+                distance = current[j - 1] + 1
+            if distance > too_far:
+                distance = too_far
+            current[j] = distance
+            if distance < row_minimum:
+                row_minimum = distance
+        if row_minimum > max_distance:
+            return None
+        previous = current
+
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else None
+
+
+def shared_candidates(segment_postings, accept):
+    """ Yields the name ids found under at least two of the segments, given each segment's posting arrays.
+
+    The largest segment's postings are never enumerated: names found under exactly one of the other segments are
+    looked up in them by binary search, as postings are sorted. Names rejected by the cheaper accept(name_id) are
+    not looked up at all.
+    """
+    segment_postings = sorted(segment_postings, key=lambda postings: sum(len(posting) for posting in postings))
+    largest = segment_postings.pop()
+    counts = Counter()
+    for postings in segment_postings:
+        counts.update(set().union(*postings))
+    for name_id, count in counts.items():
+        if accept(name_id) and (count >= 2 or any(contains(posting, name_id) for posting in largest)):
+            yield name_id
+
+
+def contains(posting, name_id) -> bool:
+    index = bisect_left(posting, name_id)
+    return index < len(posting) and posting[index] == name_id
+
+
+class FuzzyIndex:
+    """ A segment index over movie titles, actor names and director names for typo-tolerant lookups.
+
+    Every name is cut into max_distance + 2 segments, and each segment is indexed under (name length, segment
+    number, segment text). A name within d <= max_distance edits of a query can have at most d of its segments
+    touched by those edits, so at least two of its segments appear unchanged in the query, each shifted by at most
+    d characters. A lookup probes a fixed number of keys, whatever the number of names, keeps only the names found
+    under two segments, drops those whose character sets differ too much, and verifies the rest with a banded
+    Levenshtein distance.
+    """
+
+    def __init__(self, max_distance: int = 2):
+        self.__max_distance = max_distance
+        self.__names: List[str] = list()
+        self.__keys: List[str] = list()
+        self.__kinds = array('B')
+        self.__popularity = array('i')
+        self.__signatures = array('L')
+        self.__name_ids: Dict[str, int] = dict()
+        self.__postings: Dict[tuple, array] = dict()
+        self.__short_name_ids = array('i')
+
+    @property
+    def size(self) -> int:
+        return len(self.__names)
+
+    @property
+    def max_distance(self) -> int:
+        return self.__max_distance
+
+    def add_name(self, name: str, kind: int):
+        name = name.strip()
+        key = normalize(name)
+        if not key:
+            return
+
+        name_id = self.__name_ids.get(key)
+        if name_id is not None:
+            self.__kinds[name_id] |= kind
+            self.__popularity[name_id] += 1
+            return
+
+        name_id = len(self.__names)
+        self.__names.append(name)
+        self.__keys.append(key)
+        self.__kinds.append(kind)
+        self.__popularity.append(1)
+        self.__signatures.append(signature(key))
+        self.__name_ids[key] = name_id
+
+        length = len(key)
+        if length <= self.__max_distance + 1:
+            # Too short to split; such names are few and are compared one by one.
+            self.__short_name_ids.append(name_id)
+            return
+        for number, (start, segment_length) in enumerate(segments(length, self.__max_distance + 2)):
+            posting_key = (length, number, key[start:start + segment_length])
+            posting = self.__postings.get(posting_key)
+            if posting is None:
+                self.__postings[posting_key] = array('i', [name_id])
+            else:
+                posting.append(name_id)
+
+    def lookup(self, query: str, max_distance: int = None, limit: int = 5):
+        """ Returns up to `limit` (name, distance, kinds) tuples for the names within max_distance of query.
+
+        max_distance defaults to, and may not exceed, the distance the index was built for. Results are ordered by
+        distance, then by the number of movies the name appears in. kinds is a list of 'title', 'actor' and
+        'director'.
+        """
+        if max_distance is None or max_distance > self.__max_distance:
+            max_distance = self.__max_distance
+        key = normalize(query)
+        if not key:
+            return []
+
+        signatures = self.__signatures
+        query_signature = signature(key)
+
+        def accept(name_id):
+            return bin(query_signature ^ signatures[name_id]).count('1') <= 2 * max_distance
+
+        candidate_ids = set()
+        for length in range(max(1, len(key) - max_distance), len(key) + max_distance + 1):
+            if length <= self.__max_distance + 1:
+                continue
+            segment_postings = list()
+            for number, (start, segment_length) in enumerate(segments(length, self.__max_distance + 2)):
+                first = max(0, start - max_distance)
+                last = min(len(key) - segment_length, start + max_distance)
+                texts = {key[position:position + segment_length] for position in range(first, last + 1)}
+                postings = [self.__postings[(length, number, text)] for text in texts
+                            if (length, number, text) in self.__postings]
+                segment_postings.append(postings)
+            candidate_ids.update(shared_candidates(segment_postings, accept))
+        if len(key) <= 2 * self.__max_distance + 1:
+            candidate_ids.update(filter(accept, self.__short_name_ids))
+
+        matches = list()
+        for name_id in candidate_ids:
+            distance = bounded_levenshtein(key, self.__keys[name_id], max_distance)
+            if distance is not None:
+                matches.append((distance, -self.__popularity[name_id], self.__names[name_id], name_id))
+
+        matches.sort()
+        return [(name, distance, kind_names(self.__kinds[name_id])) for distance, _, name, name_id in matches[:limit]]
@@ -0,0 +1,125 @@
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Dict
+
+from pyroaring import BitMap
+
+from movie_web_app.domain.movie_file_csv_reader import movie_from_fields, parse_row
+from movie_web_app.domain.registry import EntityRegistry
+
+# Size of the chunks a movie file is parsed in. Files of one chunk, like the sample data, are parsed without a pool.
+CHUNK_BYTES = 1 << 20
+
+
+class FacetIndexes:
+    """ The ranks of the movies with each release year, director, actor and genre (by name) among some movies. """
+
+    def __init__(self):
+        self.years: Dict[int, BitMap] = dict()
+        self.directors: Dict[str, BitMap] = dict()
+        self.actors: Dict[str, BitMap] = dict()
+        self.genres: Dict[str, BitMap] = dict()
+
+    def add(self, fields):
+        # fields are a movie's, from parse_row.
+        rank = fields[0]
+        self.years.setdefault(fields[2], BitMap()).add(rank)
+        self.directors.setdefault(fields[5], BitMap()).add(rank)
+        for actor in fields[6]:
+            self.actors.setdefault(actor, BitMap()).add(rank)
+        for genre in fields[7]:
+            self.genres.setdefault(genre, BitMap()).add(rank)
+
+
+def read_chunks(filename: str, chunk_bytes: int = CHUNK_BYTES):
+    """ Yields the records of a CSV file after its header, as text chunks of about chunk_bytes characters.
+
+    Chunks end at the end of a record: a line break outside quotes, where the quotes seen so far are even in number.
+    """
+    with open(filename, encoding='utf-8-sig', newline='') as csvfile:
+        lines = list()
+        size = quotes = 0
+        header = True
+        for line in csvfile:
+            lines.append(line)
+            size += len(line)
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+            if header:
+                lines.clear()
+                size = quotes = 0
+                header = False
+            elif size >= chunk_bytes:
+                yield ''.join(lines)
+                lines.clear()
+                size = quotes = 0
+        if lines:
+            yield ''.join(lines)
+
+
+def parse_chunk(text: str):
+    """ Returns the fields of the movies in a chunk from read_chunks, and their facet indexes. Runs in the pool. """
+    rows = [parse_row(row) for row in csv.reader(io.StringIO(text, newline='')) if row]
+    facets = FacetIndexes()
+    for fields in rows:
+        facets.add(fields)
+    return rows, facets
+
+
+class MovieIngestion:
+    """ Streams the movies of a CSV file in the format of Data1000Movies.csv, in chunks parsed in a pool of worker
+    processes (one per CPU by default). Iterating yields, per chunk and in file order, its Movies built with registry
+    and their facet indexes.
+
+    Only a few chunks per worker are read ahead, so memory stays bounded whatever the size of the file. Once
+    iterated, rows, seconds and rows_per_second tell how fast it went.
+    """
+
+    def __init__(self, filename: str, registry: EntityRegistry, workers: int = None, chunk_bytes: int = CHUNK_BYTES):
+        self.__filename = filename
+        self.__registry = registry
+        self.__workers = workers or os.cpu_count() or 1
+        self.__chunk_bytes = chunk_bytes
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __iter__(self):
+        start = perf_counter()
+        try:
+            for rows, facets in self.__parsed_chunks():
+                self.rows += len(rows)
+                yield [movie_from_fields(fields, self.__registry) for fields in rows], facets
+        finally:
+            self.seconds = perf_counter() - start
+
+    def __parsed_chunks(self):
+        chunks = read_chunks(self.__filename, self.__chunk_bytes)
+        first = next(chunks, None)
+        if first is None:
+            return
+        second = next(chunks, None)
+        if second is None or self.__workers == 1:
+            # A pool only pays off with chunks to share between its workers.
+            yield parse_chunk(first)
+            if second is not None:
+                yield parse_chunk(second)
+                yield from map(parse_chunk, chunks)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+            pending = deque([executor.submit(parse_chunk, first), executor.submit(parse_chunk, second)])
+            for chunk in chunks:
+                pending.append(executor.submit(parse_chunk, chunk))
+                if len(pending) > 2 * self.__workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
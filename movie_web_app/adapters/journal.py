@@ -0,0 +1,235 @@
+import fcntl
+import logging
+import marshal
+import os
+import struct
+import threading
+import zlib
+
+# A journal file is a header (magic, format version, generation) followed by frames. Each frame is the length and
+# CRC-32 of its payload, then the payload: a marshalled list of records, each a tuple starting with its kind. A frame
+# holds every record committed together, so one write and one fsync cover all the changes waiting at the time.
+MAGIC = b'MOVIEJNL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>8sHQ')
+FRAME = struct.Struct('>II')
+
+logger = logging.getLogger(__name__)
+
+
+class JournalException(Exception):
+    pass
+
+
+class Journal:
+    """ An append-only file of the changes made to a repository, replayed on top of the repository at startup.
+
+    append() queues a record and returns its sequence number; sync() waits until the record is on disk. Writers
+    waiting at the same time share a write and an fsync (group commit): the first of them writes every queued
+    record as one frame and syncs the file, while the others wait for it, and later writers queue behind.
+
+    Compaction folds the journal into a snapshot of the repository, then starts a new, empty journal of the next
+    generation with rotate(). A snapshot records the generation and size of the journal it includes, so startup
+    replays only the records that came after it.
+
+    A journal is held under an exclusive lock until close(), so a second process (or a second Journal on the same
+    path) fails at open rather than interleaving its frames with the first's.
+    """
+
+    def __init__(self, path: str, sync: bool = True):
+        self.__path = path
+        self.__sync = sync
+        self.__lock = threading.Lock()
+        self.__synced = threading.Condition(self.__lock)
+        self.__pending = list()
+        self.__appended = 0
+        self.__durable = 0
+        self.__syncing = False
+
+        if not os.path.exists(path):
+            write_header(path, 0)
+        self.__file = open_locked(path)
+        try:
+            self.__generation = read_header(self.__file, path)
+        except JournalException:
+            self.__file.close()
+            raise
+        self.__file.seek(0, os.SEEK_END)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def size(self) -> int:
+        """ The number of bytes written, which is where the next frame starts. """
+        with self.__lock:
+            return self.__file.tell()
+
+    def records(self, offset: int = None):
+        """ Returns the records of the frames from offset (by default, the first frame) to the end of the file.
+
+        A frame cut short or corrupted by a crash ends the journal: it is truncated away, so the next frame
+        appended follows the last complete one.
+        """
+        with self.__lock:
+            self.__file.seek(0)
+            data = self.__file.read()
+            position = HEADER.size if offset is None else offset
+            records = list()
+            while position + FRAME.size <= len(data):
+                length, crc = FRAME.unpack_from(data, position)
+                start = position + FRAME.size
+                payload = data[start:start + length]
+                if len(payload) != length or zlib.crc32(payload) != crc:
+                    break
+                records.extend(marshal.loads(payload))
+                position = start + length
+
+            if position < len(data):
+                self.__file.truncate(position)
+            self.__file.seek(position)
+            return records
+
+    def append(self, record: tuple) -> int:
+        """ Queues record to be written, and returns the sequence number to pass to sync(). """
+        with self.__lock:
+            self.__pending.append(record)
+            self.__appended += 1
+            return self.__appended
+
+    def sync(self, sequence: int):
+        """ Returns once the record with the given sequence number, and every record before it, is on disk. """
+        with self.__lock:
+            while self.__durable < sequence:
+                if self.__syncing:
+                    self.__synced.wait()
+                    continue
+
+                # This writer commits everything queued so far, and the lock is released for the write and fsync
+                # so other writers can queue the records of the next frame meanwhile.
+                records, self.__pending = self.__pending, list()
+                sequence_written = self.__appended
+                self.__syncing = True
+                self.__lock.release()
+                try:
+                    self.__write(records)
+                except BaseException:
+                    # Nothing of the frame is kept, so its records go back in the queue for the next writer.
+                    with self.__lock:
+                        self.__pending[:0] = records
+                    raise
+                finally:
+                    self.__lock.acquire()
+                    self.__syncing = False
+                    self.__synced.notify_all()
+                self.__durable = sequence_written
+
+    def sync_all(self):
+        """ Writes every queued record, and returns once they are on disk. """
+        with self.__lock:
+            sequence = self.__appended
+        self.sync(sequence)
+
+    def rotate(self):
+        """ Replaces the journal with an empty one of the next generation. Call sync_all() first, and make sure
+        no record is appended meanwhile: the records of the old journal are discarded.
+        """
+        with self.__lock:
+            if self.__pending or self.__syncing:
+                raise JournalException('{} has records waiting to be written'.format(self.__path))
+            generation = self.__generation + 1
+            temporary_path = self.__path + '.tmp'
+            write_header(temporary_path, generation)
+            # The new journal is locked before it takes the place of the old one, so it is never open to others.
+            new_file = open_locked(temporary_path)
+            os.replace(temporary_path, self.__path)
+            self.__file.close()
+            self.__file = new_file
+            self.__file.seek(0, os.SEEK_END)
+            self.__generation = generation
+
+    def close(self):
+        self.sync_all()
+        with self.__lock:
+            self.__file.close()
+
+    def __write(self, records):
+        payload = marshal.dumps(records)
+        position = self.__file.tell()
+        try:
+            self.__file.write(FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+            self.__file.flush()
+            if self.__sync:
+                os.fsync(self.__file.fileno())
+        except OSError:
+            self.__file.seek(position)
+            self.__file.truncate()
+            raise
+
+
+class JournalCompactor(threading.Thread):
+    """ Periodically folds the journal of a repository into a snapshot, once it has grown past min_size bytes. """
+
+    def __init__(self, repo, snapshot_path: str, data_path: str, interval: float, min_size: int):
+        super().__init__(name='journal-compactor', daemon=True)
+        self.__repo = repo
+        self.__snapshot_path = snapshot_path
+        self.__data_path = data_path
+        self.__interval = interval
+        self.__min_size = min_size
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.wait(self.__interval):
+            self.compact_if_needed()
+
+    def compact_if_needed(self) -> bool:
+        journal = self.__repo.journal
+        if journal.size - HEADER.size < self.__min_size:
+            return False
+        try:
+            self.__repo.compact_journal(self.__snapshot_path, self.__data_path)
+        except Exception:
+            # The journal is left as it was, so nothing is lost; the next round tries again.
+            logger.exception('Compacting %s failed', journal.path)
+            return False
+        return True
+
+    def stop(self):
+        self.__stopped.set()
+
+
+def open_locked(path: str):
+    """ Opens the journal at path for reading and writing, under an exclusive lock released when it is closed. """
+    journal_file = open(path, 'r+b')
+    try:
+        fcntl.flock(journal_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        journal_file.close()
+        raise JournalException('{} is in use by another process: run a single worker with the journal, or use '
+                               'REPOSITORY=sqlite for several'.format(path))
+    return journal_file
+
+
+def write_header(path: str, generation: int):
+    with open(path, 'wb') as journal_file:
+        journal_file.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation))
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+
+def read_header(journal_file, path: str) -> int:
+    header = journal_file.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise JournalException('{} is too short to be a journal'.format(path))
+    magic, format_version, generation = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise JournalException('{} is not a journal'.format(path))
+    if format_version != FORMAT_VERSION:
+        raise JournalException('{} has format version {}, expected {}'.format(path, format_version, FORMAT_VERSION))
+    return generation
@@ -1,19 +1,31 @@
 import csv
+import gc
+import logging
 import os
+import threading
+from datetime import datetime
 
 from typing import List, Dict, Set
 
-from bisect import bisect, bisect_left, insort_left
-
-from werkzeug.security import generate_password_hash
+from pyroaring import BitMap, FrozenBitMap
 
 from movie_web_app.adapters.repository import AbstractRepository, RepositoryException
-from movie_web_app.domain.movie_file_csv_reader import MovieFileCSVReader
-from movie_web_app.domain.model import Movie, Director, Actor, Genre, User, Review, WatchList, make_review
+from movie_web_app.adapters.ingestion import FacetIndexes, MovieIngestion
+from movie_web_app.adapters.movie_indexes import MovieIndexes
+from movie_web_app.adapters.journal import Journal
+from movie_web_app.adapters.snapshot import SnapshotException, restore_snapshot, write_snapshot
+from movie_web_app.adapters.passwords import hash_passwords, is_password_hash, stored_password
+from movie_web_app.domain.model import Movie, Director, Actor, Genre, User, Review, WatchList
+from movie_web_app.domain.movie_file_csv_reader import movie_from_fields, parse_row
+from movie_web_app.domain.registry import EntityRegistry
+
+logger = logging.getLogger(__name__)
+
+EMPTY_RANKS = FrozenBitMap()
 
 class MemoryRepository(AbstractRepository):
 
-    def __init__(self):
+    def __init__(self, max_edit_distance: int = 2, max_completions: int = 10):
         self.__dataset_of_movies: List(Movie) = list()
         self.__dataset_of_release_years = list()
         self.__rank_of_movies: Dict(Movie) = dict()
@@ -21,25 +33,146 @@ class MemoryRepository(AbstractRepository):
         self.__dataset_of_actors: Set(Actor) = set()
         self.__dataset_of_directors: Set(Director) = set()
         self.__dataset_of_genres: Set(Genre) = set()
-        self.__movies_with_given_year: Dict(Movie) = dict()
-        self.__movies_with_given_director: Dict(Movie) = dict()
-        self.__movies_with_given_actor: Dict(Movie) = dict()
-        self.__movies_with_given_genre: Dict(Movie) = dict()
-        self.__users = list()
+        # Ranks of the movies with each year, director, actor and genre (by name), as compressed bitmaps.
+        self.__movies_with_given_year: Dict[int, BitMap] = dict()
+        self.__movies_with_given_director: Dict[str, BitMap] = dict()
+        self.__movies_with_given_actor: Dict[str, BitMap] = dict()
+        self.__movies_with_given_genre: Dict[str, BitMap] = dict()
+        self.__all_ranks = BitMap()
+        self.__users: Dict[str, User] = dict()
         self.__reviews = list()
         self.__user_watch_list: Dict(WatchList) = dict()
+        self.__indexes = MovieIndexes(max_edit_distance, max_completions)
+        self.__registry = EntityRegistry()
+        self.__catalog_version = 0
+        self.__journal = None
+        self.__lock = threading.RLock()
+
+    def __getstate__(self):
+        # The journal and lock belong to the running process; a snapshot holds the data only.
+        state = dict(vars(self))
+        del state['_MemoryRepository__journal']
+        del state['_MemoryRepository__lock']
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self.__journal = None
+        self.__lock = threading.RLock()
+
+    @property
+    def journal(self):
+        return self.__journal
+
+    @property
+    def index_settings(self):
+        """ The settings of the search indexes, which a snapshot restored into the repository must share. """
+        return self.__indexes.settings
+
+    @property
+    def registry(self) -> EntityRegistry:
+        """ The actors, directors and genres of the catalog, for movies added to it. """
+        return self.__registry
+
+    def attach_journal(self, journal: Journal):
+        """ Records every later change to users, reviews and watch lists in journal. """
+        self.__journal = journal
+
+    def replay_journal(self, records):
+        """ Applies records taken from a journal, as written by this class. """
+        users = self.__users
+        movies = self.__rank_of_movies
+        append_review = self.__reviews.append
+        parse_timestamp = datetime.fromisoformat
+        # Nothing made here is garbage, and a million new reviews would run the cycle collector over and over.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for record in records:
+                kind = record[0]
+                if kind == 'review':
+                    _, user_name, rank, review_text, rating, timestamp = record
+                    user = users.get(user_name)
+                    movie = movies.get(rank)
+                    if user is None or movie is None:
+                        continue
+                    review = Review(user, movie, review_text, rating if rating is not None else 0,
+                                    parse_timestamp(timestamp))
+                    user.add_review(review)
+                    movie.add_review(review)
+                    append_review(review)
+                elif kind == 'user':
+                    users.setdefault(record[1], User(record[1], record[2]))
+                elif kind == 'password' and record[1] in users:
+                    users[record[1]].password = record[2]
+                elif kind == 'watched' and record[1] in users:
+                    users[record[1]].watch_movie(self.__journaled_movie(*record[2:]))
+                elif kind == 'watch' and record[1] in users:
+                    self.__watch_list_of(users[record[1]]).add_movie(self.__journaled_movie(*record[2:]))
+                elif kind == 'unwatch' and record[1] in users:
+                    self.__watch_list_of(users[record[1]]).remove_movie(Movie(record[2], record[3]))
+        finally:
+            if collecting:
+                gc.enable()
+
+    def compact_journal(self, snapshot_path: str, data_path: str):
+        """ Folds the journal into a snapshot of the repository at snapshot_path, and starts an empty journal. """
+        journal = self.__journal
+        with self.__lock:
+            # Changes are applied and journaled under the lock, so the snapshot holds exactly the records written.
+            journal.sync_all()
+            size = write_snapshot(self, snapshot_path, data_path, journal=(journal.generation, journal.size))
+            journal.rotate()
+        return size
+
+    def __record(self, record):
+        # Journals a change just applied; called with the lock held. Returns what __commit waits for.
+        if self.__journal is not None:
+            return self.__journal.append(record)
+
+    def __commit(self, sequence):
+        # Waits for a journaled change to be on disk, outside the lock so other writers share the fsync.
+        if sequence is not None:
+            self.__journal.sync(sequence)
+
+    def __journaled_movie(self, title, release_year, rank, runtime_minutes=0):
+        movie = self.__rank_of_movies.get(rank)
+        if movie is not None and movie.title == title and movie.release_year == release_year:
+            return movie
+        movie = Movie(title, release_year)
+        if runtime_minutes > 0:
+            movie.runtime_minutes = runtime_minutes
+        return movie
+
+    def __watch_list_of(self, user):
+        if user not in self.__user_watch_list.keys():
+            self.__user_watch_list[user] = WatchList()
+        return self.__user_watch_list[user]
 
     def add_user(self, user: User):
-        self.__users.append(user)
+        with self.__lock:
+            # setdefault checks and inserts in one step, so two registrations of the same name cannot both succeed.
+            if self.__users.setdefault(user.user_name, user) is not user:
+                raise RepositoryException('User name {} is already taken'.format(user.user_name))
+            sequence = self.__record(('user', user.user_name, user.password))
+        self.__commit(sequence)
 
     def get_user(self, username) -> User:
-        return next((user for user in self.__users if user.user_name == username), None)
+        return self.__users.get(username.lower().strip())
+
+    def update_user_password(self, user: User, password: str):
+        with self.__lock:
+            user.password = password
+            sequence = self.__record(('password', user.user_name, password))
+        self.__commit(sequence)
 
     def get_all_users(self):
-        return self.__users
+        return list(self.__users.values())
 
     def add_movie(self, movie: Movie):
+        self.__catalog_version += 1
         self.__dataset_of_movies.append(movie)
+        self.__indexes.add_movie(movie)
 
     def get_movie(self, rank: int):
         movie = None
@@ -59,7 +192,9 @@ class MemoryRepository(AbstractRepository):
         return len(self.__dataset_of_movies)
 
     def add_movie_rank(self,rank,movie):
+        self.__catalog_version += 1
         self.__rank_of_movies[rank] = movie
+        self.__all_ranks.add(rank)
 
     def all_movies(self):
         return self.__dataset_of_movies
@@ -72,13 +207,17 @@ class MemoryRepository(AbstractRepository):
     #def get_movie_director(self, movie: Movie):
     #    return movie.director
 
+    def get_catalog_version(self):
+        return self.__catalog_version
+
     def get_first_movie(self):
         return self.get_movie(1)
 
     def get_last_movie(self):
-        return self.get_movie(1000)
+        return self.get_movie(self.__all_ranks.max()) if self.__all_ranks else None
 
     def add_release_year(self, year):
+        self.__catalog_version += 1
         if year not in self.__dataset_of_release_years:
             self.__dataset_of_release_years.append(year)
 
@@ -94,49 +233,113 @@ class MemoryRepository(AbstractRepository):
         return genre_list
 
     def add_movie_with_release_year(self,movie,year):
-        if year not in self.__movies_with_given_year.keys():
-            self.__movies_with_given_year[year] = [movie.rank]
-        else:
-            self.__movies_with_given_year[year].append(movie.rank)
+        self.__catalog_version += 1
+        self.__movies_with_given_year.setdefault(year, BitMap()).add(movie.rank)
 
     def get_movie_with_given_year(self, year):
         if year in self.__dataset_of_release_years:
-            return self.__movies_with_given_year[year]
+            return list(self.__movies_with_given_year[year])
         else:
             return list()
 
     def add_movie_with_actor(self,movie,actors):
+        self.__catalog_version += 1
         for actor in actors:
-            if actor not in self.__movies_with_given_actor:
-                self.__movies_with_given_actor[actor] = [movie.rank]
-            else:
-                self.__movies_with_given_actor[actor].append(movie.rank)
+            self.__movies_with_given_actor.setdefault(actor.actor_full_name, BitMap()).add(movie.rank)
 
     def get_movie_with_given_actor(self, actor):
-        return self.__movies_with_given_actor[actor]
+        return list(self.__movies_with_given_actor[actor])
 
     def add_movie_with_director(self,movie,director):
-        if director not in self.__movies_with_given_director:
-            self.__movies_with_given_director[director] = [movie.rank]
-        else:
-            self.__movies_with_given_director[director].append(movie.rank)
+        self.__catalog_version += 1
+        self.__movies_with_given_director.setdefault(director.director_full_name, BitMap()).add(movie.rank)
 
     def get_movie_with_given_director(self, director):
-        return self.__movies_with_given_director[director]
+        return list(self.__movies_with_given_director[director])
 
     def add_movie_with_genre(self,movie,genres):
+        self.__catalog_version += 1
         for genre in genres:
-            if genre not in self.__movies_with_given_genre:
-                self.__movies_with_given_genre[genre] = [movie.rank]
-            else:
-                self.__movies_with_given_genre[genre].append(movie.rank)
+            self.__movies_with_given_genre.setdefault(genre.genre_name, BitMap()).add(movie.rank)
 
     def get_movie_with_given_genre(self, genre):
-        return self.__movies_with_given_genre[genre]
+        return list(self.__movies_with_given_genre[genre])
+
+    def add_movie_facets(self, facets: FacetIndexes):
+        """ Adds the release years of facets, and its ranks to the year, director, actor and genre indexes. Adding the
+        facets of the chunks of a file in file order gives the same indexes, with keys in the same order, as adding its
+        movies one by one.
+        """
+        self.__catalog_version += 1
+        for year in facets.years:
+            if year not in self.__dataset_of_release_years:
+                self.__dataset_of_release_years.append(year)
+        for indexes, ranks in ((self.__movies_with_given_year, facets.years),
+                               (self.__movies_with_given_director, facets.directors),
+                               (self.__movies_with_given_actor, facets.actors),
+                               (self.__movies_with_given_genre, facets.genres)):
+            for key, chunk_ranks in ranks.items():
+                merged = indexes.get(key)
+                if merged is None:
+                    indexes[key] = chunk_ranks
+                else:
+                    merged |= chunk_ranks
+
+    def select_movies(self, all_of=(), any_of=(), none_of=()):
+        ranks = self.__all_ranks
+        for facet, value in all_of:
+            ranks = ranks & self.__facet_ranks(facet, value)
+        any_of = [self.__facet_ranks(facet, value) for facet, value in any_of]
+        if any_of:
+            ranks = ranks & BitMap.union(*any_of)
+        for facet, value in none_of:
+            ranks = ranks - self.__facet_ranks(facet, value)
+        return list(ranks)
+
+    def __facet_ranks(self, facet, value):
+        facets = {
+            'genre': self.__movies_with_given_genre,
+            'year': self.__movies_with_given_year,
+            'director': self.__movies_with_given_director,
+            'actor': self.__movies_with_given_actor,
+        }
+        if facet not in facets:
+            raise ValueError('Unknown facet {!r}; expected one of {}'.format(facet, ', '.join(facets)))
+        return facets[facet].get(value, EMPTY_RANKS)
+
+    def filter_movies(self, ranges=None, order_by=None, descending=False, limit=None):
+        return self.__indexes.filter(ranges, order_by, descending, limit)
+
+    def aggregate_movies(self, attribute, ranges=None):
+        return self.__indexes.aggregate(attribute, ranges)
+
+    def browse_movies(self, genres=(), director=None, actor=None, ranges=None, limit=None):
+        terms = [('genre', genre) for genre in genres]
+        if director is not None:
+            terms.append(('director', director))
+        if actor is not None:
+            terms.append(('actor', actor))
+        candidates = None
+        if terms:
+            candidates = BitMap.intersection(*[self.__facet_ranks(facet, value) for facet, value in terms]).to_array()
+        return self.__indexes.browse(candidates, ranges, limit)
+
+    def search_movies(self, query, limit=None):
+        return self.__indexes.search(query, limit)
+
+    def get_similar_names(self, query, max_distance=2, limit=5):
+        return self.__indexes.similar_names(query, max_distance, limit)
+
+    def get_completions(self, prefix, limit=10):
+        return self.__indexes.complete(prefix, limit)
 
     def add_review(self, review: Review):
         super().add_review(review)
-        self.__reviews.append(review)
+        with self.__lock:
+            self.__reviews.append(review)
+            sequence = self.__record(('review', review.user.user_name, review.movie.rank, review.review_text,
+                                      review.rating, review.timestamp.isoformat()))
+        self.__commit(sequence)
 
     def get_review(self):
         return self.__reviews
@@ -146,27 +349,49 @@ class MemoryRepository(AbstractRepository):
             return True
 
     def add_user_watched_movie(self,user,movie):
-        user.watch_movie(movie)
+        with self.__lock:
+            user.watch_movie(movie)
+            sequence = self.__record(('watched', user.user_name, movie.title, movie.release_year, movie.rank,
+                                      movie.runtime_minutes))
+        self.__commit(sequence)
 
     def get_user_watched_movies(self,user):
         return user.watched_movies
 
     def add_user_watch_list(self,user,movie):
-        if user not in self.__user_watch_list.keys():
-            self.__user_watch_list[user] = WatchList()
-        self.__user_watch_list[user].add_movie(movie)
+        with self.__lock:
+            self.__watch_list_of(user).add_movie(movie)
+            sequence = self.__record(('watch', user.user_name, movie.title, movie.release_year, movie.rank))
+        self.__commit(sequence)
 
     def delete_movie_from_watch_list(self,user,movie):
-        if user in self.__user_watch_list.keys():
-            self.__user_watch_list[user].remove_movie(movie)
+        with self.__lock:
+            if user in self.__user_watch_list.keys():
+                self.__user_watch_list[user].remove_movie(movie)
+            sequence = self.__record(('unwatch', user.user_name, movie.title, movie.release_year))
+        self.__commit(sequence)
 
     def get_user_watch_list(self,user):
-        if user not in self.__user_watch_list.keys():
-            self.__user_watch_list[user] = WatchList()
-        return self.__user_watch_list[user]
+        return self.__watch_list_of(user)
+
+    def build_indexes(self):
+        self.__indexes.build()
+
+    def get_memory_roots(self):
+        return {
+            'movies': [self.__dataset_of_movies, self.__rank_of_movies, self.__dataset_of_release_years,
+                       self.__registry, self.__dataset_of_actors, self.__dataset_of_directors,
+                       self.__dataset_of_genres, self.__movie_details],
+            'facet indexes': [self.__movies_with_given_year, self.__movies_with_given_director,
+                              self.__movies_with_given_actor, self.__movies_with_given_genre, self.__all_ranks],
+            'search indexes': [self.__indexes],
+            'users': [self.__users],
+            'reviews': [self.__reviews],
+            'watch lists': [self.__user_watch_list],
+        }
 
 def read_csv_file(filename):
-    with open(filename) as csvfile:
+    with open(filename, encoding='utf-8-sig', newline='') as csvfile:
         movie_file_reader = csv.reader(csvfile)
 
         headers = next(movie_file_reader)
@@ -175,65 +400,111 @@ def read_csv_file(filename):
             row = [item.strip() for item in row]
             yield row
 
-def load_movies(data_path:str, repo: MemoryRepository):
-    index = 0
-    for row in read_csv_file(os.path.join(data_path, 'Data1000Movies.csv')):
-        rank = int(row[0])
-        title = row[1]
-        release_year = int(row[6])
-        description = row[3]
-        runtime = int(row[7])
-        movie = Movie(title, release_year)
-        movie.rank = rank
-        movie.description = description
-        movie.runtime_minutes = runtime
-
-        actors = row[5]
-        actors_list = actors.split(',')
-        for actor in actors_list:
-            movie.add_actor(actor)
-        director = row[4]
-        movie.director = director
-        genres = row[2]
-        genres_list = genres.split(',')
-        for genre in genres_list:
-            movie.add_genre(genre)
-
-        repo.add_movie(movie)
-        repo.add_movie_rank(rank, movie)
-        repo.add_release_year(release_year)
-
-        # add movie with same year into movies_with_given_year
-        repo.add_movie_with_release_year(movie,release_year)
+def movie_from_row(row, registry: EntityRegistry):
+    """ Returns the Movie described by a row of Data1000Movies.csv, with its actors, director and genres taken from
+    registry.
+    """
+    return movie_from_fields(parse_row(row), registry)
 
-        # add movie with same actor into movies_with_given_actor
-        repo.add_movie_with_actor(movie,actors)
 
-        # add movie with same director into movies_with_given_director
-        repo.add_movie_with_director(movie,director)
-
-        # add movie with same genre into movies_with_given_genre
-        repo.add_movie_with_genre(movie,genres_list)
-
-        #repo.add_movie_details(movie,[description, genres_list, runtime, director, actors_list])
-
-        if index > 1000:
-            break
-
-        index += 1
+def load_movies(data_path:str, repo: MemoryRepository, workers: int = None):
+    # The file is parsed in chunks by a pool of workers, which also index each chunk's movies by year, director,
+    # actor and genre; the chunks' indexes are merged in file order. Returns the ingestion, with its throughput.
+    ingestion = MovieIngestion(os.path.join(data_path, 'Data1000Movies.csv'), repo.registry, workers)
+    for movies, facets in ingestion:
+        for movie in movies:
+            repo.add_movie(movie)
+            repo.add_movie_rank(movie.rank, movie)
+        repo.add_movie_facets(facets)
+    repo.build_indexes()
+    logger.info('Loaded %d movies in %.2f s (%.0f rows/s)', ingestion.rows, ingestion.seconds,
+                ingestion.rows_per_second)
+    return ingestion
 
 
 def load_users(data_path: str, repo:MemoryRepository):
     users = dict()
 
+    # Passwords are not hashed here: user.csv holds hashes, or plaintext passwords that are hashed on first login.
     for row in read_csv_file(os.path.join(data_path, 'user.csv')):
-        user = User(user_name=row[1],password=generate_password_hash(row[2]))
+        user = User(user_name=row[1],password=stored_password(row[2]))
         repo.add_user(user)
         users[row[0]] = user
     return users
 
 
-def populate(data_path: str, repo:MemoryRepository):
-    load_movies(data_path, repo)
-    load_users(data_path, repo)
-
+def load_plaintext_passwords(data_path: str, repo: MemoryRepository):
+    # A snapshot holds no plaintext passwords; the users restored without a password get theirs from user.csv.
+    for row in read_csv_file(os.path.join(data_path, 'user.csv')):
+        user = repo.get_user(row[1])
+        if user is not None and user.password is None:
+            user.password = stored_password(row[2])
+
+
+def hash_user_passwords(data_path: str, max_workers: int = None):
+    """ Replaces the plaintext passwords in user.csv with their hashes, computed in a pool of processes.
+
+    Returns the number of passwords hashed. The file is rewritten next to the original and renamed into place.
+    """
+    path = os.path.join(data_path, 'user.csv')
+    with open(path, newline='') as csvfile:
+        rows = list(csv.reader(csvfile))
+    header, rows = rows[0], rows[1:]
+
+    plaintext_rows = [row for row in rows if not is_password_hash(row[2].strip())]
+    hashes = hash_passwords((row[2].strip() for row in plaintext_rows), max_workers)
+    for row, password_hash in zip(plaintext_rows, hashes):
+        row[2] = password_hash
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(temporary_path, path)
+    return len(plaintext_rows)
+
+
+def populate(data_path: str, repo:MemoryRepository, snapshot_path: str = None, journal: Journal = None,
+             workers: int = None):
+    # Returns the header of the snapshot restored, or None if the repository was loaded from the CSV files.
+    # A snapshot written by `flask write-snapshot` restores the movies, indexes and users without parsing the CSV
+    # files, as long as they have not changed since.
+    header = None
+    if snapshot_path is not None and os.path.exists(snapshot_path):
+        try:
+            header = restore_snapshot(repo, snapshot_path, data_path)
+        except SnapshotException as e:
+            logger.warning('Loading the repository from CSV: %s', e)
+
+    if header is None:
+        load_movies(data_path, repo, workers)
+        load_users(data_path, repo)
+    else:
+        load_plaintext_passwords(data_path, repo)
+
+    if journal is not None:
+        follow_journal(repo, journal, header)
+    return header
+
+
+def follow_journal(repo: MemoryRepository, journal: Journal, header):
+    """ Replays the changes in journal made since repo was populated, from the snapshot with the given header (None
+    for one loaded from the CSV files), then has journal record the changes to come.
+    """
+    repo.replay_journal(journal.records(journal_offset(journal, header)))
+    repo.attach_journal(journal)
+
+
+def journal_offset(journal: Journal, header):
+    """ Returns where to start replaying journal on top of a repository restored from the snapshot with the given
+    header (None for one loaded from the CSV files): after the part of the journal folded into the snapshot.
+    """
+    generation, size = (header or {}).get('journal') or (0, None)
+    if journal.generation == generation:
+        return size
+    if journal.generation > generation + 1:
+        logger.warning('%s is generation %d of the journal, but the repository was loaded with generation %d; the '
+                       'changes compacted in between are lost', journal.path, journal.generation, generation)
+    # Otherwise the journal was started after the snapshot was written, and all of it is replayed.
+    return None
@@ -0,0 +1,188 @@
+import numpy as np
+
+# The numeric attributes of a movie, each stored as one array indexed by rank. Float columns hold NaN where a movie
+# has no value (None, such as a revenue of N/A); integer columns hold 0, which no movie has as a year or runtime.
+COLUMNS = {
+    'release_year': np.int16,
+    'runtime_minutes': np.int16,
+    'rating': np.float64,
+    'votes': np.int64,
+    'revenue': np.float64,
+    'metascore': np.float64,
+}
+
+# Genres beyond this many are left out of the facet counts.
+MAX_GENRES = 64
+
+
+class MovieColumns:
+    """ A columnar store of the numeric attributes of the catalog, so filters, sorts and aggregates over all the
+    movies are NumPy operations on arrays rather than loops over Movie objects.
+
+    Every column is an array indexed by rank, alongside a mask of the ranks that hold a movie. Ranges are given as
+    a dict of attribute -> (low, high), both ends inclusive and None for an open end; a missing value is never in a
+    bounded range.
+
+    For facet counts, the genres of each movie are also kept as a bit set (of the first MAX_GENRES genres seen)
+    and its director as a number.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.__size = 0
+        self.__present = np.zeros(capacity, dtype=bool)
+        self.__columns = {name: empty_column(dtype, capacity) for name, dtype in COLUMNS.items()}
+        self.__genre_bits = np.zeros(capacity, dtype=np.uint64)
+        self.__genre_names = list()
+        self.__genre_ids = dict()
+        self.__director_ids = np.zeros(capacity, dtype=np.int32)
+        self.__director_names = [None]
+        self.__director_numbers = dict()
+
+    @property
+    def size(self) -> int:
+        """ The number of movies stored. """
+        return int(np.count_nonzero(self.__present))
+
+    def add_movie(self, movie):
+        rank = movie.rank
+        if rank >= len(self.__present):
+            self.__grow(max(rank + 1, 2 * len(self.__present)))
+        self.__present[rank] = True
+        for name, value in movie_values(movie).items():
+            self.__columns[name][rank] = missing_value(COLUMNS[name]) if value is None else value
+
+        genre_bits = 0
+        for genre in movie.genres:
+            genre_id = self.__genre_ids.get(genre.genre_name)
+            if genre_id is None and len(self.__genre_names) < MAX_GENRES:
+                genre_id = self.__genre_ids[genre.genre_name] = len(self.__genre_names)
+                self.__genre_names.append(genre.genre_name)
+            if genre_id is not None:
+                genre_bits |= 1 << genre_id
+        self.__genre_bits[rank] = genre_bits
+
+        director_id = 0
+        if movie.director is not None:
+            name = movie.director.director_full_name
+            director_id = self.__director_numbers.get(name)
+            if director_id is None:
+                director_id = self.__director_numbers[name] = len(self.__director_names)
+                self.__director_names.append(name)
+        self.__director_ids[rank] = director_id
+        self.__size = max(self.__size, rank + 1)
+
+    def select(self, ranges=None):
+        """ Returns a boolean array, indexed by rank, of the movies with attributes within ranges. """
+        return self.__in_ranges(slice(None), ranges)
+
+    def restrict(self, ranks=None, ranges=None):
+        """ Returns, as an array in the order given, the ranks among ranks (by default, all of them) of the movies
+        with attributes within ranges. Only the given ranks are looked at, so a short list is quick to restrict.
+        """
+        if ranks is None:
+            return np.flatnonzero(self.select(ranges))
+        ranks = np.asarray(ranks, dtype=np.intp)
+        ranks = ranks[(ranks >= 0) & (ranks < self.__size)]
+        return ranks[self.__in_ranges(ranks, ranges)]
+
+    def facet_counts(self, ranks, top: int = 10):
+        """ Returns the number of the movies with the given ranks in each genre and release year, and for the `top`
+        most common directors, as {'genres': [(genre, count)], 'release_years': [(year, count)],
+        'directors': [(director, count)]}; genres and directors most common first, years in order.
+        """
+        ranks = np.asarray(ranks, dtype=np.intp)
+
+        years, counts = np.unique(self.__columns['release_year'][ranks], return_counts=True)
+        release_years = [(int(year), int(count)) for year, count in zip(years, counts) if year != 0]
+
+        bits = self.__genre_bits[ranks]
+        genres = [(genre, int(np.count_nonzero(bits & np.uint64(1 << genre_id))))
+                  for genre_id, genre in enumerate(self.__genre_names)]
+        genres = sorted((item for item in genres if item[1]), key=lambda item: (-item[1], item[0]))
+
+        director_ids, counts = np.unique(self.__director_ids[ranks], return_counts=True)
+        counts[director_ids == 0] = 0
+        order = np.lexsort((director_ids, -counts))[:top]
+        directors = [(self.__director_names[director_ids[i]], int(counts[i])) for i in order if counts[i]]
+        return {'genres': genres, 'release_years': release_years, 'directors': directors}
+
+    def ranks(self, ranges=None, order_by: str = None, descending: bool = False, limit: int = None):
+        """ Returns (ranks, total): the ranks of the first `limit` movies with attributes within ranges, ordered by
+        the attribute order_by (missing values last, ties by rank) or by rank, and the number of such movies.
+        """
+        ranks = np.flatnonzero(self.select(ranges))
+        if order_by is not None:
+            values = self.__column(order_by)[ranks]
+            if values.dtype.kind != 'f':
+                values = np.where(values == 0, np.nan, values)
+            # argsort puts NaN last either way; negating rather than reversing keeps equal values in rank order.
+            ranks = ranks[np.argsort(-values if descending else values, kind='stable')]
+        return ranks[:limit].tolist(), len(ranks)
+
+    def aggregate(self, name: str, ranges=None):
+        """ Returns the count, min, max, mean and sum of an attribute over the movies with attributes within ranges,
+        leaving out missing values. min, max and mean are None if no movie has a value.
+        """
+        values = self.__column(name)[self.select(ranges)]
+        values = values[~missing(values)]
+        if len(values) == 0:
+            return {'count': 0, 'min': None, 'max': None, 'mean': None, 'sum': 0}
+        return {
+            'count': len(values),
+            'min': values.min().item(),
+            'max': values.max().item(),
+            'mean': float(values.mean(dtype=np.float64)),
+            'sum': values.sum(dtype=np.float64 if values.dtype.kind == 'f' else np.int64).item(),
+        }
+
+    def __in_ranges(self, ranks, ranges):
+        # Copied, as indexing with a slice gives a view of the mask.
+        mask = self.__present[:self.__size][ranks].copy()
+        for name, (low, high) in (ranges or {}).items():
+            values = self.__column(name)[ranks]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        return mask
+
+    def __column(self, name):
+        if name not in self.__columns:
+            raise ValueError('Unknown movie attribute {!r}; expected one of {}'.format(name, ', '.join(COLUMNS)))
+        return self.__columns[name][:self.__size]
+
+    def __grow(self, capacity):
+        self.__present = grown(self.__present, capacity, False)
+        self.__genre_bits = grown(self.__genre_bits, capacity, 0)
+        self.__director_ids = grown(self.__director_ids, capacity, 0)
+        for name, column in self.__columns.items():
+            self.__columns[name] = grown(column, capacity, missing_value(column.dtype))
+
+
+def grown(array, capacity, fill):
+    copy = np.full(capacity, fill, dtype=array.dtype)
+    copy[:len(array)] = array
+    return copy
+
+
+def movie_values(movie):
+    return {
+        'release_year': movie.release_year,
+        'runtime_minutes': movie.runtime_minutes,
+        'rating': movie.rating,
+        'votes': movie.votes,
+        'revenue': movie.revenue,
+        'metascore': movie.metascores,
+    }
+
+
+def missing_value(dtype):
+    return np.nan if np.dtype(dtype).kind == 'f' else 0
+
+
+def empty_column(dtype, capacity):
+    return np.full(capacity, missing_value(dtype), dtype=dtype)
+
+
+def missing(values):
+    return np.isnan(values) if values.dtype.kind == 'f' else values == 0
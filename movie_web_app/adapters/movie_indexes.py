@@ -0,0 +1,87 @@
+from bisect import bisect_left
+
+from movie_web_app.adapters.fuzzy_index import FuzzyIndex, TITLE, ACTOR, DIRECTOR, GENRE
+from movie_web_app.adapters.movie_columns import MovieColumns
+from movie_web_app.adapters.prefix_index import PrefixIndex
+from movie_web_app.adapters.search_index import SearchIndex
+from movie_web_app.domain.model import Movie
+
+
+class MovieIndexes:
+    """ The full-text, typo-tolerant and prefix indexes and the columnar attribute store over a catalog, kept in
+    step by add_movie. Typo-tolerant lookups go up to max_edit_distance edits, and completions up to max_completions
+    names, which the fuzzy and prefix indexes are built for.
+    """
+
+    def __init__(self, max_edit_distance: int = 2, max_completions: int = 10):
+        self.__search_index = SearchIndex()
+        self.__fuzzy_index = FuzzyIndex(max_edit_distance)
+        self.__prefix_index = PrefixIndex(max_completions)
+        self.__columns = MovieColumns()
+
+    @property
+    def settings(self):
+        """ The settings the indexes were built with, which the same indexes built again must be given. """
+        return {'max_edit_distance': self.__fuzzy_index.max_distance,
+                'max_completions': self.__prefix_index.max_completions}
+
+    def add_movie(self, movie: Movie):
+        self.__search_index.add_movie(movie)
+        self.__fuzzy_index.add_name(movie.title, TITLE)
+        self.__prefix_index.add_name(movie.title, TITLE)
+        if movie.director is not None:
+            self.__fuzzy_index.add_name(movie.director.director_full_name, DIRECTOR)
+            self.__prefix_index.add_name(movie.director.director_full_name, DIRECTOR)
+        for actor in movie.actors:
+            self.__fuzzy_index.add_name(actor.actor_full_name, ACTOR)
+            self.__prefix_index.add_name(actor.actor_full_name, ACTOR)
+        for genre in movie.genres:
+            self.__prefix_index.add_name(genre.genre_name, GENRE)
+        self.__columns.add_movie(movie)
+
+    def build(self):
+        """ Builds what add_movie leaves to the first lookup, so that lookup does not pay for it. """
+        self.__prefix_index.build()
+
+    def search(self, query, limit=None):
+        return self.__search_index.search(query, limit)
+
+    def similar_names(self, query, max_distance=2, limit=5):
+        return self.__fuzzy_index.lookup(query, max_distance, limit)
+
+    def complete(self, prefix, limit=10):
+        return self.__prefix_index.complete(prefix, limit)
+
+    def filter(self, ranges=None, order_by=None, descending=False, limit=None):
+        return self.__columns.ranks(ranges, order_by, descending, limit)
+
+    def aggregate(self, attribute, ranges=None):
+        return self.__columns.aggregate(attribute, ranges)
+
+    def browse(self, candidates=None, ranges=None, limit=None):
+        """ Returns (ranks, total, facets) for the movies among candidates, a sorted sequence of ranks (by default,
+        every movie), with attributes within ranges.
+        """
+        ranks = self.__columns.restrict(candidates, ranges)
+        return ranks[:limit].tolist(), len(ranks), self.__columns.facet_counts(ranks)
+
+
+def intersect(postings):
+    """ Returns the ranks in every one of postings, sorted lists of ranks, in order.
+
+    The shortest list is walked and each of its ranks looked up in the others by binary search, resuming where the
+    last lookup ended, so the work grows with the shortest list rather than the catalog.
+    """
+    postings = sorted(postings, key=len)
+    ranks = postings[0]
+    for posting in postings[1:]:
+        found = list()
+        low = 0
+        for rank in ranks:
+            low = bisect_left(posting, rank, low)
+            if low == len(posting):
+                break
+            if posting[low] == rank:
+                found.append(rank)
+        ranks = found
+    return ranks
@@ -0,0 +1,46 @@
+import json
+import socket
+import urllib.parse
+from urllib.error import URLError
+from urllib.request import urlopen
+
+
+class OMDbException(Exception):
+    pass
+
+
+class OMDbClient:
+
+    def __init__(self, base_url: str, api_key: str, timeout: float = 5.0):
+        self.__base_url = base_url.rstrip('/')
+        self.__api_key = api_key
+        self.__timeout = timeout
+
+    @property
+    def base_url(self) -> str:
+        return self.__base_url
+
+    def fetch(self, title: str, year: int = None):
+        """ Returns the OMDb details of the movie with the given title as a dict.
+
+        If OMDb does not know the title, this method returns None. Transport failures raise OMDbException so that
+        callers can tell a missing movie apart from an unreachable server.
+        """
+        # Only the title is sent upstream; the year is part of the cache key, not of the OMDb query.
+        args = {'t': title, 'apikey': self.__api_key}
+        link = '{}/?{}'.format(self.__base_url, urllib.parse.urlencode(args))
+
+        try:
+            with urlopen(link, timeout=self.__timeout) as response:
+                content = response.read()
+        except (URLError, socket.timeout, ConnectionError) as e:
+            raise OMDbException(str(e))
+
+        try:
+            details = json.loads(content.decode('UTF-8'))
+        except ValueError as e:
+            raise OMDbException(str(e))
+
+        if details.get('Response') == 'False':
+            return None
+        return details
@@ -0,0 +1,101 @@
+import csv
+import json
+import os
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class OMDbStubServer:
+    """ A local stand-in for omdbapi.com, serving posters for the movies of a Data1000Movies.csv file.
+
+    The server answers the same `?t=<title>` queries as OMDb, so the application can be pointed at it through the
+    OMDB_URL setting when testing or benchmarking offline. Every response is delayed by `latency` seconds.
+    """
+
+    def __init__(self, data_path: str, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.__movies = dict()
+        self.__latency = latency
+        self.__request_count = 0
+        self.__lock = threading.Lock()
+
+        with open(os.path.join(data_path, 'Data1000Movies.csv'), encoding='utf-8-sig') as csvfile:
+            for row in csv.DictReader(csvfile):
+                self.__movies[row['Title'].strip().lower()] = row
+
+        self.__server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    @property
+    def latency(self) -> float:
+        return self.__latency
+
+    @latency.setter
+    def latency(self, latency: float):
+        self.__latency = latency
+
+    @property
+    def request_count(self) -> int:
+        return self.__request_count
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def lookup(self, title: str):
+        row = self.__movies.get(title.strip().lower())
+        if row is None:
+            return {'Response': 'False', 'Error': 'Movie not found!'}
+        return {
+            'Title': row['Title'],
+            'Year': row['Year'],
+            'Genre': row['Genre'],
+            'Director': row['Director'],
+            'Actors': row['Actors'],
+            'Plot': row['Description'],
+            'Poster': '{}/posters/{}.jpg'.format(self.url, row['Rank']),
+            'Response': 'True',
+        }
+
+    def __make_handler(self):
+        stub = self
+
+        def record_request():
+            with self.__lock:
+                self.__request_count += 1
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                record_request()
+                if stub.latency > 0:
+                    time.sleep(stub.latency)
+
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                details = stub.lookup(query.get('t', [''])[0])
+
+                body = json.dumps(details).encode('UTF-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
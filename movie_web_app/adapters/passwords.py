@@ -0,0 +1,56 @@
+import hashlib
+import hmac
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Passwords read in the clear from user.csv are stored behind this marker until they are hashed on first login.
+# Stored passwords must be checked with verify_password, which knows the marker, not with check_password_hash.
+PLAINTEXT_PREFIX = 'plain$'
+
+# Werkzeug writes hashes as method$salt$hash, the method being e.g. pbkdf2:sha256:600000, scrypt:32768:8:1 (the
+# default since Werkzeug 2.3) or, before 2.3, a bare hashlib algorithm.
+PASSWORD_HASH_PATTERN = re.compile(r'^([a-z0-9_:]+)\$[^$]*\$[0-9a-f]+$')
+KEY_DERIVATION_METHODS = ('pbkdf2', 'scrypt')
+
+
+def is_password_hash(value: str) -> bool:
+    match = PASSWORD_HASH_PATTERN.match(value)
+    if match is None:
+        return False
+    method = match.group(1)
+    return method.split(':')[0] in KEY_DERIVATION_METHODS or method in hashlib.algorithms_guaranteed
+
+
+def stored_password(value: str) -> str:
+    """ Returns what to store for a password column of user.csv, which holds either a hash or a plaintext password.
+
+    Hashes are kept as they are; plaintext passwords are marked, and hashed on the user's first login.
+    """
+    return value if is_password_hash(value) else PLAINTEXT_PREFIX + value
+
+
+def verify_password(stored: str, password: str):
+    """ Returns (valid, upgraded): whether password matches the stored value, and, if the stored value was a marked
+    plaintext password and it matched, the hash to store instead of it (None otherwise).
+    """
+    if stored.startswith(PLAINTEXT_PREFIX):
+        if hmac.compare_digest(stored[len(PLAINTEXT_PREFIX):].encode('utf-8'), password.encode('utf-8')):
+            return True, generate_password_hash(password)
+        return False, None
+    return check_password_hash(stored, password), None
+
+
+def hash_passwords(passwords, max_workers: int = None):
+    """ Returns the hashes of passwords, computed in parallel in a pool of processes. """
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # A few chunks per worker keeps the pool busy without pickling each password separately.
+    chunk_size = max(1, len(passwords) // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(generate_password_hash, passwords, chunksize=chunk_size))
@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from movie_web_app.adapters.omdb import OMDbClient
+
+poster_cache_instance = None
+
+
+class PosterCache:
+    """ Caches OMDb movie details in front of an OMDbClient.
+
+    Lookups go through an in-process LRU first, then through an optional on-disk SQLite store, and only reach OMDb
+    on a miss in both. Entries are keyed by (title, release year) and expire after `ttl` seconds. Titles that OMDb
+    does not know are cached as well (negative entries), with their own, usually shorter, `negative_ttl`.
+    """
+
+    def __init__(self, client: OMDbClient, path: str = None, ttl: float = 7 * 24 * 3600,
+                 negative_ttl: float = 24 * 3600, max_entries: int = 2048, max_disk_entries: int = 100000,
+                 clock=time.time):
+        self.__client = client
+        self.__ttl = ttl
+        self.__negative_ttl = negative_ttl
+        self.__max_entries = max_entries
+        self.__max_disk_entries = max_disk_entries
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__stats = {'hits': 0, 'negative_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'errors': 0}
+
+        self.__db = None
+        self.__disk_entries = 0
+        if path is not None:
+            self.__db = sqlite3.connect(path, check_same_thread=False)
+            self.__db.execute(
+                'CREATE TABLE IF NOT EXISTS posters ('
+                'title TEXT NOT NULL, year INTEGER NOT NULL, details TEXT, stored_at REAL NOT NULL, '
+                'expires_at REAL NOT NULL, PRIMARY KEY (title, year))')
+            self.__db.execute('CREATE INDEX IF NOT EXISTS posters_stored_at ON posters (stored_at)')
+            self.__db.commit()
+            self.__disk_entries = self.__db.execute('SELECT COUNT(*) FROM posters').fetchone()[0]
+
+    @property
+    def client(self) -> OMDbClient:
+        return self.__client
+
+    def stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats['entries'] = len(self.__entries)
+            stats['disk_entries'] = self.__disk_entries
+        return stats
+
+    def lookup(self, title: str, year: int):
+        """ Returns (found, details) from the cache without contacting OMDb.
+
+        found is False on a miss. On a hit, details is the cached dict, or None for a negative entry.
+        """
+        key = (title, year)
+        now = self.__clock()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                expires_at, details = entry
+                if expires_at > now:
+                    self.__entries.move_to_end(key)
+                    self.__count_hit(details)
+                    return True, details
+                del self.__entries[key]
+
+            if self.__db is not None:
+                row = self.__db.execute(
+                    'SELECT details, expires_at FROM posters WHERE title = ? AND year = ?', key).fetchone()
+                if row is not None and row[1] > now:
+                    details = json.loads(row[0]) if row[0] is not None else None
+                    self.__remember(key, row[1], details)
+                    self.__stats['disk_hits'] += 1
+                    self.__count_hit(details)
+                    return True, details
+
+            self.__stats['misses'] += 1
+        return False, None
+
+    def get(self, title: str, year: int):
+        """ Returns the OMDb details of a movie, or None if OMDb does not know it.
+
+        Raises OMDbException if the details are not cached and OMDb cannot be reached.
+        """
+        found, details = self.lookup(title, year)
+        if found:
+            return details
+
+        try:
+            details = self.__client.fetch(title, year)
+        except Exception:
+            with self.__lock:
+                self.__stats['errors'] += 1
+            raise
+
+        self.store(title, year, details)
+        return details
+
+    def get_poster(self, title: str, year: int):
+        details = self.get(title, year)
+        return poster_from_details(details)
+
+    def store(self, title: str, year: int, details):
+        key = (title, year)
+        now = self.__clock()
+        expires_at = now + (self.__ttl if details is not None else self.__negative_ttl)
+
+        with self.__lock:
+            self.__remember(key, expires_at, details)
+            if self.__db is not None:
+                self.__write_to_disk(key, now, expires_at, details)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            if self.__db is not None:
+                self.__db.execute('DELETE FROM posters')
+                self.__db.commit()
+                self.__disk_entries = 0
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def __count_hit(self, details):
+        if details is None:
+            self.__stats['negative_hits'] += 1
+        else:
+            self.__stats['hits'] += 1
+
+    def __remember(self, key, expires_at, details):
+        self.__entries[key] = (expires_at, details)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+            self.__stats['evictions'] += 1
+
+    def __write_to_disk(self, key, stored_at, expires_at, details):
+        existing = self.__db.execute('SELECT 1 FROM posters WHERE title = ? AND year = ?', key).fetchone()
+        self.__db.execute(
+            'INSERT OR REPLACE INTO posters (title, year, details, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)',
+            (key[0], key[1], json.dumps(details) if details is not None else None, stored_at, expires_at))
+        if existing is None:
+            self.__disk_entries += 1
+
+        if self.__disk_entries > self.__max_disk_entries:
+            # Drop expired entries first, then the oldest ones until the store is back under its limit.
+            self.__db.execute('DELETE FROM posters WHERE expires_at <= ?', (stored_at,))
+            self.__disk_entries = self.__db.execute('SELECT COUNT(*) FROM posters').fetchone()[0]
+            excess = self.__disk_entries - self.__max_disk_entries
+            if excess > 0:
+                self.__db.execute(
+                    'DELETE FROM posters WHERE rowid IN (SELECT rowid FROM posters ORDER BY stored_at LIMIT ?)',
+                    (excess,))
+                self.__disk_entries -= excess
+        self.__db.commit()
+
+
+def poster_from_details(details):
+    if details is None:
+        return None
+    poster = details.get('Poster')
+    if poster is None or poster == 'N/A':
+        return None
+    return poster
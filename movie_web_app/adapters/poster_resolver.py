@@ -0,0 +1,98 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from movie_web_app.adapters.omdb import OMDbException
+from movie_web_app.adapters.poster_cache import PosterCache, poster_from_details
+
+logger = logging.getLogger(__name__)
+
+poster_resolver_instance = None
+
+
+class PosterResolver:
+    """ Resolves the posters of a page of movies in parallel through a PosterCache.
+
+    Cached posters are answered inline; misses are fetched from OMDb on a bounded thread pool shared by all requests.
+    Whatever has not arrived within `deadline` seconds resolves to None, and its fetch keeps running in the background
+    so the poster is cached for the next request. Concurrent requests for the same movie share a single fetch.
+    """
+
+    def __init__(self, poster_cache: PosterCache, max_workers: int = 8, deadline: float = 2.0):
+        self.__poster_cache = poster_cache
+        self.__deadline = deadline
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='poster')
+        self.__in_flight = dict()
+        self.__lock = threading.Lock()
+        self.__timeouts = 0
+
+    @property
+    def poster_cache(self) -> PosterCache:
+        return self.__poster_cache
+
+    @property
+    def deadline(self) -> float:
+        return self.__deadline
+
+    @property
+    def timeouts(self) -> int:
+        return self.__timeouts
+
+    def resolve(self, keys, deadline: float = None):
+        """ Returns a dict mapping each (title, year) in keys to its poster url, or None. """
+        if deadline is None:
+            deadline = self.__deadline
+
+        posters = dict()
+        futures = dict()
+        for key in keys:
+            if key in posters or key in futures:
+                continue
+            found, details = self.__poster_cache.lookup(*key)
+            if found:
+                posters[key] = poster_from_details(details)
+            else:
+                futures[key] = self.submit(key)
+
+        if futures:
+            done, not_done = wait(futures.values(), timeout=deadline)
+            if not_done:
+                with self.__lock:
+                    self.__timeouts += len(not_done)
+            for key, future in futures.items():
+                posters[key] = self.__result(future) if future in done else None
+
+        return posters
+
+    def submit(self, key):
+        """ Starts fetching the details of (title, year) unless a fetch for it is already running. """
+        with self.__lock:
+            future = self.__in_flight.get(key)
+            if future is not None:
+                return future
+            future = self.__executor.submit(self.__poster_cache.get, *key)
+            self.__in_flight[key] = future
+
+        # Registered outside the lock: the callback runs immediately if the fetch has already finished.
+        future.add_done_callback(lambda f: self.__finished(key, f))
+        return future
+
+    def shutdown(self, wait_for_fetches: bool = True):
+        self.__executor.shutdown(wait=wait_for_fetches)
+
+    def __finished(self, key, future):
+        with self.__lock:
+            if self.__in_flight.get(key) is future:
+                del self.__in_flight[key]
+
+    @staticmethod
+    def __result(future):
+        try:
+            return poster_from_details(future.result())
+        except OMDbException:
+            return None
+        except Exception:
+            # Any other failure of a fetch costs the movie its poster, not the page.
+            logger.exception('Poster lookup failed')
+            return None
+
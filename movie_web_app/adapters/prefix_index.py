@@ -0,0 +1,120 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, List
+
+from movie_web_app.adapters.fuzzy_index import kind_names
+from movie_web_app.adapters.search_index import normalize
+
+# Prefixes matching more than this many keys have their completions precomputed; smaller ranges are ranked per lookup.
+PRECOMPUTED_RANGE = 64
+LAST_CHARACTER = '\U0010ffff'
+
+
+class PrefixIndex:
+    """ A sorted-array prefix index over movie titles, actor, director and genre names for autocompletion.
+
+    Every name is indexed under its normalised form and under each of its later words, so "pra" completes
+    "Chris Pratt". Names are numbered from most to least popular (the number of movies they appear in, then the
+    order they were first added in), so the best completions of a prefix are the smallest numbers in its range of
+    the sorted keys. The top completions of every prefix with a large range are computed when the index is built,
+    and a lookup never looks at more than PRECOMPUTED_RANGE keys.
+
+    Names can be added at any time; build() builds the arrays, and the first lookup after a change rebuilds them.
+    """
+
+    def __init__(self, max_completions: int = 10):
+        self.__max_completions = max_completions
+        self.__entries: Dict[str, list] = dict()
+        self.__version = 0
+        self.__index = None
+
+    @property
+    def size(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def max_completions(self) -> int:
+        return self.__max_completions
+
+    def add_name(self, name: str, kind: int):
+        name = name.strip()
+        key = normalize(name)
+        if not key:
+            return
+
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.__entries[key] = [name, kind, 1, len(self.__entries)]
+        else:
+            entry[1] |= kind
+            entry[2] += 1
+        self.__version += 1
+
+    def complete(self, prefix: str, limit: int = 10):
+        """ Returns up to `limit` (name, kinds) tuples for the names with a word starting with prefix, most popular
+        first. limit may not exceed max_completions; kinds lists which of 'title', 'actor', 'director' and 'genre'
+        the name is used as.
+        """
+        key = normalize(prefix)
+        if not key:
+            return []
+        limit = min(limit, self.__max_completions)
+
+        _, keys, name_ids, top_completions, names, kinds = self.build()
+
+        completions = top_completions.get(key)
+        if completions is None:
+            lo = bisect_left(keys, key)
+            hi = bisect_left(keys, key + LAST_CHARACTER, lo)
+            completions = heapq.nsmallest(limit, set(name_ids[lo:hi]))
+        return [(names[name_id], kind_names(kinds[name_id])) for name_id in completions[:limit]]
+
+    def build(self):
+        """ Builds the arrays over the names added so far, unless they are already, and returns them. """
+        index = self.__index
+        if index is None or index[0] != self.__version:
+            index = self.__index = self.__build()
+        return index
+
+    def __build(self):
+        # Built into locals and returned as one tuple, so a concurrent lookup sees either the old or the new index.
+        # The tuple carries the version it was built from, so a name added during the build triggers another one.
+        version = self.__version
+        entries = sorted(list(self.__entries.items()), key=lambda item: (-item[1][2], item[1][3]))
+        names = [entry[0] for _, entry in entries]
+        kinds = array('B', (entry[1] for _, entry in entries))
+
+        keyed = list()
+        for name_id, (key, _) in enumerate(entries):
+            keyed.extend((suffix, name_id) for suffix in word_suffixes(key))
+        keyed.sort()
+        keys = [key for key, _ in keyed]
+        name_ids = array('i', (name_id for _, name_id in keyed))
+
+        top_completions = dict()
+        ranges = [('', 0, len(keys))]
+        while ranges:
+            prefix, lo, hi = ranges.pop()
+            if hi - lo <= PRECOMPUTED_RANGE:
+                continue
+            if prefix:
+                top_completions[prefix] = heapq.nsmallest(self.__max_completions, set(name_ids[lo:hi]))
+
+            # Split the range by the character following the prefix; a key equal to the prefix sorts first.
+            position = lo
+            while position < hi and len(keys[position]) == len(prefix):
+                position += 1
+            while position < hi:
+                child = prefix + keys[position][len(prefix)]
+                end = bisect_left(keys, child + LAST_CHARACTER, position, hi)
+                ranges.append((child, position, end))
+                position = end
+
+        return version, keys, name_ids, top_completions, names, kinds
+
+
+def word_suffixes(key: str) -> List[str]:
+    # The keys a normalised name is indexed under: the name itself and each suffix starting at one of its words.
+    words = key.split(' ')
+    return [' '.join(words[i:]) for i in range(len(words))]
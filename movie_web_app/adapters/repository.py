@@ -16,19 +16,28 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def add_user(self, user: User):
-        """" Adds a User to the repository. """
+        """" Adds a User to the repository.
+
+        Raises RepositoryException if there already is a User with the same user name.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
     def get_user(self, username) -> User:
-        """ Returns the User named username from the repository.
+        """ Returns the User named username from the repository, ignoring case and surrounding whitespace as User does.
 
         If there is no User with the given username, this method returns None.
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def update_user_password(self, user: User, password: str):
+        """ Replaces the stored password (or password hash) of user. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_all_users(self):
+        """ Returns a list of the Users in the order they were added. """
         raise NotImplementedError
 
 
@@ -59,6 +68,12 @@ class AbstractRepository(abc.ABC):
     def all_movies(self):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_catalog_version(self):
+        """Returns a number that changes whenever a Movie, rank, release year, actor, director or genre is added, so
+        data derived from the catalog can be cached until it changes."""
+        raise NotImplementedError
+
     #@abc.abstractmethod
     ##def add_movie_details(self, movie, details):
         raise NotImplementedError
@@ -111,6 +126,69 @@ class AbstractRepository(abc.ABC):
     def get_movie_with_given_genre(self, genre):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def filter_movies(self, ranges=None, order_by=None, descending=False, limit=None):
+        """Returns (ranks, total) for the Movies whose numeric attributes (release_year, runtime_minutes, rating,
+        votes, revenue, metascore) lie within ranges, a dict of attribute -> (low, high), inclusive, with None for an
+        open end.
+
+        ranks holds the ranks of the first `limit` Movies, ordered by the attribute order_by (Movies without a value
+        last, ties by rank) or else by rank; total is the number of matching Movies. Raises ValueError for an
+        unknown attribute."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def aggregate_movies(self, attribute, ranges=None):
+        """Returns a dict of the count, min, max, mean and sum of a numeric attribute over the Movies with
+        attributes within ranges, as for filter_movies, leaving out Movies without a value for it."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def select_movies(self, all_of=(), any_of=(), none_of=()):
+        """Returns the ranks, in order, of the Movies matching every term of all_of, at least one term of any_of
+        (unless it is empty) and no term of none_of. A term is a (facet, value) pair, the facet being one of 'genre',
+        'year', 'director' and 'actor', e.g. select_movies([('genre', 'Action')], none_of=[('year', 2016)]).
+
+        With neither all_of nor any_of, every Movie is a candidate. Raises ValueError for an unknown facet."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def browse_movies(self, genres=(), director=None, actor=None, ranges=None, limit=None):
+        """Returns (ranks, total, facets) for the Movies with every one of genres, with the given director and
+        actor (unless None), and with attributes within ranges, as for filter_movies.
+
+        ranks holds the ranks of the first `limit` Movies, in order of rank; total is the number of matching Movies.
+        facets counts the matching Movies by genre, release year and director, as {'genres': [(genre, count)],
+        'release_years': [(year, count)], 'directors': [(director, count)]}: genres and the ten most common
+        directors most common first, years in order. An unknown genre, director or actor matches no Movies."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def search_movies(self, query, limit=None):
+        """Returns (ranks, total) for the Movies whose title, release year, description, director, actors or genres
+        contain every word of query.
+
+        ranks holds the ranks of the best `limit` matches, most relevant first; total is the number of matching
+        Movies. If no Movie matches, this method returns ([], 0)."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_similar_names(self, query, max_distance=2, limit=5):
+        """Returns up to `limit` (name, distance, kinds) tuples for the movie titles, actor names and director names
+        within edit distance max_distance of query, closest first.
+
+        kinds lists which of 'title', 'actor' and 'director' the name is used as. Returns an empty list if no name
+        is close enough."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_completions(self, prefix, limit=10):
+        """Returns up to `limit` (name, kinds) tuples for the movie titles, actor, director and genre names with a
+        word starting with prefix, the names appearing in the most Movies first.
+
+        kinds lists which of 'title', 'actor', 'director' and 'genre' the name is used as."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_review(self, review: Review):
         """Adds a Review to the repository."""
@@ -139,3 +217,15 @@ class AbstractRepository(abc.ABC):
     @abc.abstractmethod
     def get_user_watch_list(self, user):
         raise NotImplementedError
+
+    def build_indexes(self):
+        """ Builds the search indexes over the movies added so far, which would otherwise be built by the first
+        lookup needing them.
+        """
+        pass
+
+    def get_memory_roots(self):
+        """ Returns the structures the repository keeps in memory, as lists of objects by subsystem: 'movies',
+        'facet indexes', 'search indexes', 'users', 'reviews' and 'watch lists', for memory reports.
+        """
+        return dict()
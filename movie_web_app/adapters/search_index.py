@@ -0,0 +1,239 @@
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, List
+
+from movie_web_app.domain.model import Movie
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Searchable fields with their BM25F boost and length normalisation. Only free-text fields are normalised by length;
+# a long cast list does not make a movie any less about one of its actors.
+FIELDS = ('title', 'release_year', 'description', 'director', 'actors', 'genres')
+FIELD_BOOSTS = (3.0, 1.0, 1.0, 2.0, 2.0, 1.5)
+FIELD_LENGTH_NORMALISATION = (0.75, 0.0, 0.75, 0.0, 0.0, 0.0)
+TITLE, DESCRIPTION = FIELDS.index('title'), FIELDS.index('description')
+
+# Per-field term frequencies of a posting are packed into one int, 4 bits per field.
+TF_BITS = 4
+TF_MAX = (1 << TF_BITS) - 1
+LENGTH_NORMALISED_MASK = sum(TF_MAX << (field * TF_BITS)
+                             for field, b in enumerate(FIELD_LENGTH_NORMALISATION) if b > 0)
+K1 = 1.2
+
+
+def tokenize(text) -> List[str]:
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def normalize(text) -> str:
+    return ' '.join(tokenize(text))
+
+
+def movie_fields(movie: Movie):
+    # Yields (field index, text) for every searchable value of a movie.
+    yield FIELDS.index('title'), movie.title
+    yield FIELDS.index('release_year'), movie.release_year
+    yield FIELDS.index('description'), movie.description
+    if movie.director is not None:
+        yield FIELDS.index('director'), movie.director.director_full_name
+    for actor in movie.actors:
+        yield FIELDS.index('actors'), actor.actor_full_name
+    for genre in movie.genres:
+        yield FIELDS.index('genres'), genre.genre_name
+
+
+def intersect(shorter, longer) -> List[int]:
+    # Both sequences are sorted. Each element of the shorter one is looked up in the longer one by binary search,
+    # starting from the previous match, so the cost is O(len(shorter) * log(len(longer))).
+    result = list()
+    lo = 0
+    for rank in shorter:
+        lo = bisect_left(longer, rank, lo)
+        if lo == len(longer):
+            break
+        if longer[lo] == rank:
+            result.append(rank)
+    return result
+
+
+def candidate_postings(ranks, frequencies, candidates):
+    # Yields (rank, packed frequencies) from a token's posting for each candidate, all of which are in the posting.
+    lo = 0
+    for rank in candidates:
+        lo = bisect_left(ranks, rank, lo)
+        yield rank, frequencies[lo]
+
+
+class SearchIndex:
+    """ An inverted index from tokens to the sorted ranks of the movies containing them, scored with BM25F.
+
+    Each token maps to two parallel arrays: the sorted ranks of the movies containing it, and the token's packed
+    per-field term frequencies in each of those movies. Next to the token postings the index keeps postings for
+    whole field values (a full title, director, actor, genre or release year); movies with a field equal to the
+    whole query are listed ahead of the rest.
+    """
+
+    def __init__(self):
+        self.__token_postings: Dict[str, tuple] = dict()
+        self.__value_postings: Dict[str, List[int]] = dict()
+        self.__title_lengths: Dict[int, int] = dict()
+        self.__description_lengths: Dict[int, int] = dict()
+        self.__total_title_length = 0
+        self.__total_description_length = 0
+        self.__size = 0
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def add_movie(self, movie: Movie):
+        frequencies = dict()
+        values = set()
+        lengths = [0] * len(FIELDS)
+        for field, text in movie_fields(movie):
+            tokens = tokenize(text)
+            lengths[field] += len(tokens)
+            for token in tokens:
+                field_frequencies = frequencies.setdefault(token, [0] * len(FIELDS))
+                field_frequencies[field] += 1
+            values.add(normalize(text))
+        values.discard('')
+
+        rank = movie.rank
+        for token, field_frequencies in frequencies.items():
+            self.__add_token_posting(token, rank, pack(field_frequencies))
+        for value in values:
+            self.__add_value_posting(value, rank)
+
+        self.__title_lengths[rank] = lengths[TITLE]
+        self.__description_lengths[rank] = lengths[DESCRIPTION]
+        self.__total_title_length += lengths[TITLE]
+        self.__total_description_length += lengths[DESCRIPTION]
+        self.__size += 1
+
+    def postings(self, token: str):
+        posting = self.__token_postings.get(token)
+        return posting[0] if posting is not None else []
+
+    def search(self, query, limit: int = None):
+        """ Returns (ranks, total) for the movies matching every word of query.
+
+        ranks holds the best `limit` matches (all of them if limit is None), best first: movies with a field equal
+        to the whole query, then by descending BM25F score, then by rank. total is the number of matching movies.
+        Only the top `limit` candidates are ever ordered, through a heap.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return [], 0
+
+        posting_lists = sorted((self.postings(token) for token in tokens), key=len)
+        candidates = posting_lists[0]
+        for posting_list in posting_lists[1:]:
+            if not candidates:
+                break
+            candidates = intersect(candidates, posting_list)
+        if not candidates:
+            return [], 0
+
+        scores = self.__score(tokens, candidates)
+
+        # Exact field matches get a bonus larger than any BM25F score, so they come first but keep their order.
+        # Ties keep candidate order, i.e. rank order, as nlargest and sorted are stable.
+        exact_match_bonus = sum(self.__idf(token) for token in tokens) + 1.0
+        for rank in self.__value_postings.get(normalize(query), []):
+            if rank in scores:
+                scores[rank] += exact_match_bonus
+
+        if limit is None or limit >= len(candidates):
+            ranks = sorted(candidates, key=scores.__getitem__, reverse=True)
+        else:
+            ranks = heapq.nlargest(limit, candidates, key=scores.__getitem__)
+        return ranks, len(candidates)
+
+    def __idf(self, token):
+        document_frequency = len(self.postings(token))
+        return math.log(1 + (self.__size - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def __score(self, tokens, candidates):
+        average_title_length = self.__total_title_length / self.__size or 1.0
+        average_description_length = self.__total_description_length / self.__size or 1.0
+        title_lengths = self.__title_lengths
+        description_lengths = self.__description_lengths
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for token in tokens:
+            ranks, frequencies = self.__token_postings[token]
+            idf = self.__idf(token)
+
+            if len(ranks) == len(candidates):
+                # The candidates are this token's whole posting list.
+                postings = zip(ranks, frequencies)
+            else:
+                postings = candidate_postings(ranks, frequencies, candidates)
+
+            # Many candidates share the same frequencies and field lengths, so each contribution is computed once.
+            contributions = dict()
+            for rank, packed in postings:
+                if packed & LENGTH_NORMALISED_MASK:
+                    key = (packed, title_lengths[rank], description_lengths[rank])
+                else:
+                    key = packed
+                contribution = contributions.get(key)
+                if contribution is None:
+                    weighted_frequency = 0.0
+                    for field in range(len(FIELDS)):
+                        frequency = (packed >> (field * TF_BITS)) & TF_MAX
+                        if frequency == 0:
+                            continue
+                        b = FIELD_LENGTH_NORMALISATION[field]
+                        if b > 0:
+                            if field == TITLE:
+                                length_ratio = title_lengths[rank] / average_title_length
+                            else:
+                                length_ratio = description_lengths[rank] / average_description_length
+                            frequency = frequency / (1 - b + b * length_ratio)
+                        weighted_frequency += FIELD_BOOSTS[field] * frequency
+                    contribution = idf * weighted_frequency / (K1 + weighted_frequency)
+                    contributions[key] = contribution
+                scores[rank] += contribution
+        return scores
+
+    def __add_token_posting(self, token, rank, packed_frequencies):
+        posting = self.__token_postings.get(token)
+        if posting is None:
+            self.__token_postings[token] = (array('i', [rank]), array('I', [packed_frequencies]))
+            return
+
+        ranks, frequencies = posting
+        if ranks[-1] < rank:
+            ranks.append(rank)
+            frequencies.append(packed_frequencies)
+        else:
+            # A movie added out of rank order is inserted in place, so the posting stays sorted.
+            index = bisect_left(ranks, rank)
+            if ranks[index] == rank:
+                frequencies[index] = packed_frequencies
+            else:
+                ranks.insert(index, rank)
+                frequencies.insert(index, packed_frequencies)
+
+    def __add_value_posting(self, value, rank):
+        posting_list = self.__value_postings.get(value)
+        if posting_list is None:
+            self.__value_postings[value] = [rank]
+        elif posting_list[-1] < rank:
+            posting_list.append(rank)
+        else:
+            index = bisect_left(posting_list, rank)
+            if posting_list[index] != rank:
+                posting_list.insert(index, rank)
+
+
+def pack(field_frequencies) -> int:
+    packed = 0
+    for field, frequency in enumerate(field_frequencies):
+        packed |= min(frequency, TF_MAX) << (field * TF_BITS)
+    return packed
@@ -0,0 +1,154 @@
+import io
+import json
+import mmap
+import os
+import pickle
+import struct
+import zlib
+
+from movie_web_app.adapters.passwords import PLAINTEXT_PREFIX
+from movie_web_app.domain.model import User
+
+# A snapshot file is a fixed preamble (magic, format version, header length), a JSON header, then the pickled
+# repository state. The header records the CSV files the state was built from and a CRC-32 of the payload.
+# The payload is the repository's attributes as they are, so the format version goes up whenever they change.
+# The header also records the settings the search indexes were built with, as a repository set up with other
+# settings cannot use them. A snapshot written by journal compaction also records the generation and size of the
+# journal it includes.
+# Plaintext passwords from user.csv are left out of the payload: their users are restored without a password, which
+# is read from user.csv again (a snapshot is only used while user.csv is unchanged).
+MAGIC = b'MOVIESNP'
+FORMAT_VERSION = 9
+PREAMBLE = struct.Struct('>8sHI')
+SOURCE_FILES = ('Data1000Movies.csv', 'user.csv')
+
+
+class SnapshotException(Exception):
+    pass
+
+
+class SnapshotPickler(pickle.Pickler):
+    # Pickles Users whose password is still plaintext without it.
+
+    PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+    def reducer_override(self, obj):
+        if type(obj) is not User or obj.password is None or not obj.password.startswith(PLAINTEXT_PREFIX):
+            return NotImplemented
+        reconstruct, arguments, (_, slots) = obj.__reduce_ex__(self.PROTOCOL)[:3]
+        slots = dict(slots)
+        slots['_User__password'] = None
+        return reconstruct, arguments, (None, slots)
+
+
+def source_fingerprints(data_path: str):
+    # Size and modification time of each source file; a snapshot is only used while they are unchanged.
+    fingerprints = dict()
+    for filename in SOURCE_FILES:
+        status = os.stat(os.path.join(data_path, filename))
+        fingerprints[filename] = [status.st_size, status.st_mtime_ns]
+    return fingerprints
+
+
+def write_snapshot(repo, path: str, data_path: str, journal=None):
+    """ Writes the state of a populated repository to path, recording the source files under data_path and the
+    (generation, size) of the journal the state includes, if any.
+
+    The file is written next to path and renamed into place, so a running app never reads a partial snapshot.
+    Returns the number of bytes written.
+    """
+    buffer = io.BytesIO()
+    SnapshotPickler(buffer, protocol=SnapshotPickler.PROTOCOL).dump(repo.__getstate__())
+    payload = buffer.getvalue()
+    header = {
+        'repository': type(repo).__name__,
+        'indexes': repo.index_settings,
+        'sources': source_fingerprints(data_path),
+        'payload_length': len(payload),
+        'crc32': zlib.crc32(payload),
+    }
+    if journal is not None:
+        header['journal'] = list(journal)
+    header = json.dumps(header).encode('utf-8')
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        snapshot_file.write(header)
+        snapshot_file.write(payload)
+        # Compaction discards the journal once the snapshot is written, so it must be on disk first.
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+    return PREAMBLE.size + len(header) + len(payload)
+
+
+def read_snapshot(path: str, data_path: str):
+    """ Returns (header, state) for the snapshot at path, state being the attributes of the snapshotted repository.
+
+    The file is memory-mapped, so the checksum and unpickling read the page cache directly rather than a copy.
+    Raises SnapshotException if the file is not a snapshot of this format version, is corrupt, or was built from
+    source files under data_path that have changed since.
+    """
+    with open(path, 'rb') as snapshot_file:
+        if os.fstat(snapshot_file.fileno()).st_size < PREAMBLE.size:
+            raise SnapshotException('{} is too short to be a snapshot'.format(path))
+        with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            header_length = unpack_preamble(mapped[:PREAMBLE.size], path)
+            header = decode_header(mapped[PREAMBLE.size:PREAMBLE.size + header_length], path)
+            if header['sources'] != source_fingerprints(data_path):
+                raise SnapshotException('{} was built from other versions of the files in {}'.format(path, data_path))
+
+            start = PREAMBLE.size + header_length
+            with memoryview(mapped) as view:
+                payload = view[start:]
+                try:
+                    if len(payload) != header['payload_length'] or zlib.crc32(payload) != header['crc32']:
+                        raise SnapshotException('{} is corrupt'.format(path))
+                    return header, pickle.loads(payload)
+                finally:
+                    payload.release()
+
+
+def read_header(path: str):
+    """ Returns the header of the snapshot at path, without reading its payload or checking its source files. Raises
+    SnapshotException if the file is not a snapshot of this format version.
+    """
+    with open(path, 'rb') as snapshot_file:
+        preamble = snapshot_file.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            raise SnapshotException('{} is too short to be a snapshot'.format(path))
+        header_length = unpack_preamble(preamble, path)
+        return decode_header(snapshot_file.read(header_length), path)
+
+
+def unpack_preamble(preamble, path: str) -> int:
+    # Returns the length of the header that follows.
+    magic, format_version, header_length = PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise SnapshotException('{} is not a snapshot'.format(path))
+    if format_version != FORMAT_VERSION:
+        raise SnapshotException('{} has format version {}, expected {}'.format(path, format_version, FORMAT_VERSION))
+    return header_length
+
+
+def decode_header(data, path: str):
+    try:
+        return json.loads(bytes(data).decode('utf-8'))
+    except ValueError:
+        raise SnapshotException('{} has a corrupt header'.format(path))
+
+
+def restore_snapshot(repo, path: str, data_path: str):
+    """ Replaces the state of repo with the snapshot at path, and returns the snapshot's header. Raises
+    SnapshotException as read_snapshot does.
+    """
+    header, state = read_snapshot(path, data_path)
+    if header.get('repository') != type(repo).__name__:
+        raise SnapshotException('{} holds a {}, not a {}'.format(path, header.get('repository'), type(repo).__name__))
+    if header.get('indexes') != repo.index_settings:
+        raise SnapshotException('{} has indexes built with {}, not {}'.format(path, header.get('indexes'),
+                                                                             repo.index_settings))
+    vars(repo).clear()
+    repo.__setstate__(state)
+    return header
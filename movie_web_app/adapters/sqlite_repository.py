@@ -0,0 +1,581 @@
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+
+from movie_web_app.adapters.repository import AbstractRepository, RepositoryException
+from movie_web_app.adapters.ingestion import MovieIngestion
+from movie_web_app.adapters.memory_repository import read_csv_file
+from movie_web_app.adapters.movie_indexes import MovieIndexes, intersect
+from movie_web_app.adapters.passwords import hash_passwords, is_password_hash
+from movie_web_app.domain.model import Movie, User, Review, WatchList
+from movie_web_app.domain.registry import EntityRegistry
+
+logger = logging.getLogger(__name__)
+
+# Every lookup the repository makes has an index: movies by rank, year, director and title, the movies of an actor
+# or genre, users by name, and the reviews, watched movies and watch list of a movie or user.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    rank INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    release_year INTEGER,
+    description TEXT NOT NULL DEFAULT '',
+    director TEXT,
+    runtime_minutes INTEGER NOT NULL DEFAULT 0,
+    rating REAL,
+    votes INTEGER,
+    revenue REAL,
+    metascore INTEGER
+);
+CREATE INDEX IF NOT EXISTS movies_by_release_year ON movies (release_year, rank);
+CREATE INDEX IF NOT EXISTS movies_by_director ON movies (director, rank);
+CREATE INDEX IF NOT EXISTS movies_by_title ON movies (title, release_year);
+
+CREATE TABLE IF NOT EXISTS movie_actors (
+    rank INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    actor TEXT NOT NULL,
+    PRIMARY KEY (rank, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_actors_by_actor ON movie_actors (actor, rank);
+
+CREATE TABLE IF NOT EXISTS movie_genres (
+    rank INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    PRIMARY KEY (rank, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_genres_by_genre ON movie_genres (genre, rank);
+
+CREATE TABLE IF NOT EXISTS release_years (
+    release_year INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    movie_rank INTEGER NOT NULL,
+    review_text TEXT NOT NULL,
+    rating INTEGER,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_movie ON reviews (movie_rank, id);
+CREATE INDEX IF NOT EXISTS reviews_by_user ON reviews (user_name, id);
+
+CREATE TABLE IF NOT EXISTS watched_movies (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    release_year INTEGER,
+    runtime_minutes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS watched_movies_by_user ON watched_movies (user_name, id);
+
+CREATE TABLE IF NOT EXISTS watch_lists (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    release_year INTEGER,
+    UNIQUE (user_name, title, release_year)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('catalog_version', 0);
+"""
+
+MOVIE_COLUMNS = 'rank, title, release_year, description, director, runtime_minutes, rating, votes, revenue, metascore'
+
+# Ranks passed to one IN (...) clause; well below SQLite's limit on bound parameters.
+RANKS_PER_QUERY = 500
+
+# The ranks of the movies with a given genre, release year, director or actor, for select_movies and browse_movies.
+FACET_RANKS = {
+    'genre': 'SELECT rank FROM movie_genres WHERE genre = ?',
+    'year': 'SELECT rank FROM movies WHERE release_year = ?',
+    'director': 'SELECT rank FROM movies WHERE director = ?',
+    'actor': 'SELECT rank FROM movie_actors WHERE actor = ?',
+}
+
+
+class SqliteRepository(AbstractRepository):
+    """ A repository stored in an SQLite database, so the data outlives the process and can be shared by workers.
+
+    Each thread keeps its own connection. The database is in WAL mode, so readers are not blocked by a writer.
+    Movies are read into new Movie objects on every call, with their reviews. A User is one object for as long as
+    it is referenced, so a lookup returns the User that was added or looked up before rather than a copy of it.
+    The full-text, typo-tolerant and prefix indexes are built in memory from the database, and rebuilt when
+    another connection has changed the catalog since.
+    """
+
+    def __init__(self, path: str, max_edit_distance: int = 2, max_completions: int = 10):
+        self.__path = path
+        self.__max_edit_distance = max_edit_distance
+        self.__max_completions = max_completions
+        self.__local = threading.local()
+        self.__users = weakref.WeakValueDictionary()
+        self.__lock = threading.RLock()
+        self.__indexes = None
+        self.__indexed_version = None
+        self.__registry = EntityRegistry()
+        self.__connection().executescript(SCHEMA)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def registry(self) -> EntityRegistry:
+        """ The actors, directors and genres of the movies read, shared by all of them. """
+        return self.__registry
+
+    def __connection(self):
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            # Transactions are started explicitly by __transaction.
+            connection = sqlite3.connect(self.__path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.__local.connection = connection
+        return connection
+
+    @contextmanager
+    def __transaction(self):
+        connection = self.__connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def close(self):
+        """ Closes the calling thread's connection. """
+        connection = getattr(self.__local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.__local.connection = None
+
+    def get_memory_roots(self):
+        # The catalog is on disk; what stays in memory is the interned entities, the indexes built from the catalog
+        # and the users loaded so far.
+        return {
+            'movies': [self.__registry],
+            'search indexes': [self.__indexes],
+            'users': list(self.__users.values()),
+        }
+
+    def is_empty(self) -> bool:
+        row = self.__connection().execute('SELECT EXISTS (SELECT 1 FROM movies) OR EXISTS (SELECT 1 FROM users)')
+        return not row.fetchone()[0]
+
+    # ---------------------------------------------------------------- users
+
+    def add_user(self, user: User):
+        try:
+            with self.__transaction() as connection:
+                connection.execute('INSERT INTO users (user_name, password) VALUES (?, ?)',
+                                   (user.user_name, user.password))
+                connection.executemany(
+                    'INSERT INTO watched_movies (user_name, title, release_year, runtime_minutes) VALUES (?, ?, ?, ?)',
+                    [(user.user_name, movie.title, movie.release_year, movie.runtime_minutes)
+                     for movie in user.watched_movies])
+        except sqlite3.IntegrityError:
+            raise RepositoryException('User name {} is already taken'.format(user.user_name))
+        with self.__lock:
+            self.__users[user.user_name] = user
+
+    def add_users(self, users):
+        """ Adds Users in one transaction. Raises RepositoryException, and adds none, if a user name is taken. """
+        users = list(users)
+        try:
+            with self.__transaction() as connection:
+                connection.executemany('INSERT INTO users (user_name, password) VALUES (?, ?)',
+                                       [(user.user_name, user.password) for user in users])
+        except sqlite3.IntegrityError:
+            raise RepositoryException('A user name is already taken')
+        with self.__lock:
+            for user in users:
+                self.__users[user.user_name] = user
+
+    def get_user(self, username) -> User:
+        row = self.__connection().execute(
+            'SELECT user_name, password FROM users WHERE user_name = ?', (username.lower().strip(),)).fetchone()
+        return None if row is None else self.__users_from_rows([row])[row[0]]
+
+    def get_all_users(self):
+        rows = self.__connection().execute('SELECT user_name, password FROM users ORDER BY id').fetchall()
+        users = self.__users_from_rows(rows)
+        return [users[user_name] for user_name, _ in rows]
+
+    def update_user_password(self, user: User, password: str):
+        with self.__transaction() as connection:
+            connection.execute('UPDATE users SET password = ? WHERE user_name = ?', (password, user.user_name))
+        user.password = password
+
+    def __users_named(self, user_names):
+        # Returns the users with user_names, by name, reading RANKS_PER_QUERY of them per query.
+        user_names = list(set(user_names))
+        users = dict()
+        for start in range(0, len(user_names), RANKS_PER_QUERY):
+            names = user_names[start:start + RANKS_PER_QUERY]
+            rows = self.__connection().execute(
+                'SELECT user_name, password FROM users WHERE user_name IN ({})'.format(', '.join('?' * len(names))),
+                names).fetchall()
+            users.update(self.__users_from_rows(rows))
+        return users
+
+    def __users_from_rows(self, rows):
+        # Returns the users of (user_name, password) rows, by name. The users not already in memory get their watched
+        # movies from one query per RANKS_PER_QUERY users.
+        with self.__lock:
+            users = dict()
+            new_users = dict()
+            for user_name, password in rows:
+                user = self.__users.get(user_name)
+                if user is None:
+                    user = new_users[user_name] = User(user_name, password)
+                else:
+                    # Another worker may have changed it, e.g. hashed a plaintext password on login.
+                    user.password = password
+                users[user_name] = user
+
+            names = list(new_users)
+            for start in range(0, len(names), RANKS_PER_QUERY):
+                batch = names[start:start + RANKS_PER_QUERY]
+                watched = self.__connection().execute(
+                    'SELECT user_name, title, release_year, runtime_minutes FROM watched_movies '
+                    'WHERE user_name IN ({}) ORDER BY id'.format(', '.join('?' * len(batch))), batch)
+                for user_name, title, release_year, runtime_minutes in watched:
+                    new_users[user_name].watch_movie(
+                        movie_from_columns(title, release_year, runtime_minutes=runtime_minutes))
+            self.__users.update(new_users)
+            return users
+
+    # ---------------------------------------------------------------- movies
+
+    def add_movie(self, movie: Movie):
+        with self.__transaction() as connection:
+            self.__insert_movies(connection, [(movie.rank, movie)])
+            self.__bump_catalog_version(connection, [movie])
+
+    def add_movies(self, movies):
+        """ Adds Movies, with their ranks and release years, in one transaction. """
+        movies = list(movies)
+        with self.__transaction() as connection:
+            self.__insert_movies(connection, [(movie.rank, movie) for movie in movies])
+            connection.executemany('INSERT OR IGNORE INTO release_years (release_year) VALUES (?)',
+                                   [(movie.release_year,) for movie in movies])
+            self.__bump_catalog_version(connection, movies)
+
+    def add_movie_rank(self, rank, movie):
+        with self.__transaction() as connection:
+            exists = connection.execute('SELECT 1 FROM movies WHERE rank = ?', (rank,)).fetchone()
+            if exists is None:
+                self.__insert_movies(connection, [(rank, movie)])
+            self.__bump_catalog_version(connection, [movie] if exists is None else [])
+
+    def add_release_year(self, year):
+        with self.__transaction() as connection:
+            connection.execute('INSERT OR IGNORE INTO release_years (release_year) VALUES (?)', (year,))
+            self.__bump_catalog_version(connection, [])
+
+    def get_movie(self, rank: int):
+        movies = self.__movies('WHERE rank = ?', (rank,))
+        return movies[0] if movies else None
+
+    def get_movies_by_rank(self, rank_list):
+        rank_list = list(rank_list)
+        movies = dict()
+        for start in range(0, len(rank_list), RANKS_PER_QUERY):
+            ranks = rank_list[start:start + RANKS_PER_QUERY]
+            where = 'WHERE rank IN ({})'.format(', '.join('?' * len(ranks)))
+            movies.update((movie.rank, movie) for movie in self.__movies(where, ranks))
+        return [movies[rank] for rank in rank_list]
+
+    def get_number_of_movies(self):
+        return self.__connection().execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+
+    def all_movies(self):
+        return self.__movies()
+
+    def get_catalog_version(self):
+        return self.__catalog_version(self.__connection())
+
+    def get_first_movie(self):
+        return self.get_movie(1)
+
+    def get_last_movie(self):
+        rank = self.__connection().execute('SELECT MAX(rank) FROM movies').fetchone()[0]
+        return None if rank is None else self.get_movie(rank)
+
+    def get_year_list(self):
+        rows = self.__connection().execute('SELECT release_year FROM release_years ORDER BY release_year')
+        return [year for year, in rows]
+
+    def get_genre_list(self):
+        rows = self.__connection().execute('SELECT DISTINCT genre FROM movie_genres ORDER BY genre')
+        return [genre for genre, in rows]
+
+    def get_movie_with_given_year(self, year):
+        return self.__ranks(
+            'SELECT rank FROM movies WHERE release_year = ?'
+            ' AND release_year IN (SELECT release_year FROM release_years) ORDER BY rank', year, required=False)
+
+    def get_movie_with_given_actor(self, actor):
+        return self.__ranks('SELECT rank FROM movie_actors WHERE actor = ? ORDER BY rank', actor)
+
+    def get_movie_with_given_director(self, director):
+        return self.__ranks('SELECT rank FROM movies WHERE director = ? ORDER BY rank', director)
+
+    def get_movie_with_given_genre(self, genre):
+        return self.__ranks('SELECT rank FROM movie_genres WHERE genre = ? ORDER BY rank', genre)
+
+    def filter_movies(self, ranges=None, order_by=None, descending=False, limit=None):
+        return self.__movie_indexes().filter(ranges, order_by, descending, limit)
+
+    def aggregate_movies(self, attribute, ranges=None):
+        return self.__movie_indexes().aggregate(attribute, ranges)
+
+    def browse_movies(self, genres=(), director=None, actor=None, ranges=None, limit=None):
+        terms = [('genre', genre) for genre in genres]
+        if director is not None:
+            terms.append(('director', director))
+        if actor is not None:
+            terms.append(('actor', actor))
+        candidates = None
+        if terms:
+            candidates = intersect([self.__ranks(FACET_RANKS[facet] + ' ORDER BY rank', value, required=False)
+                                    for facet, value in terms])
+        return self.__movie_indexes().browse(candidates, ranges, limit)
+
+    def select_movies(self, all_of=(), any_of=(), none_of=()):
+        all_of, any_of, none_of = list(all_of), list(any_of), list(none_of)
+        for facet, _ in all_of + any_of + none_of:
+            if facet not in FACET_RANKS:
+                raise ValueError('Unknown facet {!r}; expected one of {}'.format(facet, ', '.join(FACET_RANKS)))
+
+        # Compound SELECTs apply left to right: the intersection of all_of, then of any_of's union, less none_of's.
+        sql = ' INTERSECT '.join(FACET_RANKS[facet] for facet, _ in all_of) or 'SELECT rank FROM movies'
+        if any_of:
+            sql += ' INTERSECT SELECT rank FROM ({})'.format(' UNION '.join(FACET_RANKS[facet] for facet, _ in any_of))
+        if none_of:
+            sql += ' EXCEPT SELECT rank FROM ({})'.format(' UNION '.join(FACET_RANKS[facet] for facet, _ in none_of))
+        parameters = [value for _, value in all_of + any_of + none_of]
+        rows = self.__connection().execute('SELECT rank FROM ({}) ORDER BY rank'.format(sql), parameters)
+        return [rank for rank, in rows]
+
+    def search_movies(self, query, limit=None):
+        return self.__movie_indexes().search(query, limit)
+
+    def get_similar_names(self, query, max_distance=2, limit=5):
+        return self.__movie_indexes().similar_names(query, max_distance, limit)
+
+    def get_completions(self, prefix, limit=10):
+        return self.__movie_indexes().complete(prefix, limit)
+
+    def __ranks(self, sql, value, required=True):
+        # Like MemoryRepository, an unknown actor, director or genre is a KeyError and an unknown year has no movies.
+        ranks = [rank for rank, in self.__connection().execute(sql, (value,))]
+        if not ranks and required:
+            raise KeyError(value)
+        return ranks
+
+    def __insert_movies(self, connection, ranked_movies):
+        ranks = [(rank,) for rank, _ in ranked_movies]
+        connection.executemany('DELETE FROM movie_actors WHERE rank = ?', ranks)
+        connection.executemany('DELETE FROM movie_genres WHERE rank = ?', ranks)
+        connection.executemany(
+            'INSERT OR REPLACE INTO movies ({}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'.format(MOVIE_COLUMNS),
+            [(rank, movie.title, movie.release_year, movie.description,
+              movie.director.director_full_name if movie.director is not None else None, movie.runtime_minutes,
+              movie.rating, movie.votes, movie.revenue, movie.metascores) for rank, movie in ranked_movies])
+        connection.executemany(
+            'INSERT INTO movie_actors (rank, position, actor) VALUES (?, ?, ?)',
+            [(rank, position, actor.actor_full_name)
+             for rank, movie in ranked_movies for position, actor in enumerate(movie.actors)])
+        connection.executemany(
+            'INSERT INTO movie_genres (rank, position, genre) VALUES (?, ?, ?)',
+            [(rank, position, genre.genre_name)
+             for rank, movie in ranked_movies for position, genre in enumerate(movie.genres)])
+
+    def __movies(self, where='', parameters=()):
+        # Reads the movies matching where, with their actors, genres and reviews, in four queries.
+        connection = self.__connection()
+        rows = connection.execute('SELECT {} FROM movies {} ORDER BY rank'.format(MOVIE_COLUMNS, where), parameters)
+        movies = dict()
+        registry = self.__registry
+        for (rank, title, release_year, description, director, runtime_minutes, rating, votes, revenue,
+             metascore) in rows:
+            movies[rank] = movie_from_columns(title, release_year, rank, description,
+                                              registry.director(director) if director is not None else None,
+                                              runtime_minutes, rating, votes, revenue, metascore)
+        if not movies:
+            return []
+
+        selected = 'SELECT rank FROM movies {}'.format(where)
+        for row in connection.execute(
+                'SELECT rank, actor FROM movie_actors WHERE rank IN ({}) ORDER BY rank, position'.format(selected),
+                parameters):
+            movies[row[0]].add_actor(registry.actor(row[1]))
+        for row in connection.execute(
+                'SELECT rank, genre FROM movie_genres WHERE rank IN ({}) ORDER BY rank, position'.format(selected),
+                parameters):
+            movies[row[0]].add_genre(registry.genre(row[1]))
+        for review in self.__reviews(
+                'WHERE movie_rank IN ({})'.format(selected), parameters, movies.get):
+            review.movie.add_review(review)
+        return list(movies.values())
+
+    def build_indexes(self):
+        self.__movie_indexes()
+
+    def __movie_indexes(self):
+        version = self.get_catalog_version()
+        with self.__lock:
+            if self.__indexes is None or self.__indexed_version != version:
+                indexes = MovieIndexes(self.__max_edit_distance, self.__max_completions)
+                for movie in self.__movies():
+                    indexes.add_movie(movie)
+                indexes.build()
+                self.__indexes, self.__indexed_version = indexes, version
+            return self.__indexes
+
+    def __catalog_version(self, connection):
+        return connection.execute("SELECT value FROM meta WHERE key = 'catalog_version'").fetchone()[0]
+
+    def __bump_catalog_version(self, connection, added_movies):
+        connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'catalog_version'")
+        version = self.__catalog_version(connection)
+        # The in-memory indexes stay current if they were current before this change: add its movies to them.
+        with self.__lock:
+            if self.__indexes is not None and self.__indexed_version == version - 1:
+                for movie in added_movies:
+                    self.__indexes.add_movie(movie)
+                self.__indexed_version = version
+
+    # ---------------------------------------------------------------- reviews
+
+    def add_review(self, review: Review):
+        super().add_review(review)
+        with self.__transaction() as connection:
+            connection.execute(
+                'INSERT INTO reviews (user_name, movie_rank, review_text, rating, timestamp) VALUES (?, ?, ?, ?, ?)',
+                (review.user.user_name, review.movie.rank, review.review_text, review.rating,
+                 review.timestamp.isoformat()))
+
+    def get_review(self):
+        # Only the movies with reviews are read.
+        movies = {movie.rank: movie for movie in self.__movies('WHERE rank IN (SELECT movie_rank FROM reviews)')}
+        return self.__reviews('', (), movies.get)
+
+    def have_review(self, review):
+        # Looked up by the fields Review compares, with the movie by title and release year as Movie compares them.
+        row = self.__connection().execute(
+            'SELECT 1 FROM reviews AS r JOIN movies AS m ON m.rank = r.movie_rank'
+            ' WHERE r.user_name IS ? AND m.title = ? AND m.release_year IS ? AND r.review_text = ? AND r.rating IS ?'
+            ' AND r.timestamp = ? LIMIT 1',
+            (review.user.user_name if review.user is not None else None, review.movie.title,
+             review.movie.release_year, review.review_text, review.rating, review.timestamp.isoformat())).fetchone()
+        if row is not None:
+            return True
+
+    def __reviews(self, where, parameters, movie_of_rank):
+        rows = self.__connection().execute(
+            'SELECT user_name, movie_rank, review_text, rating, timestamp FROM reviews {} ORDER BY id'.format(where),
+            parameters).fetchall()
+        users = self.__users_named(row[0] for row in rows)
+        reviews = list()
+        for user_name, movie_rank, review_text, rating, timestamp in rows:
+            # A rating outside 1 to 10 was stored as NULL, and 0 makes Review store it as None again.
+            reviews.append(Review(users.get(user_name), movie_of_rank(movie_rank), review_text,
+                                  rating if rating is not None else 0, datetime.fromisoformat(timestamp)))
+        return reviews
+
+    # ---------------------------------------------------------------- watched movies and watch lists
+
+    def add_user_watched_movie(self, user, movie):
+        with self.__transaction() as connection:
+            connection.execute(
+                'INSERT INTO watched_movies (user_name, title, release_year, runtime_minutes) VALUES (?, ?, ?, ?)',
+                (user.user_name, movie.title, movie.release_year, movie.runtime_minutes))
+        user.watch_movie(movie)
+
+    def get_user_watched_movies(self, user):
+        return user.watched_movies
+
+    def add_user_watch_list(self, user, movie):
+        with self.__transaction() as connection:
+            connection.execute('INSERT OR IGNORE INTO watch_lists (user_name, title, release_year) VALUES (?, ?, ?)',
+                               (user.user_name, movie.title, movie.release_year))
+
+    def delete_movie_from_watch_list(self, user, movie):
+        with self.__transaction() as connection:
+            connection.execute('DELETE FROM watch_lists WHERE user_name = ? AND title = ? AND release_year IS ?',
+                               (user.user_name, movie.title, movie.release_year))
+
+    def get_user_watch_list(self, user):
+        # Movies in the catalog come back in full; others only with the title and release year they were saved with.
+        rows = self.__connection().execute(
+            'SELECT w.title, w.release_year, m.rank FROM watch_lists AS w'
+            ' LEFT JOIN movies AS m ON m.title = w.title AND m.release_year IS w.release_year'
+            ' WHERE w.user_name = ? ORDER BY w.id', (user.user_name,)).fetchall()
+        catalog = self.get_movies_by_rank(sorted({rank for _, _, rank in rows if rank is not None}))
+        catalog = {movie.rank: movie for movie in catalog}
+
+        watch_list = WatchList()
+        for title, release_year, rank in rows:
+            watch_list.add_movie(catalog[rank] if rank is not None else movie_from_columns(title, release_year))
+        return watch_list
+
+
+def movie_from_columns(title, release_year, rank=0, description='', director=None, runtime_minutes=0, rating=0,
+                       votes=0, revenue=0, metascore=0):
+    movie = Movie(title, release_year if release_year is not None else 0)
+    movie.rank = rank
+    movie.description = description
+    movie.director = director
+    if runtime_minutes > 0:
+        movie.runtime_minutes = runtime_minutes
+    movie.rating = rating
+    movie.votes = votes
+    movie.revenue = revenue
+    movie.metascores = metascore
+    return movie
+
+
+def populate(data_path: str, repo: SqliteRepository, workers: int = None):
+    """ Loads the movies and users from the CSV files under data_path into an empty database, in one transaction
+    each. A database that already holds data is left as it is, so restarts keep the users and reviews added since.
+    Either way, the in-memory search indexes are built over the movies in the database.
+    """
+    if repo.is_empty():
+        load_movies_and_users(data_path, repo, workers)
+    repo.build_indexes()
+
+
+def load_movies_and_users(data_path: str, repo: SqliteRepository, workers: int = None):
+    # The facet indexes of the chunks are not needed: the database indexes its own tables.
+    ingestion = MovieIngestion(os.path.join(data_path, 'Data1000Movies.csv'), repo.registry, workers)
+    repo.add_movies(movie for movies, _ in ingestion for movie in movies)
+    logger.info('Loaded %d movies in %.2f s (%.0f rows/s)', ingestion.rows, ingestion.seconds,
+                ingestion.rows_per_second)
+    # Unlike user.csv, the database outlives the app, so plaintext passwords are hashed before they are stored.
+    rows = list(read_csv_file(os.path.join(data_path, 'user.csv')))
+    plaintext_rows = [row for row in rows if not is_password_hash(row[2])]
+    for row, password_hash in zip(plaintext_rows, hash_passwords((row[2] for row in plaintext_rows), workers)):
+        row[2] = password_hash
+    repo.add_users([User(user_name=row[1], password=row[2]) for row in rows])
@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify, current_app
+
+import movie_web_app.adapters.repository as repo
+import movie_web_app.adapters.poster_cache as poster_cache
+import movie_web_app.api.services as services
+
+
+MOVIES_PER_RESPONSE = 20
+MAX_MOVIES_PER_RESPONSE = 100
+
+# Configure Blueprint.
+api_blueprint = Blueprint(
+    'api_bp', __name__, url_prefix='/api')
+
+
+@api_blueprint.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    # Called on every keystroke of the search box, so it answers from the prefix index and renders no template.
+    q = request.args.get('q', '')
+    limit = current_app.config['AUTOCOMPLETE_LIMIT']
+    requested_limit = request.args.get('limit', type=int)
+    if requested_limit is not None and 0 < requested_limit < limit:
+        limit = requested_limit
+
+    return jsonify(q=q, completions=services.get_completions(q, limit, repo.repo_instance))
+
+
+@api_blueprint.route('/movies', methods=['GET'])
+def movies():
+    # Filters, sorts and aggregates the catalog by its numeric attributes, e.g.
+    # /api/movies?min_release_year=2014&min_rating=8&order_by=votes&descending=1&limit=5
+    ranges = dict()
+    for attribute in services.MOVIE_ATTRIBUTES:
+        low = request.args.get('min_' + attribute, type=float)
+        high = request.args.get('max_' + attribute, type=float)
+        if low is not None or high is not None:
+            ranges[attribute] = (low, high)
+    order_by = request.args.get('order_by')
+    if order_by is not None and order_by not in services.MOVIE_ATTRIBUTES:
+        return jsonify(error='order_by must be one of ' + ', '.join(services.MOVIE_ATTRIBUTES)), 400
+    descending = request.args.get('descending', '0') not in ('0', 'false', '')
+    limit = min(max(request.args.get('limit', MOVIES_PER_RESPONSE, type=int), 0), MAX_MOVIES_PER_RESPONSE)
+
+    return jsonify(services.get_filtered_movies(ranges, order_by, descending, limit, repo.repo_instance))
+
+
+@api_blueprint.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(
+        fragments=current_app.jinja_env.fragment_cache.stats(),
+        posters=poster_cache.poster_cache_instance.stats(),
+    )
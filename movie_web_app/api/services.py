@@ -0,0 +1,32 @@
+from movie_web_app.adapters.movie_columns import COLUMNS
+from movie_web_app.adapters.repository import AbstractRepository
+
+MOVIE_ATTRIBUTES = tuple(COLUMNS)
+
+
+def get_completions(prefix, limit, repo: AbstractRepository):
+    completions = repo.get_completions(prefix, limit)
+    return [{'name': name, 'kinds': kinds} for name, kinds in completions]
+
+
+def get_filtered_movies(ranges, order_by, descending, limit, repo: AbstractRepository):
+    # The movies with attributes in ranges, and aggregates of every attribute over all of them.
+    movie_ranks, number_of_results = repo.filter_movies(ranges, order_by, descending, limit)
+    return {
+        'total': number_of_results,
+        'movies': [movie_attributes_to_dict(movie) for movie in repo.get_movies_by_rank(movie_ranks)],
+        'aggregates': {attribute: repo.aggregate_movies(attribute, ranges) for attribute in MOVIE_ATTRIBUTES},
+    }
+
+
+def movie_attributes_to_dict(movie):
+    return {
+        'rank': movie.rank,
+        'title': movie.title,
+        'release_year': movie.release_year,
+        'runtime_minutes': movie.runtime_minutes,
+        'rating': movie.rating,
+        'votes': movie.votes,
+        'revenue': movie.revenue,
+        'metascore': movie.metascores,
+    }
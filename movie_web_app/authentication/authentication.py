@@ -1,4 +1,5 @@
-from flask import Blueprint, render_template, redirect, url_for, session, request
+import click
+from flask import Blueprint, render_template, redirect, url_for, session, request, current_app
 
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
@@ -11,10 +12,11 @@ from functools import wraps
 import movie_web_app.utilities.utilities as utilities
 import movie_web_app.authentication.services as services
 import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.memory_repository import hash_user_passwords
 
 # Configure Blueprint.
 authentication_blueprint = Blueprint(
-    'authentication_bp', __name__, url_prefix='/authentication')
+    'authentication_bp', __name__, url_prefix='/authentication', cli_group=None)
 
 
 @authentication_blueprint.route('/register', methods=['GET', 'POST'])
@@ -95,6 +97,14 @@ def logout():
     return redirect(url_for('home_bp.home'))
 
 
+@authentication_blueprint.cli.command('hash-passwords')
+@click.option('--workers', default=None, type=int, help='Hashing processes. Defaults to the number of CPUs.')
+def hash_passwords(workers):
+    """Replace the plaintext passwords in user.csv with their hashes."""
+    hashed = hash_user_passwords(current_app.config['DATA_PATH'], workers)
+    click.echo('Hashed {} passwords.'.format(hashed))
+
+
 def login_required(view):
     @wraps(view)
     def wrapped_view(**kwargs):
@@ -1,7 +1,9 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 
-from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.adapters.passwords import verify_password
+from movie_web_app.adapters.repository import AbstractRepository, RepositoryException
 from movie_web_app.domain.model import User
+from movie_web_app.utilities.metrics import timed
 
 
 class NameNotUniqueException(Exception):
@@ -22,9 +24,12 @@ def add_user(username: str, password: str, repo: AbstractRepository):
     # Encrypt password so that the database doesn't store passwords 'in the clear'.
     password_hash = generate_password_hash(password)
 
-    # Create and store the new User, with password encrypted.
+    # Create and store the new User, with password encrypted. The repository rejects a name taken in the meantime.
     user = User(username, password_hash)
-    repo.add_user(user)
+    try:
+        repo.add_user(user)
+    except RepositoryException:
+        raise NameNotUniqueException
 
 def get_all_users(repo:AbstractRepository):
     return repo.get_all_users()
@@ -42,7 +47,10 @@ def authenticate_user(username: str, password: str, repo: AbstractRepository):
 
     user = repo.get_user(username)
     if user is not None:
-        authenticated = check_password_hash(user.password, password)
+        authenticated, upgraded_password = verify_password(user.password, password)
+        if upgraded_password is not None:
+            # The password was loaded in the clear; keep its hash from now on.
+            repo.update_user_password(user, upgraded_password)
     if not authenticated:
         raise AuthenticationException
 
@@ -51,6 +59,7 @@ def authenticate_user(username: str, password: str, repo: AbstractRepository):
 # Functions to convert model entities to dictionaries
 # ===================================================
 
+@timed('dto')
 def user_to_dict(user: User):
     user_dict = {
         'username': user.user_name,
@@ -2,14 +2,20 @@ from typing import List, Iterable
 from datetime import datetime
 
 
+# The domain classes use __slots__, so an instance holds its attributes without a __dict__, and lists an instance may
+# never need (an actor's colleagues, a movie's reviews) are only made when the first item is added or the list is
+# first asked for, so changes made through the list are kept. A catalog can hold millions of these objects.
+
+
 class Actor:
+    __slots__ = ('__actor_full_name', '__colleague')
 
     def __init__(self, actor_full_name: str):
         if actor_full_name == "" or type(actor_full_name) is not str:
             self.__actor_full_name = None
         else:
             self.__actor_full_name = actor_full_name.strip()
-        self.__colleague: List[Actor] = list()
+        self.__colleague: List[Actor] = None
 
     @property
     def actor_full_name(self) -> str:
@@ -30,13 +36,16 @@ class Actor:
         return hash(self.__actor_full_name)
 
     def add_actor_colleague(self, colleague):
+        if self.__colleague is None:
+            self.__colleague = list()
         self.__colleague.append(colleague)
 
     def check_if_this_actor_worked_with(self, colleague):
-        return colleague in self.__colleague
+        return self.__colleague is not None and colleague in self.__colleague
 
 
 class Director:
+    __slots__ = ('__director_full_name',)
 
     def __init__(self, director_full_name: str):
         if director_full_name == "" or type(director_full_name) is not str:
@@ -67,6 +76,7 @@ class Director:
 
 
 class Genre:
+    __slots__ = ('__genre_name',)
 
     def __init__(self, genre_name: str):
         if genre_name == "" or type(genre_name) is not str:
@@ -97,12 +107,15 @@ class Genre:
 
 
 class User:
+    # __weakref__ lets a repository keep users in a weak identity map.
+    __slots__ = ('__user_name', '__password', '__watched_movies', '__reviews', '__time_spent_watching_movies_minutes',
+                 '__weakref__')
 
     def __init__(self, user_name: str, password: str):
         self.__user_name = user_name.lower().strip()
         self.__password: str = password
-        self.__watched_movies: List[Movie] = list()
-        self.__reviews: List[Review] = list()
+        self.__watched_movies: List[Movie] = None
+        self.__reviews: List[Review] = None
         self.__time_spent_watching_movies_minutes = 0
 
     @property
@@ -113,12 +126,20 @@ class User:
     def password(self) -> str:
         return self.__password
 
+    @password.setter
+    def password(self, password: str):
+        self.__password = password
+
     @property
     def watched_movies(self):
+        if self.__watched_movies is None:
+            self.__watched_movies = list()
         return self.__watched_movies
 
     @property
     def reviews(self):
+        if self.__reviews is None:
+            self.__reviews = list()
         return self.__reviews
 
     @property
@@ -137,20 +158,26 @@ class User:
         return self.__user_name < other.__user_name
 
     def __hash__(self):
-        return hash((self.__user_name, self.__password))
+        # Like __eq__, only the user name counts, so a User can change its password while it is a dict key.
+        return hash(self.__user_name)
 
     def watch_movie(self, movie):
+        if self.__watched_movies is None:
+            self.__watched_movies = list()
         self.__watched_movies.append(movie)
         runtime = movie.runtime_minutes
         self.__time_spent_watching_movies_minutes += runtime
 
     def add_review(self, review):
+        if self.__reviews is None:
+            self.__reviews = list()
         self.__reviews.append(review)
 
 
 class Review:
+    __slots__ = ('__user', '__movie', '__review_text', '__rating', '__timestamp')
 
-    def __init__(self, user: User, movie: 'Movie', review_text: str, rating: int):
+    def __init__(self, user: User, movie: 'Movie', review_text: str, rating: int, timestamp: datetime = None):
         self.__user: User = user
         self.__movie: Movie = movie
         self.__review_text: str = review_text
@@ -158,7 +185,8 @@ class Review:
             self.__rating = rating
         else:
             self.__rating = None
-        self.__timestamp = datetime.now()
+        # A stored review keeps the time it was written.
+        self.__timestamp = timestamp if timestamp is not None else datetime.now()
 
     @property
     def user(self) -> User:
@@ -195,6 +223,8 @@ class Review:
 
 
 class Movie:
+    __slots__ = ('__title', '__release_year', '__rank', '__description', '__director', '__actors', '__genres',
+                 '__runtime_minutes', '__rating', '__votes', '__revenue', '__metascores', '__reviews')
 
     def __init__(self, title: str, release_year: int):
         if title == "" or type(title) is not str:
@@ -208,14 +238,14 @@ class Movie:
         self.__rank = 0
         self.__description = ""
         self.__director = None
-        self.__actors: List[Actor] = list()
-        self.__genres: List[Genre] = list()
+        self.__actors: List[Actor] = None
+        self.__genres: List[Genre] = None
         self.__runtime_minutes = 0
         self.__rating = 0
         self.__votes = 0
         self.__revenue = 0
         self.__metascores = 0
-        self.__reviews: List[Review] = list()
+        self.__reviews: List[Review] = None
 
     @property
     def title(self) -> str:
@@ -253,10 +283,14 @@ class Movie:
 
     @property
     def actors(self):
+        if self.__actors is None:
+            self.__actors = list()
         return self.__actors
 
     @property
     def genres(self):
+        if self.__genres is None:
+            self.__genres = list()
         return self.__genres
 
     @property
@@ -304,7 +338,7 @@ class Movie:
 
     @property
     def reviews(self) -> Iterable[Review]:
-        return iter(self.__reviews)
+        return iter(self.__reviews if self.__reviews is not None else ())
 
     def __repr__(self):
         return f"<Movie {self.__title}, {self.__release_year}>"
@@ -321,20 +355,26 @@ class Movie:
         return hash((self.__title, self.__release_year))
 
     def add_actor(self, actor: Actor):
+        if self.__actors is None:
+            self.__actors = list()
         self.__actors.append(actor)
 
     def remove_actor(self, actor: Actor):
-        if actor in self.__actors:
+        if actor in self.actors:
             self.__actors.remove(actor)
 
     def add_genre(self, genre: Genre):
+        if self.__genres is None:
+            self.__genres = list()
         self.__genres.append(genre)
 
     def remove_genre(self, genre: Genre):
-        if genre in self.__genres:
+        if genre in self.genres:
             self.__genres.remove(genre)
 
     def add_review(self, review: Review):
+        if self.__reviews is None:
+            self.__reviews = list()
         self.__reviews.append(review)
 
 
@@ -1,6 +1,45 @@
 import csv
 from typing import List, Dict, Set
+
 from movie_web_app.domain.model import Movie, Actor, Genre, Director
+from movie_web_app.domain.registry import EntityRegistry
+
+
+def parse_row(row):
+    """ Returns the fields of a row of Data1000Movies.csv, converted: (rank, title, release year, description,
+    runtime, director, actors, genres, rating, votes, revenue, metascore).
+    """
+    row = [item.strip() for item in row]
+    return (int(row[0]), row[1], int(row[6]), row[3], int(row[7]), row[4],
+            tuple(actor.strip() for actor in row[5].split(',')), tuple(genre.strip() for genre in row[2].split(',')),
+            optional_number(row[8], float), optional_number(row[9], int), optional_number(row[10], float),
+            optional_number(row[11], int))
+
+
+def optional_number(value: str, convert):
+    # The data has N/A for an unknown revenue or metascore.
+    return None if value in ('', 'N/A') else convert(value)
+
+
+def movie_from_fields(fields, registry: EntityRegistry) -> Movie:
+    """ Returns the Movie with the fields from parse_row, with its actors, director and genres taken from registry. """
+    rank, title, release_year, description, runtime, director, actors, genres, rating, votes, revenue, metascore = \
+        fields
+    movie = Movie(title, release_year)
+    movie.rank = rank
+    movie.description = description
+    movie.runtime_minutes = runtime
+    for actor in actors:
+        movie.add_actor(registry.actor(actor))
+    movie.director = registry.director(director)
+    for genre in genres:
+        movie.add_genre(registry.genre(genre))
+    movie.rating = rating
+    movie.votes = votes
+    movie.revenue = revenue
+    movie.metascores = metascore
+    return movie
+
 
 class MovieFileCSVReader:
 
@@ -73,61 +112,27 @@ class MovieFileCSVReader:
         return self.__movies_with_given_genre[genre]
 
     def read_csv_file(self):
-        with open(self.__file_name, mode='r', encoding='utf-8-sig') as csvfile:
-            movie_file_reader = csv.DictReader(csvfile)
-
-            index = 0
+        # Rows are parsed with parse_row, as the repositories' ingestion does, into one Movie per row shared by all the
+        # datasets, and one Actor, Director and Genre per name.
+        registry = EntityRegistry()
+        with open(self.__file_name, mode='r', encoding='utf-8-sig', newline='') as csvfile:
+            movie_file_reader = csv.reader(csvfile)
+            next(movie_file_reader, None)
             for row in movie_file_reader:
-                rank = row['Rank']
-                title = row['Title']
-                release_year = int(row['Year'])
-                self.__dataset_of_movies.append(Movie(title, release_year))
-                self.__rank_of_movies[rank] = Movie(title, release_year)
-
-                # add movie with same year into movies_with_given_year
-                if release_year not in self.__movies_with_given_year.keys():
-                    self.__movies_with_given_year[release_year] = [Movie(title, release_year)]
-                else:
-                    movie = Movie(title, release_year)
-                    self.__movies_with_given_year[release_year].append(movie)
-
-                actors = row['Actors']
-                actors_list = actors.split(',')
-                for actor in actors_list:
-                    if actor not in self.__dataset_of_actors:
-                        self.__dataset_of_actors.add(Actor(actor))
-
-                # add movie with same actor into movies_with_given_actor
-                for actor in actors_list:
-                    if actor not in self.__movies_with_given_actor:
-                        self.__movies_with_given_actor[actor] = [Movie(title, release_year)]
-                    else:
-                        self.__movies_with_given_actor[actor].append(Movie(title, release_year))
-
-                director = row['Director']
-                if director not in self.__dataset_of_directors:
-                    self.__dataset_of_directors.add(Director(director))
-
-                #add movie with same director into movies_with_given_director
-                if director not in self.__movies_with_given_director:
-                    self.__movies_with_given_director[director] = [Movie(title, release_year)]
-                else:
-                    self.__movies_with_given_director[director].append(Movie(title, release_year))
-
-                genres = row['Genre']
-                genres_list = genres.split(',')
-                for genre in genres_list:
-                    if genre not in self.__dataset_of_genres:
-                        self.__dataset_of_genres.add(Genre(genre))
-
-                #add movie with same genre into movies_with_given_genre
-                for genre in genres_list:
-                    if genre not in self.__movies_with_given_genre:
-                        self.__movies_with_given_genre[genre] = [Movie(title, release_year)]
-                    else:
-                        self.__movies_with_given_genre[genre].append(Movie(title, release_year))
-
-                if index > 1000:
-                    break
-
-                index += 1
+                if not row:
+                    continue
+                movie = movie_from_fields(parse_row(row), registry)
+                self.__dataset_of_movies.append(movie)
+                self.__rank_of_movies[str(movie.rank)] = movie
+                self.__movies_with_given_year.setdefault(movie.release_year, []).append(movie)
+
+                for actor in movie.actors:
+                    self.__dataset_of_actors.add(actor)
+                    self.__movies_with_given_actor.setdefault(actor.actor_full_name, []).append(movie)
+
+                self.__dataset_of_directors.add(movie.director)
+                self.__movies_with_given_director.setdefault(movie.director.director_full_name, []).append(movie)
+
+                for genre in movie.genres:
+                    self.__dataset_of_genres.add(genre)
+                    self.__movies_with_given_genre.setdefault(genre.genre_name, []).append(movie)
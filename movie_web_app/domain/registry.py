@@ -0,0 +1,38 @@
+from typing import Dict
+
+from movie_web_app.domain.model import Actor, Director, Genre
+
+
+class EntityRegistry:
+    """ Hands out one Actor, Director and Genre per name, so the movies of a person or genre all share the same
+    object instead of each holding its own copy of the name.
+    """
+
+    def __init__(self):
+        self.__actors: Dict[str, Actor] = dict()
+        self.__directors: Dict[str, Director] = dict()
+        self.__genres: Dict[str, Genre] = dict()
+
+    def actor(self, actor_full_name: str) -> Actor:
+        return intern_entity(self.__actors, Actor, actor_full_name)
+
+    def director(self, director_full_name: str) -> Director:
+        return intern_entity(self.__directors, Director, director_full_name)
+
+    def genre(self, genre_name: str) -> Genre:
+        return intern_entity(self.__genres, Genre, genre_name)
+
+    @property
+    def size(self) -> int:
+        """ The number of actors, directors and genres held. """
+        return len(self.__actors) + len(self.__directors) + len(self.__genres)
+
+
+def intern_entity(entities, entity_type, name: str):
+    # Names are looked up stripped, as the entities store them, so ' Anne Hathaway' is 'Anne Hathaway'.
+    name = name.strip()
+    entity = entities.get(name)
+    if entity is None:
+        # setdefault keeps the first entity made if two threads add the same name at once.
+        entity = entities.setdefault(name, entity_type(name))
+    return entity
@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, current_app, request
+
+from movie_web_app.utilities.metrics import start_request, finish_request
+
+
+# Configure Blueprint.
+metrics_blueprint = Blueprint(
+    'metrics_bp', __name__)
+
+
+@metrics_blueprint.before_app_request
+def start_timing():
+    # Requests no route matched are counted together.
+    if request.endpoint != 'metrics_bp.metrics':
+        start_request(request.endpoint or 'unmatched')
+
+
+@metrics_blueprint.teardown_app_request
+def record_timing(exception=None):
+    # Runs after every request, including ones that raised.
+    timing = finish_request()
+    if timing is not None:
+        current_app.extensions['metrics'].record(*timing)
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(current_app.extensions['metrics'].exposition(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
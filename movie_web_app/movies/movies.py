@@ -1,7 +1,7 @@
 from datetime import date
 
 from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
+from flask import request, render_template, redirect, url_for, session, current_app
 
 from better_profanity import profanity
 from flask_wtf import FlaskForm
@@ -12,12 +12,9 @@ import movie_web_app.adapters.repository as repo
 import movie_web_app.utilities.utilities as utilities
 import movie_web_app.movies.services as services
 
+import movie_web_app.posters.posters as posters
 from movie_web_app.authentication.authentication import login_required
 
-from urllib.request import urlopen
-import urllib.parse
-import ast
-
 # Configure Blueprint.
 movies_blueprint = Blueprint(
     'movies_bp', __name__)
@@ -50,16 +47,7 @@ def movies_by_rank():
     # Fetch movie(s) for the target rank. This call also returns the previous and next rank for movies immediately
     # before and after the target rank.
     movie = services.get_movie(target_rank, repo.repo_instance)
-    movie_image = {}
-    title = movie["title"]
-    args = {"t": title}
-    link = "http://www.omdbapi.com/?{}&apikey=4421208f".format(urllib.parse.urlencode(args))
-    response = urlopen(link)
-    content = response.read()
-    content_dict = content.decode("UTF-8")
-    detail = ast.literal_eval(content_dict)
-    image = detail["Poster"]
-    movie_image[movie["title"]] = image
+    movie_image = posters.get_movie_images([movie])
 
     previous_rank = target_rank - 1
     next_rank = target_rank + 1
@@ -137,17 +125,7 @@ def movies_by_year():
     #movie_ranks = services.get_movies_by_year(year, repo.repo_instance)
     # Retrieve the batch of movies to display on the Web page.
     movies = services.get_movies_by_rank(movie_ranks[cursor:cursor + movies_per_page], repo.repo_instance)
-    movies_image = {}
-    for movie in movies:
-        title = movie["title"]
-        args = {"t": title}
-        link = "http://www.omdbapi.com/?{}&apikey=4421208f".format(urllib.parse.urlencode(args))
-        response = urlopen(link)
-        content = response.read()
-        content_dict = content.decode("UTF-8")
-        detail = ast.literal_eval(content_dict)
-        image = detail["Poster"]
-        movies_image[movie["title"]] = image
+    movies_image = posters.get_movie_images(movies)
 
     first_movie_url = None
     last_movie_url = None
@@ -223,17 +201,7 @@ def movies_by_genre():
     # Retrieve the batch of movies to display on the Web page.
     movies = services.get_movies_by_rank(movie_ranks[cursor:cursor + movies_per_page], repo.repo_instance)
 
-    movies_image = {}
-    for movie in movies:
-        title = movie["title"]
-        args = {"t": title}
-        link = "http://www.omdbapi.com/?{}&apikey=4421208f".format(urllib.parse.urlencode(args))
-        response = urlopen(link)
-        content = response.read()
-        content_dict = content.decode("UTF-8")
-        detail = ast.literal_eval(content_dict)
-        image = detail["Poster"]
-        movies_image[movie["title"]] = image
+    movies_image = posters.get_movie_images(movies)
 
     first_movie_url = None
     last_movie_url = None
@@ -279,6 +247,102 @@ def movies_by_genre():
     )
 
 
+@movies_blueprint.route('/movies/browse', methods=['GET'])
+def browse_movies():
+    # Movies matching every filter given, e.g. /movies/browse?genre=Action&genre=Comedy&min_year=2014&min_rating=7,
+    # with the number of them in each genre, year and director, so the filters can be narrowed down from there.
+    movies_per_page = 2
+
+    # Read query parameters.
+    filters = {'genre': request.args.getlist('genre')}
+    for name in ('director', 'actor'):
+        if request.args.get(name):
+            filters[name] = request.args.get(name)
+    for name, (_, _, value_type) in services.BROWSE_RANGES.items():
+        value = request.args.get(name, type=value_type)
+        if value is not None:
+            filters[name] = value
+    cursor = request.args.get('cursor', 0, type=int)
+    movie_to_show_reviews = request.args.get('view_reviews_for', -1, type=int)
+
+    movie_ranks, number_of_movies, facets = services.browse_movies(
+        filters, cursor + movies_per_page, repo.repo_instance)
+
+    # Retrieve the batch of movies to display on the Web page.
+    movies = services.get_movies_by_rank(movie_ranks[cursor:], repo.repo_instance)
+
+    movies_image = posters.get_movie_images(movies)
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if cursor > 0:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = browse_url(filters, cursor=cursor - movies_per_page)
+        first_movie_url = browse_url(filters)
+
+    if cursor + movies_per_page < number_of_movies:
+        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = browse_url(filters, cursor=cursor + movies_per_page)
+
+        last_cursor = movies_per_page * int(number_of_movies / movies_per_page)
+        if number_of_movies % movies_per_page == 0:
+            last_cursor -= movies_per_page
+        last_movie_url = browse_url(filters, cursor=last_cursor)
+
+    # Construct urls for viewing movie reviews and adding reviews.
+    for movie in movies:
+        movie['view_review_url'] = browse_url(filters, cursor=cursor, view_reviews_for=movie['rank'])
+        movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['rank'])
+
+    # Construct urls for removing each filter, and for narrowing down by the values of each facet.
+    filter_urls = dict()
+    for genre in filters['genre']:
+        filter_urls[genre] = browse_url(filters, genre=[other for other in filters['genre'] if other != genre])
+    for name, value in filters.items():
+        if name != 'genre':
+            filter_urls['{} {}'.format(name.replace('_', ' '), value)] = browse_url(filters, **{name: None})
+
+    facet_urls = {'Genres': dict(), 'Years': dict(), 'Directors': dict()}
+    for genre, count in facets['genres']:
+        if genre not in filters['genre']:
+            facet_urls['Genres']['{} ({})'.format(genre, count)] = browse_url(filters, genre=filters['genre'] + [genre])
+    if len(facets['release_years']) > 1:
+        for year, count in facets['release_years']:
+            facet_urls['Years']['{} ({})'.format(year, count)] = browse_url(filters, min_year=year, max_year=year)
+    if 'director' not in filters:
+        for director, count in facets['directors']:
+            facet_urls['Directors']['{} ({})'.format(director, count)] = browse_url(filters, director=director)
+
+    # Generate the webpage to display the movies.
+    return render_template(
+        'movies/movies.html',
+        movies_title='{} movies found'.format(number_of_movies),
+        filter_urls=filter_urls,
+        facet_urls={facet: urls for facet, urls in facet_urls.items() if urls},
+        movies=movies,
+        image=movies_image,
+        selected_movies=utilities.get_selected_movies(10),
+        year_urls=utilities.get_years_and_urls(),
+        genre_urls=utilities.get_genres_and_urls(),
+        rank_urls=utilities.get_rank_and_url(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url,
+        show_reviews_for_movie=movie_to_show_reviews,
+    )
+
+
+def browse_url(filters, **changes):
+    # The URL of /movies/browse with filters, changed by changes; a change to None or [] removes the filter.
+    parameters = dict(filters, **changes)
+    return url_for('movies_bp.browse_movies',
+                   **{name: value for name, value in parameters.items() if value is not None and value != []})
+
+
 @movies_blueprint.route('/review', methods=['GET', 'POST'])
 @login_required
 def review_on_movie():
@@ -355,36 +419,32 @@ def movies_by_search():
         # Convert cursor from string to int.
         cursor = int(cursor)
 
-    all_movies = services.get_all_movies(repo.repo_instance)
+    # Retrieve the ranks of the best matches up to the end of this page, most relevant first, and the total number
+    # of matches.
     movie_ranks = []
+    number_of_results = 0
+    suggestions = []
+    corrected_query = None
     if q:
-        for movie in all_movies:
-            try:
-                q = int(q)
-                if q in movie.values():
-                    if movie['rank'] not in movie_ranks:
-                        movie_ranks.append(movie['rank'])
-            except:
-                pass
-            if q in movie.values() or q in movie['actors'] or q in movie['genres']:
-                if movie['rank'] not in movie_ranks:
-                    movie_ranks.append(movie['rank'])
+        movie_ranks, number_of_results = services.get_movie_ranks_for_search(q, cursor + movies_per_page,
+                                                                             repo.repo_instance)
+
+        if number_of_results == 0:
+            # Nothing matches, so the query probably has a typo: show the results for the closest title, actor or
+            # director instead, and offer the other close names as suggestions.
+            suggestions = services.get_search_suggestions(q, current_app.config['SEARCH_MAX_EDIT_DISTANCE'],
+                                                          current_app.config['SEARCH_SUGGESTIONS'],
+                                                          repo.repo_instance)
+            if suggestions:
+                corrected_query = suggestions[0]
+                movie_ranks, number_of_results = services.get_movie_ranks_for_search(
+                    corrected_query, cursor + movies_per_page, repo.repo_instance)
 
     # Retrieve the batch of movies to display on the Web page.
     movies = services.get_movies_by_rank(movie_ranks[cursor:cursor + movies_per_page], repo.repo_instance)
 
 
-    movies_image = {}
-    for movie in movies:
-        title = movie["title"]
-        args = {"t": title}
-        link = "http://www.omdbapi.com/?{}&apikey=4421208f".format(urllib.parse.urlencode(args))
-        response = urlopen(link)
-        content = response.read()
-        content_dict = content.decode("UTF-8")
-        detail = ast.literal_eval(content_dict)
-        image = detail["Poster"]
-        movies_image[movie["title"]] = image
+    movies_image = posters.get_movie_images(movies)
 
     first_movie_url = None
     last_movie_url = None
@@ -396,12 +456,12 @@ def movies_by_search():
         prev_movie_url = url_for('movies_bp.movies_by_search', q=q, cursor=cursor - movies_per_page)
         first_movie_url = url_for('movies_bp.movies_by_search', q=q)
 
-    if cursor + movies_per_page < len(movie_ranks):
+    if cursor + movies_per_page < number_of_results:
         # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
         next_movie_url = url_for('movies_bp.movies_by_search', q=q, cursor=cursor + movies_per_page)
 
-        last_cursor = movies_per_page * int(len(movie_ranks) / movies_per_page)
-        if len(movie_ranks) % movies_per_page == 0:
+        last_cursor = movies_per_page * int(number_of_results / movies_per_page)
+        if number_of_results % movies_per_page == 0:
             last_cursor -= movies_per_page
         last_movie_url = url_for('movies_bp.movies_by_search', q=q, cursor=last_cursor)
 
@@ -411,10 +471,13 @@ def movies_by_search():
                                                    view_reviews_for=movie['rank'])
             movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['rank'])
 
-    if movie_ranks == []:
+    suggestion_urls = {suggestion: url_for('movies_bp.movies_by_search', q=suggestion) for suggestion in suggestions}
+
+    if number_of_results == 0:
         return render_template(
             'movies/movies.html',
             movies_title='Search result: Not Found',
+            suggestion_urls=suggestion_urls,
             #movies=movies,
             selected_movies=utilities.get_selected_movies(10),
             year_urls=utilities.get_years_and_urls(),
@@ -430,6 +493,8 @@ def movies_by_search():
     return render_template(
         'movies/movies.html',
         movies_title='Search result: ' + str(q),
+        corrected_query=corrected_query,
+        suggestion_urls=suggestion_urls,
         movies=movies,
         image=movies_image,
         selected_movies=utilities.get_selected_movies(10),
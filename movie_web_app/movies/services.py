@@ -1,7 +1,19 @@
 from typing import List, Iterable
 
 from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.adapters.search_index import normalize
 from movie_web_app.domain.model import Movie, Director, Actor, Genre, User, Review, WatchList, make_review
+from movie_web_app.utilities.metrics import timed
+
+# The query parameters of /movies/browse bounding a numeric attribute: parameter -> (attribute, 0 for the low end or
+# 1 for the high end, type).
+BROWSE_RANGES = {
+    'min_year': ('release_year', 0, int),
+    'max_year': ('release_year', 1, int),
+    'min_runtime': ('runtime_minutes', 0, int),
+    'max_runtime': ('runtime_minutes', 1, int),
+    'min_rating': ('rating', 0, float),
+}
 
 
 class NonExistentMovieException(Exception):
@@ -85,6 +97,32 @@ def get_movie_ranks_for_genre(genre, repo: AbstractRepository):
     return movie_ranks
 
 
+def get_movie_ranks_for_search(query, limit, repo: AbstractRepository):
+    # Returns the ranks of the best `limit` matches, most relevant first, and the total number of matches.
+    movie_ranks, number_of_results = repo.search_movies(query, limit)
+    return movie_ranks, number_of_results
+
+
+def browse_movies(filters, limit, repo: AbstractRepository):
+    # filters holds the query parameters of /movies/browse: a list of genres, and a director, an actor and the
+    # bounds in BROWSE_RANGES if given. Returns the first `limit` ranks, the number of matches and the facet counts.
+    ranges = dict()
+    for name, (attribute, end, _) in BROWSE_RANGES.items():
+        if name in filters:
+            bounds = list(ranges.get(attribute, (None, None)))
+            bounds[end] = filters[name]
+            ranges[attribute] = tuple(bounds)
+    return repo.browse_movies(filters.get('genre', ()), filters.get('director'), filters.get('actor'), ranges, limit)
+
+
+def get_search_suggestions(query, max_distance, limit, repo: AbstractRepository):
+    # Returns the names closest to query, leaving out the query itself.
+    query_key = normalize(query)
+    similar_names = repo.get_similar_names(query, max_distance, limit + 1)
+    suggestions = [name for name, distance, kinds in similar_names if normalize(name) != query_key]
+    return suggestions[:limit]
+
+
 def get_movies_by_rank(rank_list, repo: AbstractRepository):
     movies = repo.get_movies_by_rank(rank_list)
 
@@ -115,15 +153,16 @@ def get_reviews_for_movie(movie_rank, repo: AbstractRepository):
 # Functions to convert model entities to dicts
 # ============================================
 
+@timed('dto')
 def movie_to_dict(movie: Movie):
     movie_dict = {
         'rank': movie.rank,
         'title': movie.title,
         'release_year': movie.release_year,
         'description': movie.description,
-        'director': movie.director,
-        'actors': movie.actors,
-        'genres': movie.genres,
+        'director': movie.director.director_full_name if movie.director is not None else None,
+        'actors': [actor.actor_full_name for actor in movie.actors],
+        'genres': [genre.genre_name for genre in movie.genres],
         'runtime': movie.runtime_minutes,
         'reviews': reviews_to_dict(movie.reviews),
         #'years': years_to_dict(movie.release_year)
@@ -131,10 +170,12 @@ def movie_to_dict(movie: Movie):
     return movie_dict
 
 
+@timed('dto')
 def movies_to_dict(movies: Iterable[Movie]):
     return [movie_to_dict(movie) for movie in movies]
 
 
+@timed('dto')
 def review_to_dict(review: Review):
     review_dict = {
         'username': review.user,
@@ -146,6 +187,7 @@ def review_to_dict(review: Review):
     return review_dict
 
 
+@timed('dto')
 def reviews_to_dict(reviews: Iterable[Review]):
     return [review_to_dict(review) for review in reviews]
 
@@ -0,0 +1,50 @@
+import os
+
+import click
+from flask import Blueprint, current_app, url_for
+
+import movie_web_app.adapters.repository as repo
+import movie_web_app.adapters.poster_cache as poster_cache
+import movie_web_app.adapters.poster_resolver as poster_resolver
+import movie_web_app.posters.services as services
+
+
+# Configure Blueprint.
+posters_blueprint = Blueprint(
+    'posters_bp', __name__, cli_group=None)
+
+
+def get_movie_images(movies):
+    placeholder_url = url_for('static', filename='images/poster_placeholder.svg')
+    posters = services.get_posters(movies, poster_resolver.poster_resolver_instance)
+
+    movie_images = dict()
+    for title, poster in posters.items():
+        movie_images[title] = poster if poster is not None else placeholder_url
+    return movie_images
+
+
+@posters_blueprint.cli.command('warm-posters')
+@click.option('--workers', default=4, show_default=True, help='Number of concurrent OMDb lookups.')
+@click.option('--retries', default=3, show_default=True, help='Retries per movie when OMDb cannot be reached.')
+@click.option('--backoff', default=0.5, show_default=True, help='Seconds before the first retry; doubles per retry.')
+@click.option('--checkpoint', default=None, help='Checkpoint file. Defaults to the POSTER_WARM_CHECKPOINT setting.')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and walk the whole catalog again.')
+def warm_posters(workers, retries, backoff, checkpoint, restart):
+    """Prefetch the poster of every movie into the poster store."""
+    if current_app.config['POSTER_CACHE_PATH'] is None:
+        raise click.ClickException('POSTER_CACHE_PATH is not set, so prefetched posters would not be kept.')
+
+    if checkpoint is None:
+        checkpoint = current_app.config['POSTER_WARM_CHECKPOINT']
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    def progress(completed, total):
+        if completed % 50 == 0 or completed == total:
+            click.echo('{}/{} movies'.format(completed, total))
+
+    summary = services.warm_posters(repo.repo_instance, poster_cache.poster_cache_instance, checkpoint_path=checkpoint,
+                                    max_workers=workers, retries=retries, backoff=backoff, progress=progress)
+    click.echo('Fetched {fetched}, already cached {cached}, skipped by checkpoint {skipped}, failed {failed}.'
+               .format(**summary))
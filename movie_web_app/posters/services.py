@@ -0,0 +1,109 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Dict
+
+from movie_web_app.adapters.omdb import OMDbException
+from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.adapters.poster_cache import PosterCache
+from movie_web_app.adapters.poster_resolver import PosterResolver
+
+logger = logging.getLogger(__name__)
+
+
+def get_posters(movies: Iterable[Dict], poster_resolver: PosterResolver, deadline: float = None):
+    # Returns a dict of poster urls keyed by movie title; movies without a poster, or whose poster missed the
+    # deadline, map to None. All of the page's posters are fetched in parallel.
+    keys = [(movie['title'], movie['release_year']) for movie in movies]
+    posters = poster_resolver.resolve(keys, deadline)
+    return {title: posters[(title, year)] for title, year in keys}
+
+
+def fetch_with_retry(title: str, year: int, poster_cache: PosterCache, retries: int = 3, backoff: float = 0.5,
+                     sleep=time.sleep):
+    # Retries unreachable-OMDb failures with exponential backoff; the last failure is raised to the caller.
+    for attempt in range(retries + 1):
+        try:
+            return poster_cache.get(title, year)
+        except OMDbException:
+            if attempt == retries:
+                raise
+            sleep(backoff * 2 ** attempt)
+
+
+def read_checkpoint(checkpoint_path: str):
+    done_ranks = set()
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as checkpoint:
+            for line in checkpoint:
+                if line.strip():
+                    done_ranks.add(int(line))
+    return done_ranks
+
+
+def warm_posters(repo: AbstractRepository, poster_cache: PosterCache, checkpoint_path: str = None,
+                 max_workers: int = 4, retries: int = 3, backoff: float = 0.5, progress=None, sleep=time.sleep):
+    """ Resolves the poster of every movie in the repository into the poster cache.
+
+    The rank of every movie that has been resolved is appended to checkpoint_path, so an interrupted run picks up
+    where it stopped. Movies that still fail after all retries, or fail otherwise (e.g. in the poster store), are
+    left out of the checkpoint and retried on the next run. progress, if given, is called with (completed, total)
+    after each movie.
+    """
+    done_ranks = read_checkpoint(checkpoint_path)
+    movies = [movie for movie in repo.all_movies() if movie.rank not in done_ranks]
+    summary = {'total': len(movies) + len(done_ranks), 'skipped': len(done_ranks), 'cached': 0, 'fetched': 0,
+               'failed': 0}
+
+    checkpoint = open(checkpoint_path, 'a') if checkpoint_path is not None else None
+    completed = summary['skipped']
+
+    def finished(movie, resolved=True):
+        nonlocal completed
+        if resolved and checkpoint is not None:
+            checkpoint.write('{}\n'.format(movie.rank))
+            checkpoint.flush()
+        completed += 1
+        if progress is not None:
+            progress(completed, summary['total'])
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='warm-posters') as executor:
+            futures = dict()
+            for movie in movies:
+                try:
+                    cached = poster_cache.lookup(movie.title, movie.release_year)[0]
+                except Exception:
+                    # The fetch below goes through the poster store too, and fails the movie if it fails again.
+                    logger.exception('Looking up the poster of %s (%s) failed', movie.title, movie.release_year)
+                    cached = False
+                if cached:
+                    # Already in the poster store, e.g. from a run without a checkpoint.
+                    summary['cached'] += 1
+                    finished(movie)
+                else:
+                    future = executor.submit(fetch_with_retry, movie.title, movie.release_year, poster_cache,
+                                             retries, backoff, sleep)
+                    futures[future] = movie
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except OMDbException:
+                    summary['failed'] += 1
+                    finished(futures[future], resolved=False)
+                except Exception:
+                    # One movie failing some other way costs the run that movie only.
+                    movie = futures[future]
+                    logger.exception('Warming the poster of %s (%s) failed', movie.title, movie.release_year)
+                    summary['failed'] += 1
+                    finished(movie, resolved=False)
+                else:
+                    summary['fetched'] += 1
+                    finished(futures[future])
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    return summary
@@ -0,0 +1,122 @@
+import os
+import random
+import tracemalloc
+
+import click
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, send_from_directory
+
+import movie_web_app.adapters.repository as repo
+import movie_web_app.adapters.poster_cache as poster_cache
+import movie_web_app.adapters.poster_resolver as poster_resolver
+from movie_web_app.adapters import memory_repository
+from movie_web_app.adapters.memory_repository import MemoryRepository, read_csv_file
+from movie_web_app.domain.model import make_review
+from movie_web_app.utilities.memory_report import MemorySnapshot, format_report
+from movie_web_app.utilities.profiler import PROFILE_HEADER, list_profiles, make_profile_token, valid_profile_token
+
+
+# Configure Blueprint.
+profiles_blueprint = Blueprint(
+    'profiles_bp', __name__, url_prefix='/profiles', cli_group=None)
+
+PROFILES_PER_PAGE = 50
+
+
+@profiles_blueprint.before_request
+def require_token():
+    # Profiles show the inner workings of the app, so they take the same token as asking for one, in the X-Profile
+    # header or the token query parameter.
+    token = request.headers.get(PROFILE_HEADER) or request.args.get('token')
+    if not valid_profile_token(current_app.config['SECRET_KEY'], token, current_app.config['PROFILE_TOKEN_MAX_AGE']):
+        abort(403)
+
+
+@profiles_blueprint.route('/', methods=['GET'])
+def profiles():
+    return render_template(
+        'profiles/profiles.html',
+        profiles=list_profiles(current_app.config['PROFILE_DIR'], PROFILES_PER_PAGE),
+        token=request.headers.get(PROFILE_HEADER) or request.args.get('token'),
+    )
+
+
+@profiles_blueprint.route('/memory', methods=['GET'])
+def memory():
+    # The memory held by each subsystem of the running app, and its change since the last request with ?baseline=1,
+    # which makes the new snapshot the baseline for the next ones.
+    snapshot = MemorySnapshot(memory_roots(repo.repo_instance))
+    report = snapshot.report(current_app.extensions.get('memory_baseline'),
+                             top=request.args.get('top', 10, type=int))
+    if request.args.get('baseline'):
+        current_app.extensions['memory_baseline'] = snapshot
+    return jsonify(report)
+
+
+def memory_roots(repository):
+    roots = dict(repository.get_memory_roots())
+    roots['caches'] = [poster_cache.poster_cache_instance, poster_resolver.poster_resolver_instance,
+                       current_app.jinja_env.fragment_cache, current_app.extensions.get('navigation')]
+    return roots
+
+
+@profiles_blueprint.route('/<name>', methods=['GET'])
+def profile(name):
+    if name not in {profile['name'] for profile in list_profiles(current_app.config['PROFILE_DIR'])}:
+        abort(404)
+    return send_from_directory(current_app.config['PROFILE_DIR'], name, as_attachment=True)
+
+
+@profiles_blueprint.cli.command('profile-token')
+def profile_token():
+    """Print a token that gets a request profiled when sent in the X-Profile header."""
+    click.echo(make_profile_token(current_app.config['SECRET_KEY']))
+    click.echo('Valid for {} seconds.'.format(current_app.config['PROFILE_TOKEN_MAX_AGE']), err=True)
+
+
+@profiles_blueprint.cli.command('memory-report')
+@click.option('--data-path', default=None, help='Catalog to load. Defaults to the one the app serves.')
+@click.option('--reviews', default=0, show_default=True,
+              help='Reviews to add after loading, from reviews.csv in the catalog if it has one, else made up.')
+@click.option('--top', default=10, show_default=True, help='Allocating lines to list.')
+def memory_report(data_path, reviews, top):
+    """Show the memory a catalog takes in each subsystem, and what adding reviews to it adds."""
+    data_path = data_path or current_app.config['DATA_PATH']
+    tracemalloc.start()
+    try:
+        repository = MemoryRepository()
+        memory_repository.populate(data_path, repository)
+        loaded = MemorySnapshot(repository.get_memory_roots())
+        click.echo(format_report(loaded.report(top=top)))
+
+        if reviews > 0:
+            add_reviews(repository, data_path, reviews)
+            click.echo()
+            click.echo(format_report(MemorySnapshot(repository.get_memory_roots()).report(loaded, top)))
+    finally:
+        tracemalloc.stop()
+
+
+def add_reviews(repository, data_path, count):
+    # The reviews of a catalog made by benchmarks.synthetic_catalog, or random ones by random users. Returns how many
+    # were added.
+    reviews_path = os.path.join(data_path, 'reviews.csv')
+    if os.path.exists(reviews_path):
+        rows = ((user_name, int(rank), int(rating), text)
+                for _, user_name, rank, rating, text in read_csv_file(reviews_path))
+    else:
+        rng = random.Random(235)
+        users = [user.user_name for user in repository.get_all_users()]
+        movies = repository.get_number_of_movies()
+        if not users or movies == 0:
+            return 0
+        rows = ((rng.choice(users), rng.randint(1, movies), rng.randint(1, 10), 'Review number {}'.format(number))
+                for number in range(count))
+    added = 0
+    for user_name, rank, rating, text in rows:
+        user, movie = repository.get_user(user_name), repository.get_movie(rank)
+        if user is not None and movie is not None:
+            repository.add_review(make_review(text, user, movie, rating))
+            added += 1
+            if added == count:
+                break
+    return added
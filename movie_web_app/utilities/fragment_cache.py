@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """ A bounded LRU cache of rendered template fragments, with hit and miss counts per fragment name. """
+
+    def __init__(self, max_entries: int = 256):
+        self.__max_entries = max_entries
+        self.__entries = OrderedDict()
+        self.__counts = dict()
+        self.__lock = threading.Lock()
+
+    def get_or_render(self, name, key, render):
+        """ Returns the fragment cached under (name, key), rendering and storing it with render() on a miss. """
+        key = (name, key)
+        with self.__lock:
+            counts = self.__counts.setdefault(name, {'hits': 0, 'misses': 0})
+            html = self.__entries.get(key)
+            if html is not None:
+                self.__entries.move_to_end(key)
+                counts['hits'] += 1
+                return html
+            counts['misses'] += 1
+
+        # Rendered outside the lock; two requests missing at once both render, and the later one is kept.
+        html = render()
+        with self.__lock:
+            self.__entries[key] = html
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+        return html
+
+    def stats(self):
+        """ Returns the hits, misses and hit rate of each fragment, the same totals over all fragments, and the number
+        of cached entries.
+        """
+        with self.__lock:
+            fragments = {name: dict(counts) for name, counts in self.__counts.items()}
+            entries = len(self.__entries)
+
+        hits = sum(counts['hits'] for counts in fragments.values())
+        misses = sum(counts['misses'] for counts in fragments.values())
+        for counts in fragments.values():
+            counts['hit_rate'] = hit_rate(counts['hits'], counts['misses'])
+        return {'hits': hits, 'misses': misses, 'hit_rate': hit_rate(hits, misses), 'entries': entries,
+                'fragments': fragments}
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+
+def hit_rate(hits, misses):
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+class FragmentCacheExtension(Extension):
+    """ Adds a {% cache name, key... %} ... {% endcache %} tag that renders its body once per distinct key.
+
+    The body is cached under the fragment name, the given key values and the environment's fragment_cache_key(),
+    which the application sets to whatever every fragment depends on (such as the catalog version). Pass the key
+    values a fragment depends on beyond that, e.g. the user name for a fragment showing who is logged in.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache(), fragment_cache_key=lambda: None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        key = list()
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render_fragment', [name, nodes.List(key)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, name, key, caller):
+        key = (tuple(key), self.environment.fragment_cache_key())
+        return self.environment.fragment_cache.get_or_render(name, key, caller)
@@ -0,0 +1,149 @@
+import gc
+import os
+import sys
+import tracemalloc
+import types
+from datetime import datetime
+
+from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.domain.model import Movie, Actor, Director, Genre, User, Review, WatchList
+
+# The order subsystems are counted in: an object reachable from several of them counts in the first only.
+SUBSYSTEMS = ('movies', 'facet indexes', 'search indexes', 'users', 'reviews', 'watch lists', 'caches')
+
+# The subsystem the objects of each domain class belong to. Counting a subsystem stops at the objects of the others,
+# so a User's reviews count as reviews, and a Review's movie as movies.
+OWNERS = {
+    Movie: 'movies', Actor: 'movies', Director: 'movies', Genre: 'movies',
+    User: 'users',
+    Review: 'reviews',
+    WatchList: 'watch lists',
+}
+
+# Objects shared by the whole program rather than held by a subsystem.
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.CodeType,
+                types.FrameType, AbstractRepository)
+
+# What tracemalloc itself allocates is left out of its statistics.
+TRACEMALLOC_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<unknown>')]
+
+
+class MemorySnapshot:
+    """ The bytes held by each subsystem at one moment, with the process's resident size and, if tracemalloc is
+    tracing, its snapshot of the allocations made since it started.
+    """
+
+    def __init__(self, roots):
+        self.taken = datetime.now()
+        self.subsystems = subsystem_sizes(roots)
+        self.resident_bytes = resident_bytes()
+        self.traced = None
+        if tracemalloc.is_tracing():
+            self.traced = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+
+    def report(self, baseline: 'MemorySnapshot' = None, top: int = 10):
+        """ Returns the sizes as a dict, with the lines that allocated the most of the traced memory and, given an
+        earlier snapshot in baseline, the change in every size and the lines whose allocations changed the most.
+        """
+        report = {
+            'taken': self.taken.isoformat(timespec='seconds'),
+            'resident_bytes': self.resident_bytes,
+            'subsystems': dict(self.subsystems),
+            'traced_bytes': None,
+            'top_allocations': [],
+        }
+        if self.traced is not None:
+            statistics = self.traced.statistics('lineno')
+            report['traced_bytes'] = sum(statistic.size for statistic in statistics)
+            report['top_allocations'] = [allocation(statistic.traceback, statistic.size, statistic.count)
+                                         for statistic in statistics[:top]]
+        if baseline is not None:
+            report['delta'] = {
+                'since': baseline.taken.isoformat(timespec='seconds'),
+                'resident_bytes': difference(self.resident_bytes, baseline.resident_bytes),
+                'subsystems': {subsystem: size - baseline.subsystems.get(subsystem, 0)
+                               for subsystem, size in self.subsystems.items()},
+                'top_allocations': [],
+            }
+            if self.traced is not None and baseline.traced is not None:
+                report['delta']['top_allocations'] = [
+                    allocation(statistic.traceback, statistic.size_diff, statistic.count_diff)
+                    for statistic in self.traced.compare_to(baseline.traced, 'lineno')[:top]]
+        return report
+
+
+def subsystem_sizes(roots):
+    """ Returns the bytes held by each subsystem, given lists of the objects they hold by subsystem name: everything
+    reachable from them that no earlier subsystem holds, short of the domain objects of other subsystems.
+    """
+    seen = set()
+    sizes = dict()
+    for subsystem in sorted(roots, key=lambda name: SUBSYSTEMS.index(name) if name in SUBSYSTEMS else len(SUBSYSTEMS)):
+        size = 0
+        pending = list(roots[subsystem])
+        while pending:
+            obj = pending.pop()
+            if id(obj) in seen or isinstance(obj, SHARED_TYPES) or OWNERS.get(type(obj), subsystem) != subsystem:
+                continue
+            seen.add(id(obj))
+            size += sys.getsizeof(obj)
+            pending.extend(gc.get_referents(obj))
+        sizes[subsystem] = size
+    return sizes
+
+
+def resident_bytes():
+    # The resident set size on Linux; None where /proc is not available.
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def allocation(traceback, size, count):
+    frame = traceback[0]
+    filename = frame.filename
+    if filename.startswith(os.getcwd() + os.sep):
+        filename = os.path.relpath(filename)
+    return {'line': '{}:{}'.format(filename, frame.lineno), 'bytes': size, 'blocks': count}
+
+
+def difference(value, earlier):
+    return None if value is None or earlier is None else value - earlier
+
+
+def format_report(report) -> str:
+    """ Returns report as text, for the command line. """
+    lines = ['Memory at {}'.format(report['taken'])]
+    delta = report.get('delta')
+    if delta is not None:
+        lines[0] += ', change since {}'.format(delta['since'])
+
+    def row(name, size, change=None):
+        text = '  {:<40} {:>12}'.format(name, megabytes(size))
+        if delta is not None:
+            text += ' {:>12}'.format(megabytes(change, sign=True))
+        return text
+
+    lines.append(row('resident', report['resident_bytes'], delta and delta['resident_bytes']))
+    for subsystem, size in report['subsystems'].items():
+        lines.append(row(subsystem, size, delta and delta['subsystems'].get(subsystem)))
+    if report['traced_bytes'] is None:
+        lines.append('Allocations are not traced; start with PYTHONTRACEMALLOC=1 to see where memory was allocated.')
+    else:
+        lines.append(row('traced by tracemalloc', report['traced_bytes']))
+        lines.append('Largest allocations:')
+        lines.extend('  {:<60} {:>12}'.format(entry['line'][-60:], megabytes(entry['bytes']))
+                     for entry in report['top_allocations'])
+        if delta is not None and delta['top_allocations']:
+            lines.append('Largest changes:')
+            lines.extend('  {:<60} {:>12}'.format(entry['line'][-60:], megabytes(entry['bytes'], sign=True))
+                         for entry in delta['top_allocations'])
+    return '\n'.join(lines)
+
+
+def megabytes(size, sign=False):
+    if size is None:
+        return '-'
+    return ('{:+.1f} MB' if sign else '{:.1f} MB').format(size / 1e6)
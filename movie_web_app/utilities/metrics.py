@@ -0,0 +1,182 @@
+import functools
+import threading
+from time import perf_counter
+from bisect import bisect_left
+
+from jinja2 import Template
+
+# The phases a request's time is split into. Time not spent in any of them, in the view functions themselves,
+# goes to 'other', so the phases of a request add up to its total time.
+PHASES = ('repo', 'dto', 'upstream', 'render', 'other')
+
+# Upper bounds, in seconds, of the histogram buckets; Prometheus adds the +Inf bucket.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class Histogram:
+    """ Counts of observed durations per bucket, with their sum, in the shape of a Prometheus histogram. """
+
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self):
+        # One count per bucket plus the +Inf bucket; each value counts only in the first bucket it fits in.
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def cumulative_counts(self):
+        # The count of every bucket including the ones below it, as Prometheus expects.
+        running = 0
+        for count in self.counts:
+            running += count
+            yield running
+
+
+class PhaseTimer:
+    """ Splits the time of one request between phases. Only one phase runs at a time: entering a phase pauses the
+    one it was entered from, so time spent in a repository call made while rendering counts as 'repo' only.
+    """
+
+    __slots__ = ('endpoint', 'phase', 'started', 'request_started', 'totals')
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.phase = 'other'
+        self.started = self.request_started = perf_counter()
+        self.totals = dict.fromkeys(PHASES, 0.0)
+
+    def switch(self, phase: str) -> str:
+        """ Ends the current phase and starts phase, returning the phase that was ended. """
+        now = perf_counter()
+        self.totals[self.phase] += now - self.started
+        previous, self.phase, self.started = self.phase, phase, now
+        return previous
+
+    def finish(self):
+        """ Returns the total time of the request and the time of each phase. """
+        self.switch('other')
+        return self.started - self.request_started, self.totals
+
+
+def start_request(endpoint: str):
+    _local.timer = PhaseTimer(endpoint)
+
+
+def finish_request():
+    """ Returns the endpoint, the total time and the phase times of the request started on this thread, or None if
+    none was.
+    """
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        return None
+    _local.timer = None
+    return (timer.endpoint,) + timer.finish()
+
+
+def timed(phase: str):
+    """ Decorates a function so that its calls are counted in phase by the request running on the thread, if any. """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            timer = getattr(_local, 'timer', None)
+            if timer is None or timer.phase == phase:
+                return function(*args, **kwargs)
+            previous = timer.switch(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer.switch(previous)
+        return wrapper
+    return decorator
+
+
+def instrument(target, phase: str, names):
+    """ Returns a stand-in for the object target that counts calls of its methods names in phase. """
+    return Instrumented(target, phase, names)
+
+
+class Instrumented:
+    """ Forwards everything to the object it wraps, with some of its methods timed. The wrapped object is left as it
+    was, so it still pickles (as a repository does for a snapshot).
+    """
+
+    def __init__(self, target, phase: str, names):
+        self.__target = target
+        for name in names:
+            setattr(self, name, timed(phase)(getattr(target, name)))
+
+    def __getattr__(self, name):
+        return getattr(self.__target, name)
+
+
+class TimedTemplate(Template):
+    """ A Jinja template whose rendering is counted in the 'render' phase; set as the environment's template_class. """
+
+    render = timed('render')(Template.render)
+
+
+class RequestMetrics:
+    """ Histograms of request times per endpoint, and of the time each phase takes per endpoint and request. """
+
+    def __init__(self):
+        self.__requests = dict()
+        self.__phases = dict()
+        self.__lock = threading.Lock()
+
+    def record(self, endpoint: str, total: float, phases):
+        with self.__lock:
+            histogram = self.__requests.get(endpoint)
+            if histogram is None:
+                histogram = self.__requests[endpoint] = Histogram()
+                for phase in PHASES:
+                    self.__phases[endpoint, phase] = Histogram()
+            histogram.observe(total)
+            for phase, seconds in phases.items():
+                self.__phases[endpoint, phase].observe(seconds)
+
+    def exposition(self) -> str:
+        """ Returns the histograms in the Prometheus text exposition format. """
+        with self.__lock:
+            requests = [((('endpoint', endpoint),), copy_histogram(histogram))
+                        for endpoint, histogram in sorted(self.__requests.items())]
+            phases = [((('endpoint', endpoint), ('phase', phase)), copy_histogram(histogram))
+                      for (endpoint, phase), histogram in sorted(self.__phases.items())]
+
+        lines = list()
+        write_histogram(lines, 'movie_web_app_request_duration_seconds', 'Time taken to handle a request.', requests)
+        write_histogram(lines, 'movie_web_app_request_phase_duration_seconds',
+                        'Time a request spent in each phase: repository access, conversion to dicts, upstream HTTP '
+                        'calls, template rendering and everything else.', phases)
+        return '\n'.join(lines) + '\n'
+
+
+def copy_histogram(histogram):
+    copied = Histogram()
+    copied.counts = list(histogram.counts)
+    copied.sum = histogram.sum
+    return copied
+
+
+def write_histogram(lines, name, description, histograms):
+    lines.append('# HELP {} {}'.format(name, description))
+    lines.append('# TYPE {} histogram'.format(name))
+    for labels, histogram in histograms:
+        label_text = ','.join('{}="{}"'.format(label, escape_label(value)) for label, value in labels)
+        cumulative = list(histogram.cumulative_counts())
+        for bound, count in zip(BUCKETS + ('+Inf',), cumulative):
+            lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, label_text, bound, count))
+        lines.append('{}_sum{{{}}} {!r}'.format(name, label_text, histogram.sum))
+        lines.append('{}_count{{{}}} {}'.format(name, label_text, cumulative[-1]))
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
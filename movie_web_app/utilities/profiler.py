@@ -0,0 +1,174 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from time import perf_counter
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# The request header carrying a token from `flask profile-token`, asking for the request to be profiled.
+PROFILE_HEADER = 'X-Profile'
+FORMATS = {'pstats': '.pstats', 'collapsed': '.collapsed'}
+
+# <time>-<milliseconds>ms-<method><path>.<format>, e.g. 20201018-153012-123456-0042ms-GET~movies_by_rank.pstats
+PROFILE_NAME = re.compile(r'^(\d{8}-\d{6}-\d{6})-(\d+)ms-([A-Z]+)(.*)\.(pstats|collapsed)$')
+
+
+def token_serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt='request-profile')
+
+
+def make_profile_token(secret_key) -> str:
+    return token_serializer(secret_key).dumps('profile')
+
+
+def valid_profile_token(secret_key, token, max_age: int) -> bool:
+    # Without a secret key, no token is valid.
+    if not token or not secret_key:
+        return False
+    try:
+        return token_serializer(secret_key).loads(token, max_age=max_age) == 'profile'
+    except BadSignature:
+        return False
+
+
+class StackProfiler:
+    """ Records the time spent in every call stack of the thread it is enabled on, for writing as collapsed stacks,
+    the input format of flamegraph.pl and speedscope. Times are exclusive: a function's calls are not counted in it.
+    """
+
+    def __init__(self):
+        # Open calls, as [stack, start time, time spent in the calls made from it].
+        self.__calls = list()
+        self.__stacks = Counter()
+
+    def enable(self):
+        sys.setprofile(self.__trace)
+
+    def disable(self):
+        sys.setprofile(None)
+        # Calls still open, such as the one disabling the profiler, have no end to time.
+        self.__calls.clear()
+
+    def collapsed(self) -> str:
+        """ Returns a line per call stack: its frames from the outermost, separated by ';', and its microseconds. """
+        return ''.join('{} {}\n'.format(stack, round(seconds * 1e6))
+                       for stack, seconds in sorted(self.__stacks.items()) if seconds >= 5e-7)
+
+    def __trace(self, frame, event, arg):
+        if event == 'call' or event == 'c_call':
+            name = frame_name(frame.f_code) if event == 'call' else c_function_name(arg)
+            stack = self.__calls[-1][0] + ';' + name if self.__calls else name
+            self.__calls.append([stack, perf_counter(), 0.0])
+        elif self.__calls:
+            # 'return', 'c_return' or 'c_exception'. Returns from calls made before the profiler was enabled find
+            # no open call, and are skipped.
+            stack, started, in_calls = self.__calls.pop()
+            elapsed = perf_counter() - started
+            self.__stacks[stack] += elapsed - in_calls
+            if self.__calls:
+                self.__calls[-1][2] += elapsed
+
+
+def frame_name(code) -> str:
+    return '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+def c_function_name(function) -> str:
+    module = getattr(function, '__module__', None)
+    qualified_name = getattr(function, '__qualname__', repr(function))
+    return '{}.{}'.format(module, qualified_name) if module else qualified_name
+
+
+class ProfilingMiddleware:
+    """ WSGI middleware profiling the requests that carry a valid token in the X-Profile header, and a sample_rate
+    share of all requests, and writing each profile to a file in directory. Other requests cost a header lookup, or
+    a random number when sampling is on.
+
+    Profiles are written in the pstats format of cProfile, or as collapsed stacks; only the newest keep are kept.
+    """
+
+    def __init__(self, wsgi_app, directory: str, secret_key, sample_rate: float = 0.0, profile_format: str = 'pstats',
+                 token_max_age: int = 3600, keep: int = 200):
+        if profile_format not in FORMATS:
+            raise ValueError('Profile format must be one of ' + ', '.join(FORMATS))
+        self.__wsgi_app = wsgi_app
+        self.__directory = directory
+        self.__secret_key = secret_key
+        self.__sample_rate = sample_rate
+        self.__format = profile_format
+        self.__token_max_age = token_max_age
+        self.__keep = keep
+        self.__lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        token = environ.get('HTTP_X_PROFILE')
+        sampled = self.__sample_rate > 0 and random.random() < self.__sample_rate
+        if not sampled and (token is None or not valid_profile_token(self.__secret_key, token,
+                                                                     self.__token_max_age)):
+            return self.__wsgi_app(environ, start_response)
+        return self.__profile(environ, start_response)
+
+    def __profile(self, environ, start_response):
+        profiler = cProfile.Profile() if self.__format == 'pstats' else StackProfiler()
+        start = perf_counter()
+        profiler.enable()
+        try:
+            # The response body is read inside the profile, so streamed responses are profiled to the end. The
+            # iterable is closed here, as a server would, since the one handed back is a plain list.
+            app_iter = self.__wsgi_app(environ, start_response)
+            try:
+                body = list(app_iter)
+            finally:
+                close = getattr(app_iter, 'close', None)
+                if close is not None:
+                    close()
+        finally:
+            profiler.disable()
+            elapsed = perf_counter() - start
+            self.__write(profiler, environ, elapsed)
+        return body
+
+    def __write(self, profiler, environ, elapsed):
+        # The path is made safe for a file name and a URL, with '~' for '/' and '_' for anything else unsafe, and cut
+        # short so that the name is not too long.
+        path = re.sub(r'[^A-Za-z0-9_.~-]', '_', environ.get('PATH_INFO', '').replace('/', '~'))[:100]
+        name = '{}-{:04.0f}ms-{}{}{}'.format(datetime.now().strftime('%Y%m%d-%H%M%S-%f'), elapsed * 1000,
+                                             environ.get('REQUEST_METHOD', 'GET'), path, FORMATS[self.__format])
+        with self.__lock:
+            os.makedirs(self.__directory, exist_ok=True)
+            if self.__format == 'pstats':
+                profiler.dump_stats(os.path.join(self.__directory, name))
+            else:
+                with open(os.path.join(self.__directory, name), 'w') as profile_file:
+                    profile_file.write(profiler.collapsed())
+            for old_profile in list_profiles(self.__directory)[self.__keep:]:
+                os.remove(os.path.join(self.__directory, old_profile['name']))
+
+
+def list_profiles(directory: str, limit: int = None):
+    """ Returns the profiles written to directory, newest first, as dicts of their file name, the time they were
+    taken, the request's method, path and duration, and the file's format and size.
+    """
+    if not os.path.isdir(directory):
+        return []
+    profiles = list()
+    for name in os.listdir(directory):
+        match = PROFILE_NAME.match(name)
+        if match is not None:
+            taken, milliseconds, method, path, profile_format = match.groups()
+            profiles.append({
+                'name': name,
+                'taken': datetime.strptime(taken, '%Y%m%d-%H%M%S-%f'),
+                'method': method,
+                'path': path.replace('~', '/'),
+                'milliseconds': int(milliseconds),
+                'format': profile_format,
+                'size': os.path.getsize(os.path.join(directory, name)),
+            })
+    profiles.sort(key=lambda profile: profile['taken'], reverse=True)
+    return profiles[:limit]
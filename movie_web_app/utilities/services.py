@@ -3,6 +3,7 @@ import random
 
 from movie_web_app.adapters.repository import AbstractRepository
 from movie_web_app.domain.model import Movie
+from movie_web_app.utilities.metrics import timed
 
 
 def get_years(repo: AbstractRepository):
@@ -32,6 +33,7 @@ def get_movies_in_rank(quantity, repo: AbstractRepository):
 # Functions to convert dicts to model entities
 # ============================================
 
+@timed('dto')
 def movie_to_dict(movie: Movie):
     movie_dict = {
         'rank': movie.rank,
@@ -41,5 +43,6 @@ def movie_to_dict(movie: Movie):
     return movie_dict
 
 
+@timed('dto')
 def movies_to_dict(movies: Iterable[Movie]):
     return [movie_to_dict(movie) for movie in movies]
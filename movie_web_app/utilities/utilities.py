@@ -1,44 +1,109 @@
-from flask import Blueprint, request, render_template, redirect, url_for, session
+import os
+import time
+
+import click
+from flask import Blueprint, request, render_template, redirect, url_for, session, current_app
 
 import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.snapshot import SnapshotException, read_header, write_snapshot
 import movie_web_app.utilities.services as services
 
 
 # Configure Blueprint.
 utilities_blueprint = Blueprint(
-    'utilities_bp', __name__)
+    'utilities_bp', __name__, cli_group=None)
 
 
-def get_rank_and_url():
-    rank_urls = dict()
-    for rank in range(1000):
-        rank_urls[rank] = url_for('movies_bp.movies_by_rank', rank=rank)
+def get_navigation():
+    """ Returns the navigation data shown on every page, built once per catalog version and shared by all requests.
 
-    return rank_urls
+    The data is kept in the app's extensions, one entry per script root since the urls depend on it, and is rebuilt
+    when the repository is replaced or reports a new catalog version. It is shared, so callers must not modify it.
+    """
+    navigation_cache = current_app.extensions.setdefault('navigation', dict())
+    repository = repo.repo_instance
+    catalog_version = repository.get_catalog_version()
 
+    entry = navigation_cache.get(request.script_root)
+    if entry is None or entry[0] is not repository or entry[1] != catalog_version:
+        entry = (repository, catalog_version, build_navigation(repository))
+        navigation_cache[request.script_root] = entry
+    return entry[2]
 
-def get_years_and_urls():
-    year_list = services.get_years(repo.repo_instance)
-    year_urls = dict()
-    for year in year_list:
-        year_urls[year] = url_for('movies_bp.movies_by_year', release_year=year)
 
-    return year_urls
+def fragment_cache_key():
+    # The partials cached in the templates render the navigation data, so they are cached per catalog version too.
+    repository = repo.repo_instance
+    return request.script_root, repository, repository.get_catalog_version()
 
 
-def get_genres_and_urls():
-    genres_list = services.get_genres_list(repo.repo_instance)
+def build_navigation(repository):
+    rank_urls = dict()
+    for movie in repository.all_movies():
+        rank_urls[movie.rank] = url_for('movies_bp.movies_by_rank', rank=movie.rank)
+
+    year_urls = dict()
+    for year in services.get_years(repository):
+        year_urls[year] = url_for('movies_bp.movies_by_year', release_year=year)
+
     genre_urls = dict()
-    for genre in genres_list:
+    for genre in services.get_genres_list(repository):
         genre_urls[genre] = url_for('movies_bp.movies_by_genre', genre=genre)
 
-    return genre_urls
+    return {
+        'rank_urls': rank_urls,
+        'year_urls': year_urls,
+        'genre_urls': genre_urls,
+        'selected_movies': dict(),
+    }
 
 
-def get_selected_movies(quantity = 10):
-    movies = services.get_movies_in_rank(quantity, repo.repo_instance)
+def get_rank_and_url():
+    return get_navigation()['rank_urls']
+
+
+def get_years_and_urls():
+    return get_navigation()['year_urls']
+
 
-    for movie in movies:
-        movie['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=movie['rank'])
+def get_genres_and_urls():
+    return get_navigation()['genre_urls']
+
+
+def get_selected_movies(quantity = 10):
+    selected_movies = get_navigation()['selected_movies']
+    movies = selected_movies.get(quantity)
+    if movies is None:
+        movies = services.get_movies_in_rank(quantity, repo.repo_instance)
+        for movie in movies:
+            movie['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=movie['rank'])
+        selected_movies[quantity] = movies
     return movies
 
+
+@utilities_blueprint.cli.command('write-snapshot')
+@click.option('--path', default=None, help='Snapshot file. Defaults to the SNAPSHOT_PATH setting.')
+def write_repository_snapshot(path):
+    """Parse the CSV files and save the populated repository as a binary snapshot."""
+    if path is None:
+        path = current_app.config['SNAPSHOT_PATH']
+    if path is None:
+        raise click.ClickException('SNAPSHOT_PATH is not set; pass --path.')
+    # Whether or not this process has the journal open, a snapshot written by compaction holds changes found nowhere
+    # else.
+    try:
+        header = read_header(path) if os.path.exists(path) else None
+    except SnapshotException:
+        header = None
+    if header is not None and header.get('journal') is not None:
+        raise click.ClickException('{} holds changes compacted from the journal; rebuilding it from the CSV files '
+                                   'would lose them. Remove it first to rebuild it anyway.'.format(path))
+
+    # Built from the CSV files rather than taken from the running app, which may itself have come from a snapshot.
+    start = time.perf_counter()
+    repository = MemoryRepository(current_app.config['SEARCH_MAX_EDIT_DISTANCE'],
+                                  current_app.config['AUTOCOMPLETE_LIMIT'])
+    populate(current_app.config['DATA_PATH'], repository, workers=current_app.config['INGEST_WORKERS'])
+    size = write_snapshot(repository, path, current_app.config['DATA_PATH'])
+    click.echo('Wrote {} ({:.1f} MB) in {:.1f}s.'.format(path, size / 1e6, time.perf_counter() - start))
@@ -4,6 +4,7 @@ import pytest
 from movie_web_app import create_app
 from movie_web_app.adapters import memory_repository
 from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.omdb_stub import OMDbStubServer
 
 
 TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
@@ -16,12 +17,24 @@ def in_memory_repo():
     return repo
 
 
+@pytest.fixture(scope='session')
+def omdb_server():
+    server = OMDbStubServer(TEST_DATA_PATH).start()
+    yield server
+    server.stop()
+
+
 @pytest.fixture
-def client():
+def client(omdb_server, tmp_path):
     my_app = create_app({
         'TESTING': True,                                # Set to True during testing.
         'TEST_DATA_PATH': TEST_DATA_PATH,               # Path for loading test data into the repository.
-        'WTF_CSRF_ENABLED': False                       # test_client will not send a CSRF token, so disable validation.
+        'WTF_CSRF_ENABLED': False,                      # test_client will not send a CSRF token, so disable validation.
+        'OMDB_URL': omdb_server.url,                    # Serve posters from the local OMDb stand-in.
+        'POSTER_CACHE_PATH': None,                      # Keep the poster cache in memory only.
+        'SNAPSHOT_PATH': None,                          # Always load the test data from CSV.
+        'JOURNAL_PATH': None,                           # Keep changes made by tests in memory only.
+        'PROFILE_DIR': str(tmp_path / 'profiles'),      # Write request profiles where each test can find its own.
     })
 
     return my_app.test_client()
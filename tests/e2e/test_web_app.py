@@ -2,6 +2,12 @@ import pytest
 
 from flask import session
 
+import movie_web_app.adapters.repository as repo
+import movie_web_app.movies.services as services
+import movie_web_app.utilities.utilities as utilities
+from movie_web_app.domain.model import Movie
+from movie_web_app.utilities.profiler import list_profiles, make_profile_token
+
 def test_register(client):
     response_code = client.get('/authentication/register').status_code
     assert response_code == 200
@@ -156,9 +162,15 @@ def test_search_with_actor(client):
     assert response.status_code == 200
 
     assert b'Search result: Chris Pratt' in response.data
-    assert b'Jurassic World' in response.data
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'Passengers' in response.data
     assert b'Chris Pratt' in response.data
 
+    # Movies where Chris Pratt is not the first-listed actor are found as well.
+    response = client.get('/movies_by_search?q=Chris+Pratt&cursor=2')
+    assert b'The Magnificent Seven' in response.data
+    assert b'Jurassic World' in response.data
+
 
 def test_search_with_release_year(client):
     response = client.get('/movies_by_search?q=2014')
@@ -182,3 +194,146 @@ def test_search_with_unknown_result(client):
     assert response.status_code == 200
 
     assert b'Search result: Not Found'
+
+
+def test_search_with_typo(client):
+    response = client.get('/movies_by_search?q=Chris+Prat')
+    assert response.status_code == 200
+
+    assert b'Showing results for <b>Chris Pratt</b>' in response.data
+    assert b'Did you mean' in response.data
+    assert b'Guardians of the Galaxy' in response.data
+
+
+def test_search_keeps_the_suggestions_when_the_correction_finds_nothing(client, monkeypatch):
+    monkeypatch.setattr(services, 'get_search_suggestions', lambda *args: ['Zzyzx', 'Chris Pratt'])
+    response = client.get('/movies_by_search?q=Zzyzy')
+    assert response.status_code == 200
+
+    assert b'Search result: Not Found' in response.data
+    assert b'Did you mean' in response.data
+    assert b'q=Chris+Pratt' in response.data
+
+
+def test_autocomplete(client):
+    response = client.get('/api/autocomplete?q=Guardians')
+    assert response.status_code == 200
+
+    completions = response.get_json()['completions']
+    assert completions[0] == {'name': 'Guardians of the Galaxy', 'kinds': ['title']}
+
+
+def test_autocomplete_with_limit(client):
+    response = client.get('/api/autocomplete?q=a&limit=2')
+    assert len(response.get_json()['completions']) == 2
+
+    response = client.get('/api/autocomplete?q=')
+    assert response.get_json()['completions'] == []
+
+
+def test_movies_can_be_filtered_sorted_and_aggregated(client):
+    response = client.get('/api/movies?min_release_year=2010&max_release_year=2012&min_rating=8'
+                          '&order_by=votes&descending=1&limit=2')
+    assert response.status_code == 200
+
+    result = response.get_json()
+    assert result['total'] == 16
+    assert [movie['title'] for movie in result['movies']] == ['Inception', 'The Dark Knight Rises']
+    assert result['aggregates']['rating']['min'] == 8.0
+
+    assert client.get('/api/movies?order_by=budget').status_code == 400
+
+
+def test_movies_can_be_browsed_by_facets(client):
+    response = client.get('/movies/browse?genre=Action&genre=Sci-Fi&min_year=2014&max_year=2016')
+    assert response.status_code == 200
+    assert b'32 movies found' in response.data
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'Adventure (23)' in response.data
+    assert b'2015 (10)' in response.data
+    assert b'/movies/browse?genre=Action&amp;genre=Sci-Fi&amp;min_year=2014&amp;max_year=2016&amp;cursor=2' in \
+        response.data
+
+    response = client.get('/movies/browse?director=Christopher+Nolan&min_rating=8.6')
+    assert b'3 movies found' in response.data
+    assert b'Directors:' not in response.data
+
+
+def test_navigation_is_cached_until_the_catalog_changes(client):
+    with client.application.test_request_context('/'):
+        navigation = utilities.get_navigation()
+        assert utilities.get_navigation() is navigation
+        assert utilities.get_rank_and_url()[1000] == '/movies_by_rank?rank=1000'
+
+        movie = Movie('Zootropolis', 2016)
+        movie.rank = 1001
+        repo.repo_instance.add_movie(movie)
+        repo.repo_instance.add_movie_rank(1001, movie)
+
+        assert utilities.get_navigation() is not navigation
+        assert utilities.get_rank_and_url()[1001] == '/movies_by_rank?rank=1001'
+
+
+def test_fragments_are_cached_per_user(client, auth):
+    client.get('/')
+    client.get('/')
+    stats = client.get('/api/cache_stats').get_json()['fragments']
+    assert stats['fragments']['sidebar'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert stats['fragments']['navigation']['hits'] == 1
+
+    auth.login()
+    response = client.get('/')
+    assert b'Hello, thorke' in response.data
+    assert client.get('/api/cache_stats').get_json()['fragments']['fragments']['topbar']['misses'] == 2
+
+    client.get('/authentication/logout')
+    response = client.get('/')
+    assert b'Hello, thorke' not in response.data
+
+
+def test_metrics_time_requests_by_endpoint_and_phase(client):
+    client.get('/')
+    client.get('/movies_by_rank?rank=3')
+    client.get('/movies_by_rank?rank=4')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert 'movie_web_app_request_duration_seconds_count{endpoint="home_bp.home"} 1' in text
+    assert 'movie_web_app_request_duration_seconds_count{endpoint="movies_bp.movies_by_rank"} 2' in text
+    for phase in ('repo', 'dto', 'upstream', 'render', 'other'):
+        assert 'movie_web_app_request_phase_duration_seconds_count{{endpoint="movies_bp.movies_by_rank",phase="{}"}} 2' \
+            .format(phase) in text
+    assert 'metrics_bp' not in text
+
+
+def test_requests_are_profiled_on_demand(client):
+    token = make_profile_token(client.application.config['SECRET_KEY'])
+
+    assert client.get('/profiles/').status_code == 403
+    client.get('/movies_by_rank?rank=3')
+    assert b'No profiles yet' in client.get('/profiles/', headers={'X-Profile': token}).data
+
+    client.get('/movies_by_rank?rank=3', headers={'X-Profile': token})
+    response = client.get('/profiles/?token=' + token)
+    assert b'GET /movies_by_rank' in response.data
+
+    name = list_profiles(client.application.config['PROFILE_DIR'])[0]['name']
+    response = client.get('/profiles/{}?token={}'.format(name, token))
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    assert client.get('/profiles/{}'.format(name)).status_code == 403
+
+
+def test_memory_report_shows_the_change_since_a_baseline(client):
+    token = make_profile_token(client.application.config['SECRET_KEY'])
+
+    assert client.get('/profiles/memory').status_code == 403
+    report = client.get('/profiles/memory?baseline=1', headers={'X-Profile': token}).get_json()
+    assert report['subsystems']['movies'] > 0
+    assert 'caches' in report['subsystems']
+    assert 'delta' not in report
+
+    report = client.get('/profiles/memory?token=' + token).get_json()
+    assert set(report['delta']['subsystems']) == set(report['subsystems'])
@@ -1,4 +1,5 @@
 from movie_web_app.domain.model import Movie, Actor, Genre, Director, User, Review, WatchList, make_review
+from movie_web_app.domain.registry import EntityRegistry
 import pytest
 
 @pytest.fixture()
@@ -67,3 +68,35 @@ def test_watchlist_construction(watchlist):
     assert repr(watchlist.select_movie_to_watch(1)) == '<Movie Guardians of the Galaxy, 2012>'
     assert watchlist.select_movie_to_watch(3) == None
 
+
+def test_registry_hands_out_one_entity_per_name():
+    registry = EntityRegistry()
+    assert registry.actor(' Anne Hathaway') is registry.actor('Anne Hathaway') == Actor('Anne Hathaway')
+    assert registry.director('Ron Clements') is registry.director('Ron Clements')
+    assert registry.genre('Animation') is registry.genre('Animation')
+    assert registry.size == 3
+
+def test_entities_have_no_instance_dict_and_make_lists_when_first_needed(movie, user):
+    assert not hasattr(movie, '__dict__') and not hasattr(user, '__dict__')
+    assert movie.actors == [] and movie.genres == [] and list(movie.reviews) == []
+    assert user.reviews == [] and user.watched_movies == []
+
+    movie.add_genre(Genre('Animation'))
+    review = make_review('Lovely', user, movie, 9)
+    assert movie.genres == [Genre('Animation')]
+    assert list(movie.reviews) == user.reviews == [review]
+
+
+def test_lists_asked_for_while_empty_keep_what_is_added_to_them(movie, user):
+    actors, genres = movie.actors, movie.genres
+    watched_movies, reviews = user.watched_movies, user.reviews
+    actors.append(Actor('Auli\'i Cravalho'))
+    genres.append(Genre('Animation'))
+    watched_movies.append(movie)
+    reviews.append(make_review('Lovely', User('Dave', 'pw12345678'), movie, 9))
+
+    assert movie.actors == [Actor('Auli\'i Cravalho')] and movie.genres == [Genre('Animation')]
+    assert user.watched_movies == [movie] and len(user.reviews) == 1
+
+    movie.add_actor(Actor('Dwayne Johnson'))
+    assert movie.actors is actors and len(actors) == 2
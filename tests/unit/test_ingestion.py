@@ -0,0 +1,101 @@
+import csv
+import os
+
+from benchmarks import synthetic_catalog
+from movie_web_app.adapters import memory_repository, sqlite_repository
+from movie_web_app.adapters.ingestion import MovieIngestion, parse_chunk, read_chunks
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
+from movie_web_app.domain.movie_file_csv_reader import MovieFileCSVReader
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+HEADER = ['Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)', 'Rating',
+          'Votes', 'Revenue (Millions)', 'Metascore']
+
+
+def test_chunks_end_at_the_end_of_a_record(tmp_path):
+    path = str(tmp_path / 'movies.csv')
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(HEADER)
+        for rank in range(1, 51):
+            writer.writerow([rank, 'Movie {}'.format(rank), 'Drama,Comedy', 'A "quoted"\nline,\nand more', 'Someone',
+                             'An Actor, Another Actor', 2010, 100, 7.5, 1000, 'N/A', ''])
+
+    chunks = list(read_chunks(path, chunk_bytes=200))
+    assert len(chunks) > 10
+    rows = [fields for chunk in chunks for fields in parse_chunk(chunk)[0]]
+    assert [fields[0] for fields in rows] == list(range(1, 51))
+    assert rows[0][3] == 'A "quoted"\nline,\nand more'
+    assert rows[0][6] == ('An Actor', 'Another Actor')
+    assert rows[0][10:] == (None, None)
+
+
+def test_movie_files_are_read_as_utf_8(tmp_path):
+    # Whatever the locale, as the data is saved with a byte order mark and has titles like this one.
+    path = str(tmp_path / 'movies.csv')
+    with open(path, 'w', encoding='utf-8-sig', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(HEADER)
+        writer.writerow([1, 'Amélie', 'Comedy,Romance', 'A shy waitress', 'Jean-Pierre Jeunet', 'Audrey Tautou', 2001,
+                         122, 8.3, 700000, 33.2, 69])
+
+    assert [fields[1] for chunk in read_chunks(path) for fields in parse_chunk(chunk)[0]] == ['Amélie']
+    reader = MovieFileCSVReader(path)
+    reader.read_csv_file()
+    assert reader.rank_of_movies['1'].title == 'Amélie'
+    assert list(reader.movies_with_given_director) == ['Jean-Pierre Jeunet']
+
+
+def test_user_files_are_read_as_utf_8(tmp_path):
+    path = str(tmp_path / 'user.csv')
+    with open(path, 'w', encoding='utf-8-sig', newline='') as csvfile:
+        csv.writer(csvfile).writerows([['id', 'username', 'password'], [1, 'zoë', 'plain$pässword1']])
+
+    assert list(memory_repository.read_csv_file(path)) == [['1', 'zoë', 'plain$pässword1']]
+
+
+def test_parallel_ingestion_loads_the_same_repository(tmp_path):
+    data_path = str(tmp_path / 'catalog')
+    movies_path = synthetic_catalog.generate(data_path, 3000, users=10, reviews=0)[0]
+    sequential = MemoryRepository()
+    memory_repository.load_movies(data_path, sequential, workers=1)
+
+    parallel = MemoryRepository()
+    ingestion = MovieIngestion(movies_path, parallel.registry, workers=3, chunk_bytes=20000)
+    for movies, facets in ingestion:
+        for movie in movies:
+            parallel.add_movie(movie)
+            parallel.add_movie_rank(movie.rank, movie)
+        parallel.add_movie_facets(facets)
+
+    assert ingestion.rows == 3000 and ingestion.rows_per_second > 0
+    assert [movie.rank for movie in parallel.all_movies()] == list(range(1, 3001))
+    assert parallel.get_year_list() == sequential.get_year_list()
+    assert parallel.get_genre_list() == sequential.get_genre_list()
+    movie = sequential.get_movie(1234)
+    assert parallel.get_movie(1234).description == movie.description
+    assert parallel.get_movie_with_given_director(movie.director.director_full_name) == \
+        sequential.get_movie_with_given_director(movie.director.director_full_name)
+    for actor in movie.actors:
+        assert parallel.get_movie_with_given_actor(actor.actor_full_name) == \
+            sequential.get_movie_with_given_actor(actor.actor_full_name)
+    assert parallel.search_movies('the') == sequential.search_movies('the')
+
+    sqlite_repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    sqlite_repository.populate(data_path, sqlite_repo, workers=2)
+    assert sqlite_repo.get_number_of_movies() == 3000
+    assert sqlite_repo.get_movie(1234).title == movie.title
+
+
+def test_csv_reader_builds_one_movie_per_row():
+    reader = MovieFileCSVReader(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'))
+    reader.read_csv_file()
+
+    assert len(reader.dataset_of_movies) == 1000
+    movie = reader.rank_of_movies['1']
+    assert movie is reader.dataset_of_movies[0]
+    assert movie in reader.movies_with_given_year[2014]
+    assert any(other is movie for other in reader.movies_with_given_genre['Action'])
+    assert len(reader.dataset_of_genres) == 20
@@ -0,0 +1,204 @@
+import os
+import threading
+
+import pytest
+
+from movie_web_app import create_app
+from movie_web_app.adapters import memory_repository, repository
+from movie_web_app.adapters.journal import Journal, JournalCompactor, JournalException
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.snapshot import write_snapshot
+from movie_web_app.domain.model import Movie, User, make_review
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # A copy of the test data, so snapshots written by the tests stay valid.
+    path = tmp_path / 'data'
+    path.mkdir()
+    for filename in ('Data1000Movies.csv', 'user.csv'):
+        (path / filename).write_bytes(open(os.path.join(TEST_DATA_PATH, filename), 'rb').read())
+    return str(path)
+
+
+def load(data_path, journal_path, snapshot_path=None):
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, snapshot_path, Journal(journal_path))
+    return repo
+
+
+def make_changes(repo):
+    user = User('Dave', '123456789')
+    repo.add_user(user)
+    review = make_review('Great fun.', user, repo.get_movie(1), 9)
+    repo.add_review(review)
+    repo.add_user_watched_movie(user, repo.get_movie(3))
+    repo.add_user_watch_list(user, repo.get_movie(2))
+    repo.add_user_watch_list(user, Movie('Moana', 2016))
+    repo.delete_movie_from_watch_list(user, repo.get_movie(2))
+    repo.update_user_password(repo.get_user('thorke'), 'new hash')
+    return review
+
+
+def assert_changes_restored(repo, review):
+    dave = repo.get_user('dave')
+    assert dave == User('Dave', '123456789')
+    assert repo.get_review() == [review]
+    assert list(repo.get_movie(1).reviews) == [review]
+    assert dave.reviews == [review]
+    assert dave.watched_movies == [repo.get_movie(3)]
+    assert dave.time_spent_watching_movies_minutes == 117
+    assert list(repo.get_user_watch_list(dave)) == [Movie('Moana', 2016)]
+    assert repo.get_user('thorke').password == 'new hash'
+
+
+def test_journal_replays_changes_on_restart(data_path, tmp_path):
+    journal_path = str(tmp_path / 'repository.journal')
+    repo = load(data_path, journal_path)
+    review = make_changes(repo)
+    repo.journal.close()
+
+    assert_changes_restored(load(data_path, journal_path), review)
+
+
+def test_journal_drops_a_torn_frame_and_appends_after_the_last_complete_one(data_path, tmp_path):
+    journal_path = str(tmp_path / 'repository.journal')
+    repo = load(data_path, journal_path)
+    repo.add_user(User('Dave', '123456789'))
+    repo.journal.close()
+    with open(journal_path, 'ab') as journal_file:
+        journal_file.write(b'\x00\x00\x01\x00half a frame')
+
+    repo = load(data_path, journal_path)
+    assert repo.get_user('dave') is not None
+    repo.add_user(User('Erin', '123456789'))
+    repo.journal.close()
+
+    repo = load(data_path, journal_path)
+    assert [user.user_name for user in repo.get_all_users()][-2:] == ['dave', 'erin']
+
+
+def test_journal_commits_concurrent_writers_in_order(tmp_path):
+    journal = Journal(str(tmp_path / 'repository.journal'))
+
+    def write(thread_number):
+        for number in range(50):
+            journal.sync(journal.append(('user', '{}-{}'.format(thread_number, number), 'password')))
+
+    threads = [threading.Thread(target=write, args=(thread_number,)) for thread_number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    records = Journal(journal.path).records()
+    assert len(records) == 400
+    for thread_number in range(8):
+        names = [name for _, name, _ in records if name.startswith('{}-'.format(thread_number))]
+        assert names == ['{}-{}'.format(thread_number, number) for number in range(50)]
+
+
+def test_journal_rejects_a_file_that_is_not_a_journal(tmp_path):
+    path = tmp_path / 'repository.journal'
+    path.write_bytes(b'not a journal at all')
+    with pytest.raises(JournalException):
+        Journal(str(path))
+
+
+def test_journal_is_locked_against_a_second_writer(tmp_path):
+    path = str(tmp_path / 'repository.journal')
+    journal = Journal(path)
+    with pytest.raises(JournalException, match='in use'):
+        Journal(path)
+
+    # The journal that replaces it on rotation is locked too.
+    journal.rotate()
+    with pytest.raises(JournalException, match='in use'):
+        Journal(path)
+
+    journal.close()
+    assert Journal(path).generation == 1
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(data_path, tmp_path):
+    journal_path = str(tmp_path / 'repository.journal')
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    repo = load(data_path, journal_path, snapshot_path)
+    review = make_changes(repo)
+
+    compactor = JournalCompactor(repo, snapshot_path, data_path, interval=60, min_size=1)
+    assert compactor.compact_if_needed()
+    assert not compactor.compact_if_needed()
+    assert repo.journal.generation == 1
+    assert repo.journal.records() == []
+
+    repo.add_user(User('Erin', '123456789'))
+    repo.journal.close()
+
+    restarted = load(data_path, journal_path, snapshot_path)
+    assert_changes_restored(restarted, review)
+    assert [user.user_name for user in restarted.get_all_users()] == ['thorke', 'fmercury', 'dave', 'erin']
+
+
+def test_compaction_interrupted_before_the_new_journal_replays_only_later_records(data_path, tmp_path):
+    journal_path = str(tmp_path / 'repository.journal')
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    repo = load(data_path, journal_path, snapshot_path)
+    repo.add_user(User('Dave', '123456789'))
+
+    # The snapshot is written, but the journal is not rotated, so it still holds the records in the snapshot.
+    repo.journal.sync_all()
+    write_snapshot(repo, snapshot_path, data_path, journal=(repo.journal.generation, repo.journal.size))
+    repo.add_user(User('Erin', '123456789'))
+    repo.journal.close()
+
+    restarted = load(data_path, journal_path, snapshot_path)
+    assert [user.user_name for user in restarted.get_all_users()] == ['thorke', 'fmercury', 'dave', 'erin']
+
+
+def test_compaction_works_with_metrics_on(data_path, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': snapshot_path,
+        'JOURNAL_PATH': str(tmp_path / 'repository.journal'),
+        'JOURNAL_COMPACT_INTERVAL': 3600,
+        'JOURNAL_COMPACT_SIZE': 1,
+        'METRICS': True,
+    })
+    app.test_client().get('/metrics')
+    compactor = app.extensions['journal_compactor']
+    compactor.stop()
+
+    # The repository methods are timed, and the repository still pickles into the snapshot.
+    repository.repo_instance.add_user(User('Dave', 'pw12345678'))
+    assert compactor.compact_if_needed()
+    assert repository.repo_instance.journal.generation == 1
+    repository.repo_instance.journal.close()
+    assert load(data_path, str(tmp_path / 'repository.journal'), snapshot_path).get_user('dave') is not None
+
+
+def test_journal_is_left_to_the_app_serving_requests(data_path, tmp_path):
+    config = {
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': None,
+        'JOURNAL_PATH': str(tmp_path / 'repository.journal'),
+    }
+    app = create_app(config)
+    assert repository.repo_instance.journal is None
+    app.test_client().get('/metrics')
+    journal = repository.repo_instance.journal
+    assert journal is not None
+
+    # An app created for a `flask` command next to it does not open the journal.
+    command_app = create_app(config)
+    assert repository.repo_instance.journal is None
+    assert command_app.test_cli_runner().invoke(args=['profile-token']).exit_code == 0
+    journal.close()
@@ -0,0 +1,24 @@
+import os
+
+from benchmarks import load_test
+from movie_web_app.adapters.omdb_stub import OMDbStubServer
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+
+def test_load_test_replays_every_route_of_the_mix(tmp_path):
+    omdb_server = OMDbStubServer(TEST_DATA_PATH, latency=0.01).start()
+    server_process, url = load_test.start_server(TEST_DATA_PATH, 'memory', omdb_server.url, str(tmp_path))
+    try:
+        mix = load_test.parse_mix(','.join(route + '=1' for route in load_test.ROUTES))
+        summary = load_test.run_load(url, load_test.Catalog(TEST_DATA_PATH), mix, concurrency=2, duration=3,
+                                     warmup=0.5)
+    finally:
+        server_process.terminate()
+        omdb_server.stop()
+
+    assert set(summary['routes']) == set(load_test.ROUTES)
+    assert summary['errors'] == 0
+    for route in summary['routes'].values():
+        assert route['p50_ms'] <= route['p95_ms'] <= route['p99_ms']
+    assert summary['requests_per_second'] == summary['requests'] / 3
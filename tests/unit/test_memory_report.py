@@ -0,0 +1,49 @@
+import tracemalloc
+
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.domain.model import make_review
+from movie_web_app.profiles.profiles import add_reviews
+from movie_web_app.utilities.memory_report import MemorySnapshot, format_report, subsystem_sizes
+
+
+def test_subsystems_count_their_own_objects_only(in_memory_repo):
+    sizes = subsystem_sizes(in_memory_repo.get_memory_roots())
+    assert set(sizes) == {'movies', 'facet indexes', 'search indexes', 'users', 'reviews', 'watch lists'}
+    assert sizes['movies'] > 1000 * 500
+    assert sizes['search indexes'] > sizes['movies']
+    assert sizes['reviews'] < 1000
+
+    user, movie = in_memory_repo.get_user('thorke'), in_memory_repo.get_movie(1)
+    for number in range(100):
+        in_memory_repo.add_review(make_review('Review number {}'.format(number), user, movie, 5))
+    grown = subsystem_sizes(in_memory_repo.get_memory_roots())
+
+    # The reviews count once, as reviews, though the user, the movie and the repository all hold them.
+    assert grown['reviews'] - sizes['reviews'] > 100 * 100
+    assert grown['movies'] - sizes['movies'] < 2000
+    assert grown['users'] - sizes['users'] < 2000
+
+
+def test_report_shows_the_change_since_a_baseline(in_memory_repo):
+    tracemalloc.start()
+    try:
+        baseline = MemorySnapshot(in_memory_repo.get_memory_roots())
+        user = in_memory_repo.get_user('fmercury')
+        for rank in range(1, 201):
+            in_memory_repo.add_review(make_review('A review of movie {}'.format(rank), user,
+                                                  in_memory_repo.get_movie(rank), 7))
+        report = MemorySnapshot(in_memory_repo.get_memory_roots()).report(baseline, top=5)
+    finally:
+        tracemalloc.stop()
+
+    assert report['traced_bytes'] > 0
+    assert len(report['top_allocations']) == 5
+    assert report['delta']['subsystems']['reviews'] == report['subsystems']['reviews'] - baseline.subsystems['reviews']
+    assert report['delta']['subsystems']['reviews'] > 200 * 100
+    assert any(entry['line'].startswith('movie_web_app') for entry in report['delta']['top_allocations'])
+    assert 'reviews' in format_report(report)
+
+
+def test_random_reviews_need_users_and_movies(in_memory_repo, tmp_path):
+    assert add_reviews(in_memory_repo, str(tmp_path), 5) == 5
+    assert add_reviews(MemoryRepository(), str(tmp_path), 5) == 0
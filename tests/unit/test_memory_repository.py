@@ -6,15 +6,24 @@ import pytest
 from movie_web_app.domain.model import Movie, Director, Actor, Genre, User, Review, make_review
 from movie_web_app.adapters import memory_repository
 from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters import sqlite_repository
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
 from movie_web_app.adapters.repository import RepositoryException
 
 TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
 
-@pytest.fixture
-def in_memory_repo():
-    repo = MemoryRepository()
-    memory_repository.populate(TEST_DATA_PATH, repo)
-    return repo
+# Every test runs against both repository implementations, which must behave the same.
+@pytest.fixture(params=['memory', 'sqlite'])
+def in_memory_repo(request, tmp_path):
+    if request.param == 'sqlite':
+        repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+        sqlite_repository.populate(TEST_DATA_PATH, repo)
+        yield repo
+        repo.close()
+    else:
+        repo = MemoryRepository()
+        memory_repository.populate(TEST_DATA_PATH, repo)
+        yield repo
 
 def test_repository_can_add_a_user(in_memory_repo):
     user = User("Dave", '123456789')
@@ -30,6 +39,17 @@ def test_repository_does_not_retrieve_a_non_existent_user(in_memory_repo):
     user = in_memory_repo.get_user('prince')
     assert user is None
 
+def test_repository_normalises_user_names_like_user(in_memory_repo):
+    assert in_memory_repo.get_user('  FMercury ') is in_memory_repo.get_user('fmercury')
+
+def test_repository_rejects_a_duplicate_user_name(in_memory_repo):
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_user(User(' Thorke', 'anotherpassword'))
+
+def test_repository_lists_users_in_insertion_order(in_memory_repo):
+    in_memory_repo.add_user(User('Dave', '123456789'))
+    assert [user.user_name for user in in_memory_repo.get_all_users()] == ['thorke', 'fmercury', 'dave']
+
 def test_repository_can_retrieve_movie(in_memory_repo):
     assert in_memory_repo.get_movie(3) == Movie('Split',2016)
 
@@ -117,3 +137,171 @@ def test_repository_does_not_retrieve_a_movie_in_empty_watchlist(in_memory_repo)
 def test_repository_return_all_movies(in_memory_repo):
     movies = in_memory_repo.all_movies()
     assert len(movies) == 1000
+
+def test_repository_can_search_movies_by_actor(in_memory_repo):
+    movie_ranks, number_of_results = in_memory_repo.search_movies('Chris Pratt')
+    assert number_of_results == len(movie_ranks) == 7
+    assert movie_ranks[:4] == [1, 10, 39, 86]
+    assert all(any(actor == Actor('Chris Pratt') for actor in in_memory_repo.get_movie(rank).actors) for rank in movie_ranks)
+
+def test_repository_search_lists_exact_field_matches_first(in_memory_repo):
+    movie_ranks, number_of_results = in_memory_repo.search_movies('2014')
+    assert all(in_memory_repo.get_movie(rank).release_year == 2014 for rank in movie_ranks[:-1])
+    assert in_memory_repo.get_movie(movie_ranks[-1]).title == 'The Levelling'
+
+def test_repository_search_ranks_title_matches_above_description_matches(in_memory_repo):
+    movie_ranks, number_of_results = in_memory_repo.search_movies('Big')
+    assert [in_memory_repo.get_movie(rank).title for rank in movie_ranks[:2]] == ['The Big Short', 'Big Hero 6']
+    assert 'Big' not in in_memory_repo.get_movie(movie_ranks[-1]).title
+
+def test_repository_search_returns_top_results_and_total(in_memory_repo):
+    all_ranks, number_of_results = in_memory_repo.search_movies('2014')
+    movie_ranks, limited_number_of_results = in_memory_repo.search_movies('2014', limit=4)
+    assert movie_ranks == all_ranks[:4]
+    assert limited_number_of_results == number_of_results == 99
+
+def test_repository_search_ignores_case_and_punctuation(in_memory_repo):
+    assert in_memory_repo.search_movies('guardians OF the galaxy!')[0][0] == 1
+
+def test_repository_search_does_not_find_unknown_words(in_memory_repo):
+    assert in_memory_repo.search_movies('Chris Zzyzx') == ([], 0)
+    assert in_memory_repo.search_movies('') == ([], 0)
+
+def test_repository_search_includes_movies_added_later(in_memory_repo):
+    movie = Movie('Zootropolis', 2016)
+    movie.rank = 1001
+    movie.add_genre(Genre('Animation'))
+    in_memory_repo.add_movie(movie)
+    assert in_memory_repo.search_movies('zootropolis animation') == ([1001], 1)
+
+def test_repository_can_find_names_with_typos(in_memory_repo):
+    assert in_memory_repo.get_similar_names('Chris Prat') == [('Chris Pratt', 1, ['actor'])]
+    assert in_memory_repo.get_similar_names('Interstelar')[0] == ('Interstellar', 1, ['title'])
+    assert in_memory_repo.get_similar_names('ridly scot')[0] == ('Ridley Scott', 2, ['director'])
+
+def test_repository_respects_the_maximum_edit_distance(in_memory_repo):
+    assert in_memory_repo.get_similar_names('ridly scot', max_distance=1) == []
+    assert in_memory_repo.get_similar_names('Zzyzx Qwerty') == []
+
+
+def test_repository_can_complete_a_prefix(in_memory_repo):
+    completions = in_memory_repo.get_completions('chris pr', 3)
+    assert completions[0] == ('Chris Pratt', ['actor'])
+    assert len(completions) <= 3
+
+
+def test_repositories_complete_up_to_the_limit_they_are_built_for(tmp_path):
+    memory_repo = MemoryRepository(max_completions=25)
+    memory_repository.populate(TEST_DATA_PATH, memory_repo)
+    sqlite_repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'), max_completions=25)
+    sqlite_repository.populate(TEST_DATA_PATH, sqlite_repo)
+
+    default_repo = MemoryRepository()
+    memory_repository.populate(TEST_DATA_PATH, default_repo)
+    assert len(default_repo.get_completions('a', 25)) == 10
+    assert len(memory_repo.get_completions('a', 25)) == 25
+    assert sqlite_repo.get_completions('a', 25) == memory_repo.get_completions('a', 25)
+    sqlite_repo.close()
+
+
+def test_repository_completes_later_words_and_orders_by_popularity(in_memory_repo):
+    completions = in_memory_repo.get_completions('dra')
+    assert completions[0] == ('Drama', ['genre'])
+
+    names = [name for name, kinds in in_memory_repo.get_completions('pratt')]
+    assert 'Chris Pratt' in names
+
+
+def test_repository_completes_names_added_later(in_memory_repo):
+    movie = Movie('Zootropolis', 2016)
+    movie.rank = 1001
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_completions('zootr') == [('Zootropolis', ['title'])]
+    assert in_memory_repo.get_completions('qqqq') == []
+
+
+def test_repository_can_filter_and_sort_movies_by_attributes(in_memory_repo):
+    ranges = {'release_year': (2010, 2012), 'rating': (8.0, None)}
+    movie_ranks, number_of_results = in_memory_repo.filter_movies(ranges, order_by='votes', descending=True, limit=3)
+    assert number_of_results == 16
+    assert [in_memory_repo.get_movie(rank).title for rank in movie_ranks] == \
+        ['Inception', 'The Dark Knight Rises', 'The Avengers']
+
+    movie_ranks, number_of_results = in_memory_repo.filter_movies({'runtime_minutes': (None, 70)})
+    assert movie_ranks == sorted(movie_ranks)
+    assert all(in_memory_repo.get_movie(rank).runtime_minutes <= 70 for rank in movie_ranks)
+
+
+def test_repository_lists_movies_of_an_actor(in_memory_repo):
+    movie_ranks = in_memory_repo.get_movie_with_given_actor('Anne Hathaway')
+    assert movie_ranks == [movie.rank for movie in in_memory_repo.all_movies() if Actor('Anne Hathaway') in movie.actors]
+    assert 37 in movie_ranks
+
+    movie_ranks, _, _ = in_memory_repo.browse_movies(director='Christopher Nolan', actor='Anne Hathaway')
+    assert [in_memory_repo.get_movie(rank).title for rank in movie_ranks] == ['Interstellar', 'The Dark Knight Rises']
+
+
+def test_repository_shares_one_actor_director_and_genre_per_name(in_memory_repo):
+    interstellar, dark_knight_rises = in_memory_repo.get_movies_by_rank([37, 125])
+    assert interstellar.director is dark_knight_rises.director
+    assert interstellar.actors[1] is dark_knight_rises.actors[2] == Actor('Anne Hathaway')
+    assert interstellar.genres[1] is in_memory_repo.get_movie(55).genres[2] == Genre('Drama')
+
+
+def test_repository_can_browse_movies_by_facets(in_memory_repo):
+    movie_ranks, number_of_results, facets = in_memory_repo.browse_movies(
+        genres=['Action', 'Sci-Fi'], ranges={'release_year': (2014, 2016), 'rating': (7.5, None)}, limit=3)
+    expected = [movie for movie in in_memory_repo.all_movies()
+                if {Genre('Action'), Genre('Sci-Fi')} <= set(movie.genres)
+                and 2014 <= movie.release_year <= 2016 and movie.rating >= 7.5]
+    assert number_of_results == len(expected) > 3
+    assert movie_ranks == [movie.rank for movie in expected][:3]
+    assert sum(count for _, count in facets['release_years']) == len(expected)
+    assert dict(facets['genres'])['Action'] == dict(facets['genres'])['Sci-Fi'] == len(expected)
+    assert facets['directors'][0][1] == max(sum(1 for movie in expected if movie.director == director)
+                                           for director in {movie.director for movie in expected})
+
+    movie_ranks, number_of_results, _ = in_memory_repo.browse_movies(director='Christopher Nolan',
+                                                                     ranges={'release_year': (2010, None)})
+    assert [in_memory_repo.get_movie(rank).title for rank in movie_ranks] == \
+        ['Interstellar', 'Inception', 'The Dark Knight Rises']
+
+    assert in_memory_repo.browse_movies(genres=['Western', 'Spaghetti'])[:2] == ([], 0)
+    assert in_memory_repo.browse_movies(limit=2)[:2] == ([1, 2], 1000)
+
+
+def test_repository_can_select_movies_by_set_algebra(in_memory_repo):
+    movies = in_memory_repo.all_movies()
+
+    movie_ranks = in_memory_repo.select_movies(all_of=[('genre', 'Comedy'), ('genre', 'Romance')],
+                                               any_of=[('year', 2015), ('year', 2016)],
+                                               none_of=[('genre', 'Drama')])
+    assert movie_ranks == [movie.rank for movie in movies
+                           if {Genre('Comedy'), Genre('Romance')} <= set(movie.genres)
+                           and movie.release_year in (2015, 2016) and Genre('Drama') not in movie.genres]
+    assert len(movie_ranks) > 3
+
+    directors = ['Christopher Nolan', 'Ridley Scott']
+    movie_ranks = in_memory_repo.select_movies(any_of=[('director', director) for director in directors])
+    assert movie_ranks == [movie.rank for movie in movies if movie.director in [Director(name) for name in directors]]
+
+    assert in_memory_repo.select_movies(none_of=[('genre', 'Drama')]) == \
+        [movie.rank for movie in movies if Genre('Drama') not in movie.genres]
+    assert in_memory_repo.select_movies(all_of=[('genre', 'Spaghetti')]) == []
+    assert in_memory_repo.get_movie_with_given_genre('Western') == in_memory_repo.select_movies([('genre', 'Western')])
+
+    with pytest.raises(ValueError):
+        in_memory_repo.select_movies([('studio', 'Pixar')])
+
+
+def test_repository_can_aggregate_movie_attributes(in_memory_repo):
+    revenue = in_memory_repo.aggregate_movies('revenue')
+    assert revenue['count'] == 872
+    assert revenue['max'] == 936.63
+    assert round(revenue['mean'], 2) == 82.96
+    assert in_memory_repo.aggregate_movies('runtime_minutes')['sum'] == 113172
+    assert in_memory_repo.aggregate_movies('rating', {'release_year': (1990, 1999)})['count'] == 0
+
+    with pytest.raises(ValueError):
+        in_memory_repo.aggregate_movies('budget')
@@ -0,0 +1,51 @@
+import time
+
+from movie_web_app.utilities.metrics import RequestMetrics, finish_request, start_request, timed
+
+
+@timed('repo')
+def slow_repository_call():
+    time.sleep(0.02)
+
+
+@timed('render')
+def render_calling_repository():
+    time.sleep(0.01)
+    slow_repository_call()
+
+
+def test_phases_count_only_their_own_time():
+    start_request('movies_bp.movies_by_rank')
+    render_calling_repository()
+    slow_repository_call()
+    endpoint, total, phases = finish_request()
+
+    assert endpoint == 'movies_bp.movies_by_rank'
+    assert phases['repo'] >= 0.04
+    assert 0.01 <= phases['render'] < phases['repo'] - 0.02
+    assert phases['dto'] == phases['upstream'] == 0
+    assert abs(sum(phases.values()) - total) < 1e-9
+
+
+def test_timed_functions_outside_a_request_are_not_counted():
+    slow_repository_call()
+    assert finish_request() is None
+
+
+def test_exposition_is_in_prometheus_histogram_format():
+    metrics = RequestMetrics()
+    metrics.record('movies_bp.movies_by_rank', 0.003, {'repo': 0.001, 'dto': 0.0, 'upstream': 0.0, 'render': 0.002,
+                                                        'other': 0.0})
+    metrics.record('movies_bp.movies_by_rank', 0.2, {'repo': 0.0, 'dto': 0.0, 'upstream': 0.19, 'render': 0.01,
+                                                      'other': 0.0})
+    text = metrics.exposition()
+
+    assert '# TYPE movie_web_app_request_duration_seconds histogram' in text
+    assert 'movie_web_app_request_duration_seconds_bucket{endpoint="movies_bp.movies_by_rank",le="0.0025"} 0' in text
+    assert 'movie_web_app_request_duration_seconds_bucket{endpoint="movies_bp.movies_by_rank",le="0.005"} 1' in text
+    assert 'movie_web_app_request_duration_seconds_bucket{endpoint="movies_bp.movies_by_rank",le="+Inf"} 2' in text
+    assert 'movie_web_app_request_duration_seconds_count{endpoint="movies_bp.movies_by_rank"} 2' in text
+    assert ('movie_web_app_request_phase_duration_seconds_bucket{endpoint="movies_bp.movies_by_rank",phase="upstream",'
+            'le="0.25"} 2') in text
+    assert 'movie_web_app_request_phase_duration_seconds_sum{endpoint="movies_bp.movies_by_rank",phase="upstream"} 0.19' \
+        in text
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from movie_web_app import create_app
+from movie_web_app.adapters import memory_repository
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.passwords import PLAINTEXT_PREFIX, is_password_hash, stored_password, verify_password
+from movie_web_app.authentication import services
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # A copy of the test data, so tests can rewrite user.csv.
+    for filename in ('Data1000Movies.csv', 'user.csv'):
+        (tmp_path / filename).write_bytes(open(os.path.join(TEST_DATA_PATH, filename), 'rb').read())
+    return str(tmp_path)
+
+
+def test_password_hashes_are_recognised():
+    assert is_password_hash(generate_password_hash('cLQ^C#oFXloS'))
+    assert is_password_hash('sha256$salt$' + 'ab' * 32)
+    # The formats of Werkzeug 2.3 and later.
+    assert is_password_hash('scrypt:32768:8:1$k9Cy1jZGqDPxhN1L$' + 'c0' * 64)
+    assert is_password_hash('pbkdf2:sha256:600000$k9Cy1jZGqDPxhN1L$' + '3f' * 32)
+    assert not is_password_hash('cLQ^C#oFXloS')
+    assert not is_password_hash('mvNNbc1eLA$i')
+    assert not is_password_hash('plain$abc$def')
+
+
+def test_plaintext_passwords_are_upgraded_on_first_login():
+    stored = stored_password('mvNNbc1eLA$i')
+    assert stored == PLAINTEXT_PREFIX + 'mvNNbc1eLA$i'
+
+    assert verify_password(stored, 'wrong') == (False, None)
+    valid, upgraded = verify_password(stored, 'mvNNbc1eLA$i')
+    assert valid
+    assert verify_password(upgraded, 'mvNNbc1eLA$i') == (True, None)
+
+
+def test_load_users_keeps_plaintext_passwords_for_later_hashing(in_memory_repo):
+    user = in_memory_repo.get_user('fmercury')
+    assert user.password == PLAINTEXT_PREFIX + 'mvNNbc1eLA$i'
+
+    in_memory_repo.add_user_watch_list(user, in_memory_repo.get_movie(1))
+    services.authenticate_user('fmercury', 'mvNNbc1eLA$i', in_memory_repo)
+    assert is_password_hash(user.password)
+    assert in_memory_repo.get_user_watch_list(user).size() == 1
+
+    services.authenticate_user('fmercury', 'mvNNbc1eLA$i', in_memory_repo)
+    with pytest.raises(services.AuthenticationException):
+        services.authenticate_user('fmercury', 'cLQ^C#oFXloS', in_memory_repo)
+
+
+def test_hash_passwords_command_migrates_user_file(data_path):
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': None,
+        'JOURNAL_PATH': None,
+    })
+
+    result = app.test_cli_runner().invoke(args=['hash-passwords', '--workers', '2'])
+    assert result.exit_code == 0
+    assert 'Hashed 2 passwords.' in result.output
+
+    repo = MemoryRepository()
+    memory_repository.load_users(data_path, repo)
+    user = repo.get_user('thorke')
+    assert is_password_hash(user.password)
+    services.authenticate_user('thorke', 'cLQ^C#oFXloS', repo)
+
+    result = app.test_cli_runner().invoke(args=['hash-passwords'])
+    assert 'Hashed 0 passwords.' in result.output
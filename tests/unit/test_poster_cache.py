@@ -0,0 +1,112 @@
+import pytest
+
+from movie_web_app.adapters.omdb import OMDbClient, OMDbException
+from movie_web_app.adapters.poster_cache import PosterCache
+from movie_web_app.adapters.poster_resolver import PosterResolver
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def omdb_client(omdb_server):
+    return OMDbClient(omdb_server.url, 'test-key')
+
+
+def test_client_fetches_poster_from_stub(omdb_client, omdb_server):
+    details = omdb_client.fetch('Prometheus', 2012)
+    assert details['Title'] == 'Prometheus'
+    assert details['Poster'] == omdb_server.url + '/posters/2.jpg'
+
+
+def test_client_returns_none_for_unknown_title(omdb_client):
+    assert omdb_client.fetch('No Such Movie', 2020) is None
+
+
+def test_cache_counts_hits_and_misses(omdb_client, omdb_server):
+    cache = PosterCache(omdb_client)
+    requests_before = omdb_server.request_count
+
+    poster = cache.get_poster('Prometheus', 2012)
+    assert cache.get_poster('Prometheus', 2012) == poster
+    assert omdb_server.request_count == requests_before + 1
+
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+
+def test_cache_remembers_unknown_titles(omdb_client, omdb_server):
+    cache = PosterCache(omdb_client)
+    requests_before = omdb_server.request_count
+
+    assert cache.get_poster('No Such Movie', 2020) is None
+    assert cache.get_poster('No Such Movie', 2020) is None
+    assert omdb_server.request_count == requests_before + 1
+    assert cache.stats()['negative_hits'] == 1
+
+
+def test_cache_entries_expire(omdb_client, omdb_server):
+    clock = FakeClock()
+    cache = PosterCache(omdb_client, ttl=60, negative_ttl=10, clock=clock)
+    cache.get_poster('Prometheus', 2012)
+    cache.get_poster('No Such Movie', 2020)
+    requests_before = omdb_server.request_count
+
+    clock.now += 30
+    cache.get_poster('Prometheus', 2012)
+    cache.get_poster('No Such Movie', 2020)
+    assert omdb_server.request_count == requests_before + 1
+
+    clock.now += 31
+    cache.get_poster('Prometheus', 2012)
+    assert omdb_server.request_count == requests_before + 2
+
+
+def test_cache_evicts_least_recently_used(omdb_client):
+    cache = PosterCache(omdb_client, max_entries=2)
+    cache.get_poster('Prometheus', 2012)
+    cache.get_poster('Split', 2016)
+    cache.get_poster('Prometheus', 2012)
+    cache.get_poster('Sing', 2016)
+
+    assert cache.lookup('Prometheus', 2012)[0]
+    assert not cache.lookup('Split', 2016)[0]
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_store_survives_a_new_cache(omdb_client, omdb_server, tmp_path):
+    path = str(tmp_path / 'posters.sqlite3')
+    poster = PosterCache(omdb_client, path=path).get_poster('Prometheus', 2012)
+    requests_before = omdb_server.request_count
+
+    cache = PosterCache(omdb_client, path=path)
+    assert cache.get_poster('Prometheus', 2012) == poster
+    assert omdb_server.request_count == requests_before
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_disk_store_is_bounded(omdb_client, tmp_path):
+    cache = PosterCache(omdb_client, path=str(tmp_path / 'posters.sqlite3'), max_entries=1, max_disk_entries=2)
+    for title, year in [('Prometheus', 2012), ('Split', 2016), ('Sing', 2016)]:
+        cache.get_poster(title, year)
+
+    assert cache.stats()['disk_entries'] == 2
+    assert not cache.lookup('Prometheus', 2012)[0]
+
+
+def test_unreachable_omdb_is_not_cached():
+    cache = PosterCache(OMDbClient('http://127.0.0.1:1', 'test-key', timeout=1))
+
+    with pytest.raises(OMDbException):
+        cache.get('Prometheus', 2012)
+    resolver = PosterResolver(cache, max_workers=1)
+    assert resolver.resolve([('Prometheus', 2012)]) == {('Prometheus', 2012): None}
+    resolver.shutdown()
+    assert cache.stats()['errors'] == 2
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+from movie_web_app.adapters.omdb import OMDbClient
+from movie_web_app.adapters.omdb_stub import OMDbStubServer
+from movie_web_app.adapters.poster_cache import PosterCache
+from movie_web_app.adapters.poster_resolver import PosterResolver
+from movie_web_app.posters import services as poster_services
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+PAGE = [('Guardians of the Galaxy', 2014), ('Prometheus', 2012), ('Split', 2016), ('Sing', 2016)]
+
+
+@pytest.fixture
+def slow_omdb_server():
+    server = OMDbStubServer(TEST_DATA_PATH, latency=0.2).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def resolver(slow_omdb_server):
+    resolver = PosterResolver(PosterCache(OMDbClient(slow_omdb_server.url, 'test-key')), max_workers=4, deadline=5)
+    yield resolver
+    resolver.shutdown()
+
+
+def test_resolver_fetches_a_page_in_parallel(resolver, slow_omdb_server):
+    start = time.perf_counter()
+    posters = resolver.resolve(PAGE)
+    elapsed = time.perf_counter() - start
+
+    assert posters[('Prometheus', 2012)] == slow_omdb_server.url + '/posters/2.jpg'
+    assert all(poster is not None for poster in posters.values())
+    # Four sequential lookups would take at least 0.8 seconds.
+    assert elapsed < 0.6
+
+
+def test_resolver_answers_cached_posters_without_omdb(resolver, slow_omdb_server):
+    resolver.resolve(PAGE)
+    requests_before = slow_omdb_server.request_count
+
+    assert len(resolver.resolve(PAGE)) == len(PAGE)
+    assert slow_omdb_server.request_count == requests_before
+
+
+def test_resolver_falls_back_when_deadline_is_missed(resolver):
+    posters = resolver.resolve(PAGE[:2], deadline=0.05)
+
+    assert posters == {PAGE[0]: None, PAGE[1]: None}
+    assert resolver.timeouts == 2
+
+    # The fetches carry on in the background, so the posters are cached for the next request.
+    time.sleep(0.4)
+    assert resolver.poster_cache.lookup(*PAGE[0])[0]
+
+
+def test_get_posters_keys_posters_by_title(resolver):
+    movies = [{'title': title, 'release_year': year} for title, year in PAGE] + \
+             [{'title': 'No Such Movie', 'release_year': 2020}]
+    posters = poster_services.get_posters(movies, resolver)
+
+    assert set(posters) == {title for title, year in PAGE} | {'No Such Movie'}
+    assert posters['No Such Movie'] is None
+
+
+class FailingPosterCache:
+    def lookup(self, title, year):
+        return False, None
+
+    def get(self, title, year):
+        raise ValueError('Not JSON')
+
+
+def test_resolver_falls_back_when_a_fetch_fails():
+    resolver = PosterResolver(FailingPosterCache(), max_workers=2)
+    try:
+        assert resolver.resolve(PAGE[:2]) == {PAGE[0]: None, PAGE[1]: None}
+    finally:
+        resolver.shutdown()
@@ -0,0 +1,82 @@
+import pstats
+
+from movie_web_app.utilities.profiler import ProfilingMiddleware, StackProfiler, list_profiles, make_profile_token
+
+SECRET_KEY = 'secret'
+
+
+def hello_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [greeting(environ.get('QUERY_STRING', 'world')).encode()]
+
+
+def greeting(name):
+    return 'Hello, {}'.format(name.capitalize())
+
+
+def call(app, path='/hello', headers=None):
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': 'world'}
+    environ.update({'HTTP_' + name.upper().replace('-', '_'): value for name, value in (headers or {}).items()})
+    return b''.join(app(environ, lambda status, response_headers: None))
+
+
+def test_requests_without_a_token_are_not_profiled(tmp_path):
+    app = ProfilingMiddleware(hello_app, str(tmp_path), SECRET_KEY)
+    assert call(app) == b'Hello, World'
+    assert call(app, headers={'X-Profile': 'not a token'}) == b'Hello, World'
+    assert call(app, headers={'X-Profile': make_profile_token('another secret')}) == b'Hello, World'
+    assert list_profiles(str(tmp_path)) == []
+
+
+def test_requests_with_a_token_are_profiled(tmp_path):
+    app = ProfilingMiddleware(hello_app, str(tmp_path), SECRET_KEY)
+    assert call(app, headers={'X-Profile': make_profile_token(SECRET_KEY)}) == b'Hello, World'
+
+    profiles = list_profiles(str(tmp_path))
+    assert [(profile['method'], profile['path'], profile['format']) for profile in profiles] == \
+        [('GET', '/hello', 'pstats')]
+    stats = pstats.Stats(str(tmp_path / profiles[0]['name']))
+    assert any(function_name == 'greeting' for _, _, function_name in stats.stats)
+
+
+def test_sampled_requests_are_profiled_as_collapsed_stacks(tmp_path):
+    app = ProfilingMiddleware(hello_app, str(tmp_path), SECRET_KEY, sample_rate=1.0, profile_format='collapsed',
+                              keep=2)
+    for path in ('/a', '/b', '/c'):
+        call(app, path)
+
+    profiles = list_profiles(str(tmp_path))
+    assert [profile['path'] for profile in profiles] == ['/c', '/b']
+    stacks = (tmp_path / profiles[0]['name']).read_text().splitlines()
+    assert any(line.startswith('hello_app (test_profiler.py:') and ';greeting (test_profiler.py:' in line
+               for line in stacks)
+
+
+def test_profiled_responses_are_closed(tmp_path):
+    closed = list()
+
+    class Response:
+        def __iter__(self):
+            return iter([b'Hello, World'])
+
+        def close(self):
+            closed.append(True)
+
+    def closing_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return Response()
+
+    app = ProfilingMiddleware(closing_app, str(tmp_path), SECRET_KEY, sample_rate=1.0)
+    assert call(app) == b'Hello, World'
+    assert closed == [True]
+
+
+def test_stack_profiler_counts_time_in_calls_once():
+    profiler = StackProfiler()
+    profiler.enable()
+    greeting('world')
+    profiler.disable()
+
+    stacks = dict(line.rsplit(' ', 1) for line in profiler.collapsed().splitlines())
+    assert 'greeting (test_profiler.py:13);str.capitalize' in stacks
+    assert all(int(microseconds) >= 0 for microseconds in stacks.values())
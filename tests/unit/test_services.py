@@ -184,3 +184,12 @@ def test_get_reviews_for_movie_without_reviews(in_memory_repo):
     reviews_as_dict = movies_services.get_reviews_for_movie(2, in_memory_repo)
     assert len(reviews_as_dict) == 0
 
+
+
+def test_get_search_suggestions(in_memory_repo):
+    assert movies_services.get_search_suggestions('Cristopher Nolan', 2, 3, in_memory_repo) == ['Christopher Nolan']
+
+
+def test_get_search_suggestions_leaves_out_the_query(in_memory_repo):
+    suggestions = movies_services.get_search_suggestions('chris pratt', 2, 3, in_memory_repo)
+    assert 'Chris Pratt' not in suggestions
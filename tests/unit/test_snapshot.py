@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from movie_web_app import create_app
+from movie_web_app.adapters import memory_repository
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.snapshot import (SnapshotException, read_header, read_snapshot, restore_snapshot,
+                                             write_snapshot)
+from movie_web_app.domain.model import User
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # A copy of the test data, so tests can change the source files.
+    path = tmp_path / 'data'
+    path.mkdir()
+    for filename in ('Data1000Movies.csv', 'user.csv'):
+        (path / filename).write_bytes(open(os.path.join(TEST_DATA_PATH, filename), 'rb').read())
+    return str(path)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, data_path):
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo)
+    path = str(tmp_path / 'repository.snapshot')
+    write_snapshot(repo, path, data_path)
+    return path
+
+
+def test_populate_restores_a_snapshot(data_path, snapshot_path):
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, snapshot_path)
+
+    assert repo.get_number_of_movies() == 1000
+    assert repo.get_movie(1).title == 'Guardians of the Galaxy'
+    assert repo.search_movies('Chris Pratt', 4) == ([1, 10, 39, 86], 7)
+    assert repo.get_completions('guardians', 1) == [('Guardians of the Galaxy', ['title'])]
+    assert repo.get_user('fmercury') == User('fmercury', '8734gfe2058v')
+
+
+def test_snapshot_is_ignored_when_the_csv_changes(data_path, snapshot_path):
+    with open(os.path.join(data_path, 'user.csv'), 'a') as user_file:
+        user_file.write('\n99,newuser,secret123')
+
+    with pytest.raises(SnapshotException):
+        read_snapshot(snapshot_path, data_path)
+
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, snapshot_path)
+    assert repo.get_user('newuser') is not None
+
+
+def test_corrupt_snapshot_falls_back_to_csv(data_path, snapshot_path):
+    with open(snapshot_path, 'r+b') as snapshot_file:
+        snapshot_file.seek(-10, os.SEEK_END)
+        snapshot_file.write(b'corrupted!')
+
+    with pytest.raises(SnapshotException):
+        read_snapshot(snapshot_path, data_path)
+
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, snapshot_path)
+    assert repo.get_number_of_movies() == 1000
+
+
+def test_snapshot_must_have_the_right_format(data_path, tmp_path):
+    path = str(tmp_path / 'empty.snapshot')
+    open(path, 'wb').close()
+    with pytest.raises(SnapshotException):
+        read_snapshot(path, data_path)
+
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(b'not a snapshot at all')
+    with pytest.raises(SnapshotException):
+        read_snapshot(path, data_path)
+
+
+def test_write_snapshot_command(data_path, tmp_path):
+    path = str(tmp_path / 'written.snapshot')
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': path,
+        'JOURNAL_PATH': None,
+    })
+
+    result = app.test_cli_runner().invoke(args=['write-snapshot'])
+    assert result.exit_code == 0
+    assert 'Wrote ' + path in result.output
+
+    header, state = read_snapshot(path, data_path)
+    assert header['repository'] == 'MemoryRepository'
+
+
+def test_write_snapshot_command_keeps_a_compacted_snapshot(data_path, tmp_path):
+    # The snapshot was written by compaction in the app serving requests, while this app has no journal open.
+    path = str(tmp_path / 'compacted.snapshot')
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo)
+    repo.add_user(User('Dave', 'pw12345678'))
+    write_snapshot(repo, path, data_path, journal=(1, 100))
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'POSTER_CACHE_PATH': None,
+        'SNAPSHOT_PATH': path,
+        'JOURNAL_PATH': None,
+    })
+
+    result = app.test_cli_runner().invoke(args=['write-snapshot'])
+    assert result.exit_code != 0
+    assert 'holds changes compacted from the journal' in result.output
+    assert read_header(path)['journal'] == [1, 100]
+    restored = MemoryRepository()
+    memory_repository.populate(data_path, restored, path)
+    assert restored.get_user('dave') is not None
+
+
+def test_snapshot_is_ignored_when_the_index_settings_change(data_path, snapshot_path):
+    repo = MemoryRepository(max_edit_distance=3)
+    with pytest.raises(SnapshotException):
+        restore_snapshot(repo, snapshot_path, data_path)
+
+    memory_repository.populate(data_path, repo, snapshot_path)
+    assert repo.index_settings['max_edit_distance'] == 3
+    assert repo.get_similar_names('ridly sct', max_distance=3)[0] == ('Ridley Scott', 3, ['director'])
+
+
+def test_snapshot_leaves_out_plaintext_passwords(data_path, snapshot_path):
+    with open(snapshot_path, 'rb') as snapshot_file:
+        contents = snapshot_file.read()
+    assert b'mvNNbc1eLA' not in contents and b'plain$' not in contents
+
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, snapshot_path)
+    assert repo.get_user('fmercury').password == 'plain$mvNNbc1eLA$i'
@@ -0,0 +1,109 @@
+import os
+import threading
+
+import pytest
+
+from movie_web_app.adapters import sqlite_repository
+from movie_web_app.adapters.passwords import verify_password
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
+from movie_web_app.domain.model import Movie, User, make_review
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = str(tmp_path / 'movies.sqlite3')
+    repo = SqliteRepository(path)
+    sqlite_repository.populate(TEST_DATA_PATH, repo)
+    repo.close()
+    return path
+
+
+def test_sqlite_repository_uses_wal_mode(database_path):
+    repo = SqliteRepository(database_path)
+    connection = repo._SqliteRepository__connection()
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_sqlite_repository_keeps_data_across_connections(database_path):
+    repo = SqliteRepository(database_path)
+    user = User('Dave', '123456789')
+    repo.add_user(user)
+    repo.add_user_watched_movie(user, repo.get_movie(3))
+    repo.add_user_watch_list(user, repo.get_movie(2))
+    review = make_review('Great fun.', user, repo.get_movie(1), 9)
+    repo.add_review(review)
+    repo.update_user_password(repo.get_user('thorke'), 'new hash')
+    repo.close()
+
+    reopened = SqliteRepository(database_path)
+    dave = reopened.get_user('dave')
+    assert dave is not user and dave == user
+    assert dave.watched_movies == [Movie('Split', 2016)]
+    assert dave.time_spent_watching_movies_minutes == 117
+    assert list(reopened.get_user_watch_list(dave)) == [Movie('Prometheus', 2012)]
+    assert reopened.get_review() == [review]
+    assert reopened.have_review(review)
+    assert not reopened.have_review(make_review('Great fun.', dave, reopened.get_movie(2), 9))
+    assert list(reopened.get_movie(1).reviews) == [review]
+    assert reopened.get_user('thorke').password == 'new hash'
+
+
+def test_sqlite_repository_populates_an_empty_database_only(database_path):
+    repo = SqliteRepository(database_path)
+    repo.add_user(User('Dave', '123456789'))
+    version = repo.get_catalog_version()
+
+    sqlite_repository.populate(TEST_DATA_PATH, repo)
+
+    assert repo.get_number_of_movies() == 1000
+    assert len(repo.get_all_users()) == 3
+    assert repo.get_catalog_version() == version
+
+
+def test_sqlite_repository_lists_movies_of_an_actor_director_and_genre(database_path):
+    repo = SqliteRepository(database_path)
+    assert repo.get_movie_with_given_actor('Chris Pratt')[0] == 1
+    assert 1 in repo.get_movie_with_given_director('James Gunn')
+    assert 1 in repo.get_movie_with_given_genre('Sci-Fi')
+    assert repo.get_movie_with_given_year(1999) == []
+    with pytest.raises(KeyError):
+        repo.get_movie_with_given_genre('Zzyzx')
+
+
+def test_sqlite_repository_gives_each_thread_its_own_connection(database_path):
+    repo = SqliteRepository(database_path)
+    connections = [repo._SqliteRepository__connection()]
+    results = list()
+
+    def lookup():
+        connections.append(repo._SqliteRepository__connection())
+        results.append(repo.get_movie(3))
+        repo.close()
+
+    thread = threading.Thread(target=lookup)
+    thread.start()
+    thread.join()
+
+    assert results == [Movie('Split', 2016)]
+    assert connections[0] is not connections[1]
+    assert repo._SqliteRepository__connection() is connections[0]
+
+
+def test_sqlite_repository_rebuilds_search_indexes_after_another_connection_changes_the_catalog(database_path):
+    repo = SqliteRepository(database_path)
+    other = SqliteRepository(database_path)
+    assert repo.search_movies('zootropolis') == ([], 0)
+
+    movie = Movie('Zootropolis', 2016)
+    movie.rank = 1001
+    other.add_movie(movie)
+
+    assert repo.search_movies('zootropolis') == ([1001], 1)
+    assert repo.get_completions('zootr') == [('Zootropolis', ['title'])]
+
+
+def test_sqlite_repository_stores_no_plaintext_passwords(database_path):
+    repo = SqliteRepository(database_path)
+    assert verify_password(repo.get_user('fmercury').password, 'mvNNbc1eLA$i') == (True, None)
@@ -0,0 +1,33 @@
+from collections import Counter
+
+from benchmarks import synthetic_catalog
+from movie_web_app.adapters import memory_repository, sqlite_repository
+from movie_web_app.adapters.memory_repository import MemoryRepository, read_csv_file
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
+
+
+def test_synthetic_catalog_loads_like_the_sample_data(tmp_path):
+    data_path = str(tmp_path / 'catalog')
+    movies_path, users_path, reviews_path = synthetic_catalog.generate(data_path, 2000, users=50, reviews=300)
+
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo)
+    assert repo.get_number_of_movies() == 2000
+    assert repo.get_last_movie().rank == 2000
+    assert len(repo.get_all_users()) == 50
+
+    sqlite_repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    sqlite_repository.populate(data_path, sqlite_repo)
+    assert sqlite_repo.get_number_of_movies() == 2000
+
+    # Actors follow a Zipf distribution: the most common one is in many more movies than a typical one.
+    actors = Counter(actor for movie in repo.all_movies() for actor in movie.actors)
+    counts = sorted(actors.values(), reverse=True)
+    assert counts[0] > 10 * counts[len(counts) // 2]
+
+    reviews = list(read_csv_file(reviews_path))
+    assert len(reviews) == 300
+    assert all(repo.get_user(user_name) is not None and 1 <= int(rank) <= 2000 for _, user_name, rank, _, _ in reviews)
+
+    assert synthetic_catalog.generate(str(tmp_path / 'again'), 2000, users=50, reviews=300)
+    assert open(movies_path).read() == open(str(tmp_path / 'again' / 'Data1000Movies.csv')).read()
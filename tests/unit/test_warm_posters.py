@@ -0,0 +1,106 @@
+import os
+import sqlite3
+
+import pytest
+
+from movie_web_app import create_app
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.omdb import OMDbClient, OMDbException
+from movie_web_app.adapters.poster_cache import PosterCache
+from movie_web_app.domain.model import Movie
+from movie_web_app.posters import services as poster_services
+
+TEST_DATA_PATH = os.path.join(os.sep, 'Users', 'yezi', 'CS235-Assignment-2', 'movie_web_app', 'adapters')
+
+
+class FlakyClient:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def fetch(self, title, year=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OMDbException('connection refused')
+        return {'Title': title, 'Poster': 'http://posters/{}.jpg'.format(title)}
+
+
+@pytest.fixture
+def small_repo():
+    repo = MemoryRepository()
+    for rank, (title, year) in enumerate([('Prometheus', 2012), ('Split', 2016), ('Sing', 2016)], start=1):
+        movie = Movie(title, year)
+        movie.rank = rank
+        repo.add_movie(movie)
+    return repo
+
+
+def test_warm_posters_fills_the_cache_and_resumes(small_repo, omdb_server, tmp_path):
+    cache = PosterCache(OMDbClient(omdb_server.url, 'test-key'))
+    checkpoint = str(tmp_path / 'warm.checkpoint')
+
+    summary = poster_services.warm_posters(small_repo, cache, checkpoint_path=checkpoint)
+    assert summary['fetched'] == 3
+    assert cache.lookup('Split', 2016)[0]
+    assert poster_services.read_checkpoint(checkpoint) == {1, 2, 3}
+
+    summary = poster_services.warm_posters(small_repo, cache, checkpoint_path=checkpoint)
+    assert summary['skipped'] == 3
+    assert summary['fetched'] == 0
+
+
+def test_fetch_with_retry_backs_off(small_repo):
+    delays = []
+    cache = PosterCache(FlakyClient(failures=2))
+
+    details = poster_services.fetch_with_retry('Split', 2016, cache, retries=3, backoff=0.5, sleep=delays.append)
+    assert details['Title'] == 'Split'
+    assert delays == [0.5, 1.0]
+
+
+def test_warm_posters_leaves_failures_out_of_the_checkpoint(small_repo, tmp_path):
+    checkpoint = str(tmp_path / 'warm.checkpoint')
+    cache = PosterCache(FlakyClient(failures=100))
+
+    summary = poster_services.warm_posters(small_repo, cache, checkpoint_path=checkpoint, retries=1,
+                                           sleep=lambda seconds: None)
+    assert summary['failed'] == 3
+    assert poster_services.read_checkpoint(checkpoint) == set()
+
+
+class BrokenStoreCache(PosterCache):
+    # A poster store that fails for one title.
+    def lookup(self, title, year):
+        if title == 'Split':
+            raise sqlite3.OperationalError('disk I/O error')
+        return super().lookup(title, year)
+
+    def get(self, title, year):
+        if title == 'Split':
+            raise sqlite3.OperationalError('disk I/O error')
+        return super().get(title, year)
+
+
+def test_warm_posters_carries_on_past_other_failures(small_repo, tmp_path):
+    checkpoint = str(tmp_path / 'warm.checkpoint')
+    cache = BrokenStoreCache(FlakyClient(failures=0))
+
+    summary = poster_services.warm_posters(small_repo, cache, checkpoint_path=checkpoint)
+    assert summary['fetched'] == 2 and summary['failed'] == 1
+    assert poster_services.read_checkpoint(checkpoint) == {1, 3}
+
+
+def test_warm_posters_command(omdb_server, tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'OMDB_URL': omdb_server.url,
+        'JOURNAL_PATH': None,
+        'POSTER_CACHE_PATH': str(tmp_path / 'posters.sqlite3'),
+        'POSTER_WARM_CHECKPOINT': str(tmp_path / 'warm.checkpoint'),
+    })
+
+    result = app.test_cli_runner().invoke(args=['warm-posters', '--workers', '8'])
+    assert result.exit_code == 0
+    assert '1000/1000 movies' in result.output
+    assert 'Fetched 1000' in result.output